@@ -0,0 +1,192 @@
+"""
+Benchmark of the GraphQL response decoding modes.
+
+Decodes synthetic pages of 100 issues, commits and pull requests, shaped like
+the GitHub responses to the generated queries, with each `DecodeMode` and
+checks that every mode builds the same models.
+
+Usage, from `apps/backend`:
+    PYTHONPATH=src python benchmarks/decoding.py [--pages 50] [--repeat 5]
+"""
+
+import argparse
+import gc
+import json
+import time
+from collections.abc import Callable
+from functools import partial
+from typing import Any
+
+import httpx
+
+from services.github.async_base_client import AsyncBaseClient
+from services.github.decoding import DecodeMode, decode
+from services.gql.get_repo_commits import GetRepoCommits
+from services.gql.get_repo_issues import GetRepoIssues
+from services.gql.get_repo_pull_requests import GetRepoPullRequests
+
+MODES: tuple[DecodeMode, ...] = ("validate", "json", "trusted")
+PAGE_SIZE = 100
+
+
+def _labels(index: int) -> dict[str, Any]:
+    return {"edges": [{"node": {"name": f"label-{index % 7}"}}]}
+
+
+def issues_page(page: int) -> dict[str, Any]:
+    return {
+        "repository": {
+            "issues": {
+                "pageInfo": {"hasNextPage": True, "endCursor": f"cursor-{page}"},
+                "edges": [
+                    {
+                        "node": {
+                            "title": f"Issue {index}",
+                            "url": f"https://github.com/o/r/issues/{index}",
+                            "state": "OPEN" if index % 3 else "CLOSED",
+                            "stateReason": None if index % 3 else "COMPLETED",
+                            "createdAt": "2024-01-01T00:00:00Z",
+                            "updatedAt": "2024-02-01T00:00:00Z",
+                            "comments": {"totalCount": index % 11},
+                            "labels": _labels(index),
+                        }
+                    }
+                    for index in range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)
+                ],
+            }
+        }
+    }
+
+
+def commits_page(page: int) -> dict[str, Any]:
+    return {
+        "repository": {
+            "defaultBranchRef": {
+                "target": {
+                    "__typename": "Commit",
+                    "history": {
+                        "pageInfo": {
+                            "hasNextPage": True,
+                            "endCursor": f"cursor-{page}",
+                        },
+                        "edges": [
+                            {
+                                "node": {
+                                    "oid": f"{index:040x}",
+                                    "committedDate": "2024-01-01T00:00:00Z",
+                                    "authoredDate": "2024-01-01T00:00:00Z",
+                                    "author": {"name": "Author"},
+                                    "message": f"Commit {index}",
+                                    "committer": {"name": "Committer"},
+                                    "changedFilesIfAvailable": index % 5,
+                                    "additions": index % 13,
+                                    "deletions": index % 17,
+                                    "status": {"state": "SUCCESS"},
+                                }
+                            }
+                            for index in range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)
+                        ],
+                    },
+                }
+            }
+        }
+    }
+
+
+def pull_requests_page(page: int) -> dict[str, Any]:
+    return {
+        "repository": {
+            "pullRequests": {
+                "totalCount": PAGE_SIZE * 1000,
+                "pageInfo": {"hasNextPage": True, "endCursor": f"cursor-{page}"},
+                "nodes": [
+                    {
+                        "mergedAt": "2024-01-02T00:00:00Z" if index % 2 else None,
+                        "title": f"Pull request {index}",
+                        "createdAt": "2024-01-01T00:00:00Z",
+                        "updatedAt": "2024-02-01T00:00:00Z",
+                        "additions": index % 13,
+                        "deletions": index % 17,
+                        "commits": {"totalCount": index % 3 + 1},
+                        "labels": _labels(index),
+                        "body": "Body " * 20,
+                        "url": f"https://github.com/o/r/pull/{index}",
+                        "comments": {"totalCount": index % 11},
+                        "reviews": {"totalCount": index % 4},
+                        "mergedBy": {"__typename": "User", "login": "merger"}
+                        if index % 2
+                        else None,
+                        "author": {"__typename": "User", "login": "author"},
+                        "state": "MERGED" if index % 2 else "OPEN",
+                    }
+                    for index in range(page * PAGE_SIZE, (page + 1) * PAGE_SIZE)
+                ],
+            }
+        }
+    }
+
+
+def _get_data(response: httpx.Response) -> dict[str, Any]:
+    return AsyncBaseClient.get_data(None, response)  # type: ignore[arg-type]
+
+
+def _time(decode_all: Callable[[], list[Any]], repeat: int) -> float:
+    """Best time of several runs, with the garbage collector off like `timeit`."""
+    timings = []
+    for _ in range(repeat):
+        gc.collect()
+        gc.disable()
+        try:
+            start = time.perf_counter()
+            decode_all()
+            timings.append(time.perf_counter() - start)
+        finally:
+            gc.enable()
+    return min(timings)
+
+
+def benchmark(
+    name: str,
+    model: Any,
+    make_page: Callable[[int], dict[str, Any]],
+    pages: int,
+    repeat: int,
+) -> None:
+    responses = [
+        httpx.Response(200, content=json.dumps({"data": make_page(page)}).encode())
+        for page in range(pages)
+    ]
+
+    def decode_all(mode: DecodeMode) -> list[Any]:
+        return [decode(response, model, mode, _get_data) for response in responses]
+
+    expected = [result.model_dump() for result in decode_all("validate")]
+    timings: dict[DecodeMode, float] = {}
+    for mode in MODES:
+        if [result.model_dump() for result in decode_all(mode)] != expected:
+            raise AssertionError(f"{name}: {mode} decoding differs from validate")
+        timings[mode] = _time(partial(decode_all, mode), repeat)
+
+    print(f"{name} ({pages * PAGE_SIZE} items)")
+    for mode in MODES:
+        print(
+            f"  {mode:<9} {timings[mode] * 1000:8.1f} ms"
+            f"  {timings['validate'] / timings[mode]:5.1f}x"
+        )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--pages", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    for name, model, make_page in (
+        ("issues", GetRepoIssues, issues_page),
+        ("commits", GetRepoCommits, commits_page),
+        ("pull requests", GetRepoPullRequests, pull_requests_page),
+    ):
+        benchmark(name, model, make_page, args.pages, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
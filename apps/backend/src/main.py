@@ -1,11 +1,144 @@
 """Main entry point for the API."""
 
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from langchain_openai import AzureOpenAIEmbeddings
 
+from services.agents.graph import build_agent_graph
+from services.agents.llm_cache import LLMResponseCache
+from services.agents.plan_cache import (
+    Embedder,
+    EmbeddingsEmbedder,
+    HashingEmbedder,
+    PlanCache,
+)
+from services.agents.store import RepoStore
+from services.agents.usage import StageUsage
+from services.cache import (
+    CacheBackend,
+    MemoryCacheBackend,
+    ResultCache,
+    SQLiteCacheBackend,
+)
+from services.github.rate_limit import RateLimiter
+from services.github.transport import create_http_client
+from services.jobs import JobQueue, JobStore
+from services.singleflight import SingleFlight, SQLiteLock
 from src.routes.main import router as api_router
+from utils.config import Settings, get_settings
+
+
+def create_result_cache(settings: Settings) -> ResultCache | None:
+    """Create the cache of the analytics results, if enabled."""
+    backend: CacheBackend
+    if settings.result_cache_backend == "memory":
+        backend = MemoryCacheBackend(settings.result_cache_max_entries)
+    elif settings.result_cache_backend == "sqlite":
+        backend = SQLiteCacheBackend(
+            settings.result_cache_path, settings.result_cache_max_entries
+        )
+    else:
+        return None
+    return ResultCache(backend, settings.result_cache_ttl.total_seconds())
+
+
+def create_llm_caches(settings: Settings) -> dict[str, LLMResponseCache]:
+    """Create the caches of the planner and developer LLM responses, if enabled."""
+    backend: CacheBackend
+    if settings.llm_cache_backend == "memory":
+        backend = MemoryCacheBackend(settings.llm_cache_max_entries)
+    elif settings.llm_cache_backend == "sqlite":
+        backend = SQLiteCacheBackend(
+            settings.llm_cache_path, settings.llm_cache_max_entries
+        )
+    else:
+        return {}
+    # One cache per agent so each has its own hit rate, sharing the entries.
+    ttl = settings.llm_cache_ttl.total_seconds()
+    return {agent: LLMResponseCache(backend, ttl) for agent in ("planner", "developer")}
+
+
+def create_plan_cache(settings: Settings) -> PlanCache | None:
+    """Create the semantic cache of the planner outputs, if enabled."""
+    if not settings.plan_cache_path:
+        return None
+    embedder: Embedder
+    if settings.plan_cache_embedder == "azure":
+        embedder = EmbeddingsEmbedder(
+            AzureOpenAIEmbeddings(
+                api_version=settings.azure_openai_api_version,
+                azure_endpoint=settings.azure_openai_endpoint,
+                azure_deployment=settings.plan_cache_embedding_deployment,
+                api_key=settings.azure_openai_api_key,
+            ),
+            name=settings.plan_cache_embedding_deployment,
+        )
+    else:
+        embedder = HashingEmbedder()
+    return PlanCache(
+        settings.plan_cache_path,
+        embedder,
+        threshold=settings.plan_cache_threshold,
+        ttl=settings.plan_cache_ttl.total_seconds(),
+        max_entries=settings.plan_cache_max_entries,
+    )
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the process-wide resources shared by every request."""
+    settings = get_settings()
+    app.state.repo_store = (
+        RepoStore(settings.repo_store_path, settings.repo_store_sync_interval)
+        if settings.repo_store_path
+        else None
+    )
+    app.state.llm_caches = create_llm_caches(settings)
+    app.state.plan_cache = create_plan_cache(settings)
+    app.state.llm_usage = StageUsage()
+    app.state.agent_graph = build_agent_graph(
+        settings,
+        app.state.repo_store,
+        app.state.llm_caches,
+        app.state.plan_cache,
+        app.state.llm_usage,
+    )
+    app.state.result_cache = create_result_cache(settings)
+    # Other workers can only reuse a result through the shared SQLite cache:
+    # coordinate them only in that case.
+    app.state.single_flight = SingleFlight(
+        SQLiteLock(
+            settings.single_flight_lock_path,
+            settings.single_flight_lease.total_seconds(),
+        )
+        if settings.result_cache_backend == "sqlite"
+        else None
+    )
+    app.state.rate_limiter = RateLimiter(
+        reserve=settings.github_rate_limit_reserve,
+        max_retries=settings.github_max_retries,
+        backoff_base=settings.github_backoff_base,
+        backoff_max=settings.github_backoff_max,
+        max_tokens=settings.github_rate_limit_max_tokens,
+    )
+    app.state.job_queue = JobQueue(
+        JobStore(settings.job_store_path),
+        workers=settings.job_workers,
+        max_pending=settings.job_max_pending,
+        timeout=settings.job_timeout.total_seconds(),
+    )
+    async with create_http_client(settings) as http_client:
+        app.state.github_http_client = http_client
+        await app.state.job_queue.start()
+        try:
+            yield
+        finally:
+            await app.state.job_queue.stop()
+
 
-app = FastAPI()
+app = FastAPI(lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
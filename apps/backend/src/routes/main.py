@@ -2,7 +2,9 @@
 Routes for the main API.
 """
 
-from fastapi import APIRouter
+from typing import Annotated
+
+from fastapi import APIRouter, Header, Request
 
 from src.routes.v1.main import router as v1_router
 
@@ -18,4 +20,11 @@ async def health():
 async def hello():
     return {"message": "Hello, World!"}
 
+
+@router.get("/rate-limits")
+async def rate_limits(request: Request, x_gh_pat: Annotated[str, Header()]):
+    """GitHub rate limit budget of the caller's token, for monitoring."""
+    return request.app.state.rate_limiter.snapshot(x_gh_pat)
+
+
 router.include_router(v1_router)
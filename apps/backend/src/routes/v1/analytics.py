@@ -4,25 +4,31 @@ This endpoint is used to generate charts in typescript
 from the repository using Natural Language.
 """
 
+import asyncio
 import uuid
+from collections.abc import AsyncIterator
+from functools import partial
 from pathlib import Path
-from typing import Annotated
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, Header
+import httpx
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 from langchain_core.messages import HumanMessage
-from langchain_openai import AzureChatOpenAI
-
-from services.agents.analyst import ANALYST_SYSTEM_MESSAGE, DataAnalystAgent
-from services.agents.developer import DEVELOPER_SYSTEM_MESSAGE, DeveloperAgent
-from services.agents.graph import create_agent_graph
-from services.agents.planner import PLANNER_SYSTEM_MESSAGE, PlannerAgent
-from services.agents.supervisor import SUPERVISOR_SYSTEM_MESSAGE, SupervisorAgent
-from services.agents.tools import (
-    GetRepoCommitsTool,
-    GetRepoIssuesTools,
-    GetRepoPullRequestsTool,
-)
-from services.gql.client import Client
+from langgraph.graph.state import CompiledStateGraph
+
+from services.agents.analyst import write_chart_data
+from services.agents.llm_cache import LLMResponseCache
+from services.agents.plan_cache import PlanCache
+from services.agents.store import RepoStore
+from services.agents.streaming import format_sse, stream_graph_events, with_heartbeat
+from services.agents.tools import GITHUB_CLIENT
+from services.agents.usage import StageUsage
+from services.cache import ResultCache
+from services.github.client import AsyncGitHubClient
+from services.github.rate_limit import RateLimiter
+from services.jobs import JobQueue, QueueFullError
+from services.singleflight import SingleFlight
 from utils.config import Settings, get_settings
 from validation.api import AnalyticsRequest
 
@@ -33,72 +39,120 @@ router = APIRouter(
 )
 
 
-async def get_github_client(x_gh_pat: Annotated[str, Header()]) -> Client:
-    """Get an authenticated GitHub client."""
-    return Client(
-        url="https://api.github.com/graphql",
-        headers={"Authorization": f"Bearer {x_gh_pat}"},
-    )
+def get_http_client(request: Request) -> httpx.AsyncClient:
+    """Get the HTTP connection pool shared by every GitHub client."""
+    return request.app.state.github_http_client
 
 
-@router.post("/")
-async def analytics(
-    request: AnalyticsRequest,
-    client: Annotated[Client, Depends(get_github_client)],
+def get_agent_graph(request: Request) -> CompiledStateGraph:
+    """Get the agent graph built at startup."""
+    return request.app.state.agent_graph
+
+
+def get_repo_store(request: Request) -> RepoStore | None:
+    """Get the local repository data store, if enabled."""
+    return request.app.state.repo_store
+
+
+def get_result_cache(request: Request) -> ResultCache | None:
+    """Get the cache of the analytics results, if enabled."""
+    return request.app.state.result_cache
+
+
+def get_llm_caches(request: Request) -> dict[str, LLMResponseCache]:
+    """Get the LLM response cache of each agent."""
+    return request.app.state.llm_caches
+
+
+def get_plan_cache(request: Request) -> PlanCache | None:
+    """Get the semantic cache of the planner outputs."""
+    return request.app.state.plan_cache
+
+
+def get_llm_usage(request: Request) -> StageUsage:
+    """Get the LLM usage accounting of each graph node."""
+    return request.app.state.llm_usage
+
+
+def get_single_flight(request: Request) -> SingleFlight:
+    """Get the coalescing of identical in-flight requests."""
+    return request.app.state.single_flight
+
+
+def get_job_queue(request: Request) -> JobQueue:
+    """Get the queue of the background chart generations."""
+    return request.app.state.job_queue
+
+
+def get_rate_limiter(request: Request) -> RateLimiter:
+    """Get the scheduler keeping GitHub requests within their rate limits."""
+    return request.app.state.rate_limiter
+
+
+async def get_github_client(
+    x_gh_pat: Annotated[str, Header()],
+    http_client: Annotated[httpx.AsyncClient, Depends(get_http_client)],
+    rate_limiter: Annotated[RateLimiter, Depends(get_rate_limiter)],
     settings: Annotated[Settings, Depends(get_settings)],
-):
-    # Initialize the LLMs
-    llm = AzureChatOpenAI(
-        api_version=settings.azure_openai_api_version,
-        azure_endpoint=settings.azure_openai_endpoint,
-        model="gpt-4o",
-        api_key=settings.azure_openai_api_key.get_secret_value(),  # type: ignore
+) -> AsyncGitHubClient:
+    """Get an authenticated GitHub client on top of the shared pool."""
+    return AsyncGitHubClient(
+        url=str(settings.github_graphql_url),
+        headers={"Authorization": f"Bearer {x_gh_pat}"},
+        http_client=http_client,
+        rate_limiter=rate_limiter,
+        decode_mode=settings.github_decode_mode,
     )
 
-    llm_mini = AzureChatOpenAI(
-        api_version=settings.azure_openai_api_version,
-        azure_endpoint=settings.azure_openai_endpoint,
-        model="gpt-4o-mini",
-        api_key=settings.azure_openai_api_key.get_secret_value(),  # type: ignore
-    )
 
-    # Create the Supervisor
-    supervisor = SupervisorAgent(
-        llm=llm_mini,
-        tools=[],
-        system_message=SUPERVISOR_SYSTEM_MESSAGE,
-        team_members=["planner", "analyst", "developer"],
-    )
+def write_chart(owner: str, repo: str, typescript_code: str) -> None:
+    """Dump the generated chart where the frontend serves it from."""
+    parent_dir = f"../frontend/src/app/charts/{owner}/{repo}/"
+    Path(parent_dir).mkdir(parents=True, exist_ok=True)
+    file_path = f"{parent_dir}/chart.tsx"
+    with open(file_path, "w") as f:
+        f.write(typescript_code)
 
-    # Create the agents
-    planner = PlannerAgent(
-        llm=llm,
-        tools=[],
-        system_message=PLANNER_SYSTEM_MESSAGE,
-    )
 
-    analyst_tools = [
-        GetRepoIssuesTools(client=client),
-        GetRepoCommitsTool(client=client),
-        GetRepoPullRequestsTool(client=client),
-    ]
-    analyst = DataAnalystAgent(
-        llm=llm,
-        tools=analyst_tools,
-        system_message=ANALYST_SYSTEM_MESSAGE,
-    )
+def write_result(owner: str, repo: str, result: dict[str, Any]) -> dict[str, Any]:
+    """
+    Dump a generated chart and its data where the frontend serves them from.
 
-    developer = DeveloperAgent(
-        llm=llm,
-        tools=[],
-        system_message=DEVELOPER_SYSTEM_MESSAGE,
+    Every chart of a repository loads the same data file, which the requests
+    for other charts overwrite. It is rewritten with the chart, e.g. when the
+    chart is served from the cache.
+
+    Returns:
+        The result without its data, as returned to the client.
+    """
+    write_chart(owner, repo, result["typescript_code"])
+    write_chart_data(owner, repo, result["data"])
+    return {key: value for key, value in result.items() if key != "data"}
+
+
+async def get_cached(cache: ResultCache, key: str) -> dict[str, Any] | None:
+    """Get a cached result, if it holds the chart data to restore."""
+    cached = await asyncio.to_thread(cache.get, key)
+    return cached if cached is not None and "data" in cached else None
+
+
+async def result_cache_key(
+    request: AnalyticsRequest, store: RepoStore | None, token: str
+) -> str:
+    """Key a request on its content and the freshness of the repository data."""
+    freshness = (
+        await asyncio.to_thread(store.freshness_token, request.owner, request.repo)
+        if store is not None
+        else ""
+    )
+    return ResultCache.key(
+        request.owner, request.repo, request.message, freshness, token
     )
 
-    # Create the graph
-    graph = create_agent_graph(supervisor, planner, analyst, developer)
 
-    # Initialize the context
-    context = {
+def initial_context(request: AnalyticsRequest) -> dict[str, Any]:
+    """Initialize the graph state of a request."""
+    return {
         "message": request.message,
         "owner": request.owner,
         "repo": request.repo,
@@ -110,17 +164,191 @@ async def analytics(
             )
         ],
     }
-    # Execute the graph
-    final_context = graph.invoke(context)
-    # The typescript code is the result of the execution.
-    # It needs to be dumped into a file.
-    parent_dir = f"../frontend/src/app/charts/{request.owner}/{request.repo}/"
-    Path(parent_dir).mkdir(parents=True, exist_ok=True)
-    file_path = f"{parent_dir}/chart.tsx"
-    with open(file_path, "w") as f:
-        f.write(final_context["developer_output"].typescript_code)
 
+
+async def generate_chart(
+    request: AnalyticsRequest,
+    client: AsyncGitHubClient,
+    graph: CompiledStateGraph,
+) -> dict[str, Any]:
+    """Run the agent graph to generate the chart of a request and its data."""
+    final_context = await graph.ainvoke(
+        initial_context(request), config={"configurable": {GITHUB_CLIENT: client}}
+    )
     return {
         "typescript_code": final_context["developer_output"].typescript_code,
         "explanation": final_context["developer_output"].explanation,
+        "data": final_context.get("chart_data"),
     }
+
+
+async def generate_cached(
+    request: AnalyticsRequest,
+    token: str,
+    client: AsyncGitHubClient,
+    graph: CompiledStateGraph,
+    store: RepoStore | None,
+    cache: ResultCache | None,
+) -> dict[str, Any]:
+    """Generate the chart of a request, reading and filling the result cache."""
+    if cache is not None:
+        # Another worker may have stored the result while this one waited.
+        cached = await get_cached(cache, await result_cache_key(request, store, token))
+        if cached is not None:
+            return cached
+    result = await generate_chart(request, client, graph)
+    if cache is not None:
+        # The graph may have synced new data: key the result on its freshness.
+        await asyncio.to_thread(
+            cache.set, await result_cache_key(request, store, token), result
+        )
+    return result
+
+
+@router.post("/")
+async def analytics(
+    request: AnalyticsRequest,
+    response: Response,
+    x_gh_pat: Annotated[str, Header()],
+    client: Annotated[AsyncGitHubClient, Depends(get_github_client)],
+    graph: Annotated[CompiledStateGraph, Depends(get_agent_graph)],
+    store: Annotated[RepoStore | None, Depends(get_repo_store)],
+    cache: Annotated[ResultCache | None, Depends(get_result_cache)],
+    single_flight: Annotated[SingleFlight, Depends(get_single_flight)],
+):
+    # Serve repeated requests from the cache, until the repository data changes
+    key = await result_cache_key(request, store, x_gh_pat)
+    if cache is not None:
+        cached = await get_cached(cache, key)
+        if cached is not None:
+            response.headers["X-Cache"] = "HIT"
+            return write_result(request.owner, request.repo, cached)
+        response.headers["X-Cache"] = "MISS"
+
+    # Identical requests in flight share a single execution of the graph
+    result, shared = await single_flight.run(
+        key, partial(generate_cached, request, x_gh_pat, client, graph, store, cache)
+    )
+    if shared:
+        response.headers["X-Coalesced"] = "true"
+
+    # The typescript code is the result of the execution.
+    # It needs to be dumped into a file, with the data it loads.
+    return write_result(request.owner, request.repo, result)
+
+
+@router.post("/stream")
+async def analytics_stream(
+    request: AnalyticsRequest,
+    x_gh_pat: Annotated[str, Header()],
+    client: Annotated[AsyncGitHubClient, Depends(get_github_client)],
+    graph: Annotated[CompiledStateGraph, Depends(get_agent_graph)],
+    settings: Annotated[Settings, Depends(get_settings)],
+    store: Annotated[RepoStore | None, Depends(get_repo_store)],
+    cache: Annotated[ResultCache | None, Depends(get_result_cache)],
+):
+    """
+    Stream the progress of a chart generation as Server-Sent Events.
+
+    Emits a `node` event when an agent starts or finishes, the `token`s of
+    the developer as they are generated, and a final `result` (or `error`).
+    """
+    cached = None
+    if cache is not None:
+        key = await result_cache_key(request, store, x_gh_pat)
+        cached = await get_cached(cache, key)
+
+    async def events() -> AsyncIterator[str]:
+        if cached is not None:
+            yield format_sse(
+                "result", write_result(request.owner, request.repo, cached)
+            )
+            return
+
+        async for event, data in stream_graph_events(
+            graph,
+            initial_context(request),
+            config={"configurable": {GITHUB_CLIENT: client}},
+        ):
+            if event == "result":
+                if cache is not None:
+                    key = await result_cache_key(request, store, x_gh_pat)
+                    await asyncio.to_thread(cache.set, key, data)
+                data = write_result(request.owner, request.repo, data)
+            yield format_sse(event, data)
+
+    return StreamingResponse(
+        with_heartbeat(events(), settings.sse_heartbeat_interval),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",
+            "X-Cache": "HIT" if cached is not None else "MISS",
+        },
+    )
+
+
+@router.post("/jobs", status_code=202)
+async def create_job(
+    request: AnalyticsRequest,
+    x_gh_pat: Annotated[str, Header()],
+    client: Annotated[AsyncGitHubClient, Depends(get_github_client)],
+    graph: Annotated[CompiledStateGraph, Depends(get_agent_graph)],
+    store: Annotated[RepoStore | None, Depends(get_repo_store)],
+    cache: Annotated[ResultCache | None, Depends(get_result_cache)],
+    job_queue: Annotated[JobQueue, Depends(get_job_queue)],
+):
+    """Queue a chart generation and return its job ID right away."""
+
+    async def run() -> dict[str, Any]:
+        # Not coalesced with the identical requests in flight: their execution
+        # is shielded from cancellation, so a job timing out would leave its
+        # graph running while the worker takes the next job.
+        result = await generate_cached(request, x_gh_pat, client, graph, store, cache)
+        return write_result(request.owner, request.repo, result)
+
+    try:
+        job_id = await job_queue.submit(request.model_dump(), run)
+    except QueueFullError as exc:
+        raise HTTPException(
+            status_code=503, detail=str(exc), headers={"Retry-After": "30"}
+        ) from exc
+    return {"job_id": job_id, "status": "queued"}
+
+
+@router.get("/jobs/{job_id}")
+async def get_job(
+    job_id: str,
+    job_queue: Annotated[JobQueue, Depends(get_job_queue)],
+):
+    """Get the status of a job, and its result once it succeeded."""
+    job = await asyncio.to_thread(job_queue.store.get, job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
+
+
+@router.get("/llm-cache")
+async def llm_cache_stats(
+    llm_caches: Annotated[dict[str, LLMResponseCache], Depends(get_llm_caches)],
+):
+    """Get the hits, misses and hit rate of the LLM response cache of each agent."""
+    return {agent: cache.stats() for agent, cache in llm_caches.items()}
+
+
+@router.get("/plan-cache")
+async def plan_cache_stats(
+    plan_cache: Annotated[PlanCache | None, Depends(get_plan_cache)],
+):
+    """Get the hits, misses and hit rate of the semantic cache of the plans."""
+    if plan_cache is None:
+        raise HTTPException(status_code=404, detail="The plan cache is disabled")
+    return plan_cache.stats()
+
+
+@router.get("/usage")
+async def llm_usage(
+    usage: Annotated[StageUsage, Depends(get_llm_usage)],
+):
+    """Get the LLM calls, tokens and latency of each graph node."""
+    return usage.stats()
@@ -0,0 +1,178 @@
+"""
+Aggregation of the fetched rows into the series drawn by a chart.
+
+The analyst fetches raw issues, commits or pull requests as columns. Instead
+of shipping every row to the browser, the rows are grouped and aggregated
+here with pandas, following the `Aggregation` the planner put in the technical
+specs, so the chart receives a few points per series.
+"""
+
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+from services.agents.columns import Columns
+from services.agents.timeseries import accumulate, bucket, fill_gaps
+from services.agents.types import Aggregation
+
+# Columns computed from a pair of timestamps, when a dataset has both.
+DERIVED_COLUMNS = {
+    "merge_time_hours": ("created_at", "merged_at"),
+}
+
+
+def to_frame(columns: Columns) -> pd.DataFrame:
+    """Build a dataframe from a columnar dataset, with the derived columns."""
+    frame = pd.DataFrame(columns)
+    for name, (start, end) in DERIVED_COLUMNS.items():
+        if start in frame and end in frame:
+            duration = pd.to_datetime(frame[end], utc=True) - pd.to_datetime(
+                frame[start], utc=True
+            )
+            frame[name] = duration.dt.total_seconds() / 3600
+    return frame
+
+
+def needed_columns(aggregation: Aggregation) -> set[str]:
+    """The dataset columns an aggregation reads, derived columns expanded."""
+    columns = set(aggregation.group_by)
+    if aggregation.time_column:
+        columns.add(aggregation.time_column)
+    if aggregation.value_column:
+        columns.add(aggregation.value_column)
+    for name in columns & DERIVED_COLUMNS.keys():
+        columns.remove(name)
+        columns.update(DERIVED_COLUMNS[name])
+    return columns
+
+
+def _check_column(frame: pd.DataFrame, column: str) -> None:
+    if column not in frame:
+        raise ValueError(
+            f"Unknown column {column!r}, available columns: {list(frame.columns)}"
+        )
+
+
+def _bin(values: pd.Series, bins: int) -> pd.Series:
+    """
+    Cut numbers into equal-width bins, labelled with their lower edge.
+
+    The bins are categories, so the empty ones are kept as groups.
+    """
+    numbers = pd.to_numeric(values, errors="coerce")
+    if numbers.isna().all():
+        raise ValueError(f"Cannot bin {values.name!r}, it holds no numbers")
+    edges = np.histogram_bin_edges(numbers.dropna(), bins=bins)
+    labels = [float(f"{edge:.4g}") for edge in edges[:-1]]
+    if len(set(labels)) < len(labels):
+        labels = [float(edge) for edge in edges[:-1]]
+    return pd.cut(numbers, edges, labels=labels, include_lowest=True)
+
+
+def _records(frame: pd.DataFrame) -> list[dict[str, Any]]:
+    """Convert a dataframe to JSON-ready records."""
+    for column in frame.columns:
+        if pd.api.types.is_datetime64_any_dtype(frame[column]):
+            frame[column] = frame[column].dt.strftime("%Y-%m-%d")
+    frame.columns = [str(column) for column in frame.columns]
+    return frame.astype(object).where(frame.notna(), None).to_dict(orient="records")
+
+
+def aggregate(columns: Columns, aggregation: Aggregation) -> list[dict[str, Any]]:
+    """
+    Group and aggregate rows into chart data.
+
+    Args:
+        columns: The dataset, as returned by the tools.
+        aggregation: How to group and aggregate them.
+
+    Returns:
+        One record per group, holding the group columns and a `value`. With
+        `pivot`, one record per remaining group with a column per value of
+        the last `group_by` column. With `bins`, one group per bin of the
+        first `group_by` column, empty bins included.
+
+    Raises:
+        ValueError: When the aggregation refers to unknown columns.
+    """
+    frame = to_frame(columns)
+    if frame.empty:
+        return []
+
+    keys: list[str] = []
+    if aggregation.time_column:
+        _check_column(frame, aggregation.time_column)
+        frame[aggregation.time_column] = bucket(
+            frame[aggregation.time_column],
+            aggregation.time_bucket or "day",
+            aggregation.timezone or "UTC",
+        )
+        # Rows without the timestamp (e.g. unmerged PRs) are not on the axis.
+        frame = frame.dropna(subset=[aggregation.time_column])
+        keys.append(aggregation.time_column)
+    for index, column in enumerate(aggregation.group_by):
+        _check_column(frame, column)
+        if aggregation.bins and index == 0:
+            frame[column] = _bin(frame[column], aggregation.bins)
+            # Rows without a number are in no bin.
+            frame = frame.dropna(subset=[column])
+            keys.append(column)
+            continue
+        if frame[column].map(lambda value: isinstance(value, list)).any():
+            # A row with several labels counts once per label.
+            frame = frame.explode(column, ignore_index=True)
+        # Missing values form their own group, e.g. rows without labels.
+        frame[column] = (
+            frame[column].astype(object).where(frame[column].notna(), "(none)")
+        )
+        keys.append(column)
+
+    if aggregation.metric == "count":
+        values = pd.Series(1, index=frame.index)
+    else:
+        if aggregation.value_column is None:
+            raise ValueError(f"The {aggregation.metric} metric needs a value_column")
+        _check_column(frame, aggregation.value_column)
+        values = pd.to_numeric(frame[aggregation.value_column], errors="coerce")
+
+    if keys:
+        grouped = values.groupby(
+            [frame[key] for key in keys], dropna=False, observed=False
+        )
+    else:
+        grouped = values.groupby(lambda _: 0)
+    match aggregation.metric:
+        case "count" | "sum":
+            series = grouped.sum()
+        case "mean":
+            series = grouped.mean()
+        case "percentile":
+            series = grouped.quantile((aggregation.percentile or 50) / 100)
+    # Buckets without rows count as zero, but have no average or percentile.
+    fill_value = 0 if aggregation.metric in ("count", "sum") else None
+    if aggregation.time_column:
+        if aggregation.fill_gaps:
+            series = fill_gaps(series, aggregation.time_bucket or "day", fill_value)
+        series = accumulate(series, aggregation.rolling_window, aggregation.cumulative)
+    result = series.rename("value").reset_index()
+    if not keys:
+        return _records(result[["value"]])
+
+    if aggregation.pivot and aggregation.group_by:
+        column = keys[-1]
+        if len(keys) == 1:
+            result = result.set_index(column)[["value"]].T
+        else:
+            result = result.pivot_table(
+                index=keys[:-1],
+                columns=column,
+                values="value",
+                aggfunc="first",
+                fill_value=fill_value,
+            ).reset_index()
+            result.columns.name = None
+
+    if aggregation.time_column in result:
+        result = result.sort_values(aggregation.time_column)
+    return _records(result.reset_index(drop=True))
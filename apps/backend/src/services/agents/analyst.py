@@ -1,21 +1,28 @@
 import json
-import uuid
 from pathlib import Path
 from typing import Any, Dict
 
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
-from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableLambda, ensure_config
 
+from services.agents.aggregation import aggregate, needed_columns
 from services.agents.base import BaseAgent
+from services.agents.columns import DATASET_MODELS, DATASETS, Columns, to_rows
+from services.agents.history import history_message
+from services.agents.profiling import describe
+from services.agents.tools import DATASET_COLUMNS
 from services.agents.types import AgentContext, AnalystOutput, PlannerOutput
 
 ANALYST_SYSTEM_MESSAGE = """You are a data analyst specializing in GitHub repository analytics and data transformation.
 
 Your tools:
-1. get_repo_issues: Fetches latest 100 issues with optional state filter
-2. get_repo_commits: Fetches latest 100 commits
-3. get_repo_pull_requests: Fetches latest 100 PRs with optional state filter
+1. get_repo_issues: Fetches the most recently updated issues with optional state filter
+2. get_repo_commits: Fetches the latest commits of the default branch
+3. get_repo_pull_requests: Fetches the latest updated PRs with optional state filter
+4. get_repo_counts: Counts issues or PRs by state, optionally per day, week or month
+   of a date range, without fetching them. Prefer it for summary charts that only
+   show counts, such as open vs closed issues or PRs merged per month
 
 Your task is to:
 1. Analyze the planner's requirements to determine needed data
@@ -24,6 +31,9 @@ Your task is to:
 4. Provide clear data structure documentation
 5. Handle data aggregation and formatting
 
+When the requirements need more than one dataset, request all of them in a
+single step by calling every required tool at once: they are fetched in parallel.
+
 Focus on:
 - Selecting relevant data points
 - Proper data transformation
@@ -34,6 +44,20 @@ Focus on:
 Ensure the data is properly formatted for chart visualization."""
 
 
+def write_chart_data(owner: str, repo: str, data: Any) -> str:
+    """
+    Dump the chart data where the frontend serves it from.
+
+    Returns:
+        The static route of the data.
+    """
+    parent_dir = f"../frontend/public/charts/{owner}/{repo}"
+    Path(parent_dir).mkdir(parents=True, exist_ok=True)
+    with open(f"{parent_dir}/data.json", "w") as f:
+        json.dump(data, f)
+    return f"/charts/{owner}/{repo}/data.json"
+
+
 class DataAnalystAgent(BaseAgent):
     """Agent responsible for data analysis and transformation."""
 
@@ -53,20 +77,38 @@ class DataAnalystAgent(BaseAgent):
             strict=True,
         )
 
+        # A single agent step: every tool call the model makes in that step is
+        # awaited concurrently by the executor, and the datasets are read back
+        # from the intermediate steps instead of going through the LLM again.
         return AgentExecutor(
             agent=agent,
             tools=self.tools,
             verbose=True,
             handle_parsing_errors=True,
+            max_iterations=1,
+            return_intermediate_steps=True,
         )
 
-    def execute(self, context: Dict[str, Any]) -> AgentContext:
+    async def execute(self, context: Dict[str, Any]) -> AgentContext:
         """Execute the data analysis phase."""
         planner_output = PlannerOutput.model_validate(
             context.get("planner_output", {}) or {}
         )
 
-        result = self.agent_executor.invoke(
+        # Only fetch the columns the planned aggregation reads, when they all
+        # belong to the dataset.
+        aggregation = planner_output.technical_specs.aggregation
+        columns_by_tool: dict[str, list[str]] = {}
+        if aggregation:
+            needed = needed_columns(aggregation)
+            if needed <= DATASETS[DATASET_MODELS[aggregation.dataset]].keys():
+                columns_by_tool[f"get_repo_{aggregation.dataset}"] = sorted(needed)
+
+        # The tools read the config of the runnable the executor runs in, not
+        # the config the executor is invoked with, so it runs in a lambda
+        # whose config holds the columns, next to the GitHub client.
+        config = ensure_config()
+        result = await RunnableLambda(self.agent_executor.ainvoke).ainvoke(
             {
                 "input": (
                     "Analyze the following requirements and fetch appropriate GitHub data:\n"
@@ -75,44 +117,65 @@ class DataAnalystAgent(BaseAgent):
                     f"For repository: {context['owner']}/{context['repo']}\n"
                     "Determine which data to fetch and how to transform it for visualization."
                 )
-            }
+            },
+            config={
+                "configurable": {
+                    **config.get("configurable", {}),
+                    DATASET_COLUMNS: columns_by_tool,
+                }
+            },
         )
 
-        # Write the data to a file
-        parent_dir = f"../frontend/public/charts/{
-            context['owner']}/{context['repo']}"
-        Path(parent_dir).mkdir(parents=True, exist_ok=True)
-        file_path = f"{parent_dir}/data.json"
-        with open(file_path, "w") as f:
-            json.dump(result["output"], f)
-
-        # Extract or generate data schema description from the output
-        sample_item = result["output"][0]
-        data_description = {
-            "schema": {
-                field: type(value).__name__
-                for field, value in sample_item.items()
-            },
-            "total_records": len(result["output"]),
-            "sample_fields": list(sample_item.keys())
+        tool_names = {tool.name for tool in self.tools}
+        columns: dict[str, Columns] = {
+            action.tool: observation
+            for action, observation in result["intermediate_steps"]
+            if action.tool in tool_names and isinstance(observation, dict)
         }
+        if not columns:
+            raise ValueError(f"No data could be fetched: {result['output']}")
+
+        # With an aggregation in the specs, the chart data is the aggregated
+        # series. Otherwise a single dataset is written as a list of rows,
+        # several datasets as an object keyed by tool name.
+        aggregation_note: dict[str, Any] = {}
+        datasets: dict[str, list[dict[str, Any]]] | None = None
+        if aggregation and f"get_repo_{aggregation.dataset}" in columns:
+            name = f"get_repo_{aggregation.dataset}"
+            try:
+                datasets = {name: aggregate(columns[name], aggregation)}
+                aggregation_note = {"aggregation": aggregation.model_dump()}
+            except ValueError as exc:
+                # Fall back to the raw rows, the chart can still aggregate them.
+                aggregation_note = {"aggregation_error": str(exc)}
+        if datasets is None:
+            datasets = {name: to_rows(dataset) for name, dataset in columns.items()}
+
+        # The developer gets a profile of the full data and a few sampled rows.
+        if len(datasets) == 1:
+            rows = next(iter(datasets.values()))
+            data: Any = rows
+            data_sample, data_description = describe(rows)
+        else:
+            data = datasets
+            data_sample = []
+            descriptions: dict[str, Any] = {}
+            for name, rows in datasets.items():
+                sample, descriptions[name] = describe(rows, sample_size=4)
+                data_sample += [{"dataset": name, **row} for row in sample]
+            data_description = {"datasets": descriptions}
+        data_description.update(aggregation_note)
 
         analyst_output = AnalystOutput(
-            data_sample=result["output"][:10],
+            data_sample=data_sample,
             data_description=data_description,
-            file_route=f"/charts/{context['owner']
-                                  }/{context['repo']}/data.json",
+            file_route=write_chart_data(context["owner"], context["repo"], data),
         )
 
         context.pop("chat_history", None)
         return AgentContext(
             **context,
-            chat_history=[
-                AIMessage(
-                    id=str(uuid.uuid4()),
-                    content=analyst_output.model_dump_json(),
-                    name="analyst",
-                )
-            ],
+            chat_history=[history_message("analyst", analyst_output)],
             analyst_output=analyst_output,
+            chart_data=data,
         )
@@ -0,0 +1,168 @@
+"""
+Columnar datasets built straight from the GitHub GraphQL responses.
+
+The tools used to build an `Issues`, `Commits` or `PullRequests` model per
+item and dump it back to JSON, validating and serializing every row twice.
+Here each GraphQL node is read once and its values appended to one list per
+column, a dict-of-arrays that pandas turns into a dataframe without copying
+rows around. The generated client already validated the response, so the
+per-row models are only used when validation is asked for.
+"""
+
+from collections.abc import Callable, Iterable
+from enum import Enum
+from typing import Any
+
+from pydantic import BaseModel
+
+from services.agents.types import Commits, Issues, PullRequests, _label_names
+from services.gql.enums import StatusState
+
+# A dataset as one list of values per column, all of the same length.
+Columns = dict[str, list[Any]]
+
+
+def _value(value: Any) -> Any:
+    """JSON-ready value of a generated enum, other values as is."""
+    return value.value if isinstance(value, Enum) else value
+
+
+# How each column of a dataset is read from its GraphQL node, matching the
+# fields of the corresponding model. Timestamps are kept as the ISO strings
+# GitHub returns.
+ISSUE_COLUMNS: dict[str, Callable[[Any], Any]] = {
+    "url": lambda node: node.url,
+    "title": lambda node: node.title,
+    "state": lambda node: _value(node.state),
+    "state_reason": lambda node: _value(node.state_reason),
+    "comments_count": lambda node: node.comments.total_count,
+    "created_at": lambda node: node.created_at,
+    "updated_at": lambda node: node.updated_at,
+    "labels": lambda node: _label_names(node.labels),
+}
+
+COMMIT_COLUMNS: dict[str, Callable[[Any], Any]] = {
+    "oid": lambda node: node.oid,
+    "committed_date": lambda node: node.committed_date,
+    "authored_date": lambda node: node.authored_date,
+    "author": lambda node: node.author.name if node.author else None,
+    "message": lambda node: node.message,
+    "changed_files_if_available": lambda node: node.changed_files_if_available or 0,
+    "additions": lambda node: node.additions,
+    "deletions": lambda node: node.deletions,
+    "status": lambda node: _value(
+        node.status.state if node.status and node.status.state else StatusState.PENDING
+    ),
+}
+
+PULL_REQUEST_COLUMNS: dict[str, Callable[[Any], Any]] = {
+    "url": lambda node: node.url,
+    "merged_at": lambda node: node.merged_at,
+    "title": lambda node: node.title,
+    "created_at": lambda node: node.created_at,
+    "updated_at": lambda node: node.updated_at,
+    "additions": lambda node: node.additions,
+    "deletions": lambda node: node.deletions,
+    "commits": lambda node: node.commits.total_count,
+    "reviews": lambda node: node.reviews.total_count if node.reviews else 0,
+    "comments": lambda node: node.comments.total_count if node.comments else 0,
+    "state": lambda node: _value(node.state),
+    "labels": lambda node: _label_names(node.labels),
+}
+
+# The columns and the validating model of each dataset, by model.
+DATASETS: dict[type[BaseModel], dict[str, Callable[[Any], Any]]] = {
+    Issues: ISSUE_COLUMNS,
+    Commits: COMMIT_COLUMNS,
+    PullRequests: PULL_REQUEST_COLUMNS,
+}
+
+
+# The model of each dataset, by the name the planner uses.
+DATASET_MODELS: dict[str, type[BaseModel]] = {
+    "issues": Issues,
+    "commits": Commits,
+    "pull_requests": PullRequests,
+}
+
+# GraphQL node fields read by the columns not named after them.
+_NODE_FIELDS = {"comments_count": "comments"}
+
+
+def node_fields(columns: Iterable[str]) -> set[str]:
+    """The fields of the GraphQL nodes the columns are read from."""
+    return {_NODE_FIELDS.get(column, column) for column in columns}
+
+
+def empty_columns(
+    model: type[BaseModel], columns: Iterable[str] | None = None
+) -> Columns:
+    """
+    A dataset without rows.
+
+    Args:
+        model: The model of the dataset, e.g. `Issues`.
+        columns: Only these columns of the model. Every column when `None`.
+    """
+    selected = DATASETS[model].keys() if columns is None else set(columns)
+    return {column: [] for column in DATASETS[model] if column in selected}
+
+
+def extend_columns(
+    columns: Columns,
+    nodes: Iterable[Any],
+    model: type[BaseModel],
+    validate: bool = False,
+) -> None:
+    """
+    Append the values of GraphQL nodes to a columnar dataset.
+
+    Args:
+        columns: The dataset, as created by `empty_columns`.
+        nodes: The GraphQL nodes, `None` nodes are skipped.
+        model: The model of the dataset, e.g. `Issues`.
+        validate: Build and validate the model of every node, e.g. to check
+            the shape of the rows when changing the queries. Slower, and
+            needs every field of the nodes.
+    """
+    extractors = DATASETS[model]
+    for node in nodes:
+        if node is None:
+            continue
+        if validate:
+            row = model.from_node(node).model_dump(mode="json")
+            for column, values in columns.items():
+                values.append(row[column])
+        else:
+            for column, values in columns.items():
+                values.append(extractors[column](node))
+
+
+def iter_rows(nodes: Iterable[Any], model: type[BaseModel]) -> Iterable[dict[str, Any]]:
+    """Read GraphQL nodes as JSON-ready rows, without building the models."""
+    extractors = DATASETS[model]
+    for node in nodes:
+        if node is not None:
+            yield {column: extract(node) for column, extract in extractors.items()}
+
+
+def columns_from_rows(
+    rows: Iterable[dict[str, Any]],
+    model: type[BaseModel],
+    columns: Iterable[str] | None = None,
+) -> Columns:
+    """Turn rows with the fields of a model into a columnar dataset."""
+    dataset = empty_columns(model, columns)
+    for row in rows:
+        for column, values in dataset.items():
+            values.append(row.get(column))
+    return dataset
+
+
+def to_rows(columns: Columns) -> list[dict[str, Any]]:
+    """Turn a columnar dataset into a list of rows."""
+    names = list(columns)
+    return [
+        dict(zip(names, values, strict=True))
+        for values in zip(*columns.values(), strict=True)
+    ]
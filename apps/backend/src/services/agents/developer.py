@@ -1,14 +1,16 @@
-import uuid
+import json
 from datetime import datetime
 from typing import Any, Dict
 
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools.base import StructuredTool
-from langchain_core.messages import AIMessage
 from langchain_experimental.tools import PythonREPLTool
+from langchain_openai import AzureChatOpenAI
 
 from services.agents.base import BaseAgent
+from services.agents.history import history_message
+from services.agents.templates import render_chart
 from services.agents.tools import create_developer_output
 from services.agents.types import (
     AgentContext,
@@ -34,6 +36,8 @@ Focus on:
 - Every generated chart should be well labeled and manage dates properly.
 
 The analyst will provide:
+- A profile of every column of the data: its type, nullability, distinct values,
+  range of numbers and dates, and most frequent values
 - A sample of the data for you to understand the data structure
 - The route to retrieve the full dataset in JSON format
 - Have in mind that most of the data points have a `label` field. This label field categorizes the data point. 
@@ -44,14 +48,34 @@ Output generation:
 The current date is: {current_date}
 
 The output code should export the chart component as default and named "Chart".
-Use the sample data to understand how to create the visualization.
+Use the data profile and sample to understand how to create the visualization.
 In the code load the full data from the data.json file path provided by the analyst.
 Avoid at all costs using fetching data from external APIs.
 My job depends on you, so please do your best."""
 
 
+def _compact_json(value: Any) -> str:
+    """Serialize a value for the prompt, without the whitespace."""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"), default=str)
+
+
 class DeveloperAgent(BaseAgent):
-    """Agent responsible for implementing the technical specifications."""
+    """
+    Agent responsible for implementing the technical specifications.
+
+    Args:
+        use_templates: Render the charts a template fits without the LLM.
+    """
+
+    def __init__(
+        self,
+        llm: AzureChatOpenAI,
+        tools: list[Any],
+        system_message: str,
+        use_templates: bool = False,
+    ):
+        self.use_templates = use_templates
+        super().__init__(llm, tools, system_message)
 
     def _create_agent_executor(self) -> AgentExecutor:
         create_developer_output_tool = StructuredTool.from_function(
@@ -62,13 +86,15 @@ class DeveloperAgent(BaseAgent):
             return_direct=True,
         )
 
+        # The graph is built once, so the date is read whenever a prompt is
+        # formatted rather than now.
         prompt = ChatPromptTemplate.from_messages(
             [
                 ("system", self.system_message),
                 ("human", "{input}"),
                 MessagesPlaceholder(variable_name="agent_scratchpad"),
             ]
-        ).partial(current_date=datetime.now().strftime("%Y-%m-%d"))
+        ).partial(current_date=lambda: datetime.now().strftime("%Y-%m-%d"))
 
         agent = create_openai_tools_agent(
             llm=self.llm,
@@ -90,26 +116,27 @@ class DeveloperAgent(BaseAgent):
             ],
             verbose=True,
             handle_parsing_errors=True,
+            # Invoke the LLM rather than stream from it, so its cache is used.
+            # Its tokens are still streamed when the graph is run in the
+            # messages mode.
+            stream_runnable=False,
         )
 
-    def execute(self, context: Dict[str, Any]) -> AgentContext:
-        """Execute the development phase."""
-        planner_output = PlannerOutput.model_validate(
-            context.get("planner_output", {}) or {}
-        )
-        analyst_output = AnalystOutput.model_validate(
-            context.get("analyst_output", {}) or {}
-        )
-
-        result = self.agent_executor.invoke(
+    async def _develop(
+        self, planner_output: PlannerOutput, analyst_output: AnalystOutput
+    ) -> DeveloperOutput:
+        """Ask the LLM to write the chart."""
+        description = _compact_json(analyst_output.data_description)
+        result = await self.agent_executor.ainvoke(
             {
                 "input": (
                     "Implement the following technical specifications in TypeScript:\n"
                     f"Requirements: {planner_output.requirements}\n"
                     f"Technical Specs: {planner_output.technical_specs}\n"
-                    f"Use the following data sample to understand the data structure:\n"
-                    f"Data sample: {analyst_output.data_sample}\n"
-                    f"Data description: {analyst_output.data_description}\n"
+                    "Use the following profile of every column and sample of rows "
+                    "to understand the data structure:\n"
+                    f"Data description: {description}\n"
+                    f"Data sample: {_compact_json(analyst_output.data_sample)}\n"
                     f"Load the full data using axios or fetch from the following static route:\n"
                     f"Full Dataset route: {analyst_output.file_route}\n"
                     f"You must always invoke use tool **create_developer_output** to return your work.\n"
@@ -119,21 +146,30 @@ class DeveloperAgent(BaseAgent):
         )
 
         # Parse the result into structured output
-        developer_output = DeveloperOutput(
+        return DeveloperOutput(
             typescript_code=result["output"]["typescript_code"],
             explanation=result["output"]["explanation"],
             error_message=result["output"].get("error_message", None),
         )
 
+    async def execute(self, context: Dict[str, Any]) -> AgentContext:
+        """Execute the development phase."""
+        planner_output = PlannerOutput.model_validate(
+            context.get("planner_output", {}) or {}
+        )
+        analyst_output = AnalystOutput.model_validate(
+            context.get("analyst_output", {}) or {}
+        )
+
+        developer_output = (
+            render_chart(planner_output, analyst_output) if self.use_templates else None
+        )
+        if developer_output is None:
+            developer_output = await self._develop(planner_output, analyst_output)
+
         context.pop("chat_history", None)
         return AgentContext(
             **context,
-            chat_history=[
-                AIMessage(
-                    id=str(uuid.uuid4()),
-                    content=developer_output.model_dump_json(),
-                    name="developer",
-                )
-            ],
+            chat_history=[history_message("developer", developer_output)],
             developer_output=developer_output,
         )
@@ -1,15 +1,26 @@
-from typing import TypeVar
+from collections.abc import Mapping
+from typing import Literal
 
+from langchain_core.caches import BaseCache
+from langchain_openai import AzureChatOpenAI
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 
-from services.agents.analyst import DataAnalystAgent
-from services.agents.developer import DeveloperAgent
-from services.agents.planner import PlannerAgent
-from services.agents.supervisor import SupervisorAgent
+from services.agents.analyst import ANALYST_SYSTEM_MESSAGE, DataAnalystAgent
+from services.agents.developer import DEVELOPER_SYSTEM_MESSAGE, DeveloperAgent
+from services.agents.plan_cache import PlanCache
+from services.agents.planner import PLANNER_SYSTEM_MESSAGE, PlannerAgent
+from services.agents.store import RepoStore
+from services.agents.supervisor import SUPERVISOR_SYSTEM_MESSAGE, SupervisorAgent
+from services.agents.tools import (
+    GetRepoCommitsTool,
+    GetRepoCountsTool,
+    GetRepoIssuesTools,
+    GetRepoPullRequestsTool,
+)
 from services.agents.types import AgentContext
-
-T = TypeVar("T")
+from services.agents.usage import StageUsage
+from utils.config import Settings
 
 
 def create_agent_graph(
@@ -17,16 +28,26 @@ def create_agent_graph(
     planner: PlannerAgent,
     analyst: DataAnalystAgent,
     developer: DeveloperAgent,
+    routing: Literal["llm", "rules"] = "llm",
 ) -> CompiledStateGraph:
-    """Create the agent workflow graph."""
+    """
+    Create the agent workflow graph.
+
+    Args:
+        routing: How the supervisor selects the next worker. "llm" asks the
+            LLM before every hop, "rules" follows the planner, analyst,
+            developer order and only asks the LLM to recover from errors.
+    """
 
     workflow = StateGraph(AgentContext)
 
     # Add nodes for each agent
-    workflow.add_node("supervisor", supervisor.agent_executor)
-    workflow.add_node("planner", lambda context: planner.execute(context))
-    workflow.add_node("analyst", lambda context: analyst.execute(context))
-    workflow.add_node("developer", lambda context: developer.execute(context))
+    workflow.add_node(
+        "supervisor", supervisor.route if routing == "rules" else supervisor.execute
+    )
+    workflow.add_node("planner", planner.execute)
+    workflow.add_node("analyst", analyst.execute)
+    workflow.add_node("developer", developer.execute)
 
     # Define the edges and conditions
     workflow.add_edge("planner", "supervisor")
@@ -47,3 +68,93 @@ def create_agent_graph(
 
     # Compile the graph
     return workflow.compile()
+
+
+def _cached(llm: AzureChatOpenAI, cache: BaseCache | None) -> AzureChatOpenAI:
+    """A copy of the LLM answering from the cache, or the LLM without a cache."""
+    return llm if cache is None else llm.model_copy(update={"cache": cache})
+
+
+def build_agent_graph(
+    settings: Settings,
+    store: RepoStore | None = None,
+    llm_caches: Mapping[str, BaseCache] | None = None,
+    plan_cache: PlanCache | None = None,
+    usage: StageUsage | None = None,
+) -> CompiledStateGraph:
+    """
+    Build the LLM clients, the agents and the graph shared by every request.
+
+    Per-request inputs are not bound here: the owner and repository go
+    through the graph state, and the GitHub client authenticated with the
+    caller's token through the runnable config (see `tools.GITHUB_CLIENT`).
+
+    Args:
+        settings: The application settings.
+        store: The local repository data store used by the tools, if enabled.
+        llm_caches: The cache of the LLM responses of each agent, e.g.
+            `planner`, if enabled.
+        plan_cache: The semantic cache of the planner outputs, if enabled.
+        usage: Accounts the tokens and latency of the LLM calls of each node.
+    """
+    # Initialize the LLMs
+    llm = AzureChatOpenAI(
+        api_version=settings.azure_openai_api_version,
+        azure_endpoint=settings.azure_openai_endpoint,
+        model="gpt-4o",
+        api_key=settings.azure_openai_api_key.get_secret_value(),  # type: ignore
+        callbacks=[usage] if usage else None,
+    )
+
+    llm_mini = AzureChatOpenAI(
+        api_version=settings.azure_openai_api_version,
+        azure_endpoint=settings.azure_openai_endpoint,
+        model="gpt-4o-mini",
+        api_key=settings.azure_openai_api_key.get_secret_value(),  # type: ignore
+        callbacks=[usage] if usage else None,
+    )
+
+    # Create the Supervisor
+    supervisor = SupervisorAgent(
+        llm=llm_mini,
+        tools=[],
+        system_message=SUPERVISOR_SYSTEM_MESSAGE,
+        team_members=["planner", "analyst", "developer"],
+    )
+
+    llm_caches = llm_caches or {}
+
+    # Create the agents
+    planner = PlannerAgent(
+        llm=_cached(llm, llm_caches.get("planner")),
+        tools=[],
+        system_message=PLANNER_SYSTEM_MESSAGE,
+        plan_cache=plan_cache,
+    )
+
+    analyst_tools = [
+        tool(
+            page_size=settings.github_page_size,
+            max_items=settings.github_max_items,
+            store=store,
+            validate=settings.github_validate_rows,
+        )
+        for tool in (GetRepoIssuesTools, GetRepoCommitsTool, GetRepoPullRequestsTool)
+    ]
+    analyst_tools.append(GetRepoCountsTool())
+    analyst = DataAnalystAgent(
+        llm=llm,
+        tools=analyst_tools,
+        system_message=ANALYST_SYSTEM_MESSAGE,
+    )
+
+    developer = DeveloperAgent(
+        llm=_cached(llm, llm_caches.get("developer")),
+        tools=[],
+        system_message=DEVELOPER_SYSTEM_MESSAGE,
+        use_templates=settings.chart_templates,
+    )
+
+    return create_agent_graph(
+        supervisor, planner, analyst, developer, routing=settings.supervisor_routing
+    )
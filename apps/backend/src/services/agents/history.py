@@ -0,0 +1,146 @@
+"""
+Token-budgeted chat history of the agent graph.
+
+Every agent appends its output to `AgentContext.chat_history`, which the
+supervisor re-reads on every hop. With the whole outputs dumped there, e.g.
+the data sample of the analyst, the prompts grew with the dataset. Instead:
+
+- `history_message` keeps the large fields of an output out of the message,
+  as references to the graph state where the full output is.
+- `BoundedHistory`, the reducer of `chat_history`, keeps the user request
+  and the most recent messages within a token budget. The older messages
+  are replaced by a note naming their authors.
+
+Prompt tokens, and with them latency and cost, are thus bounded whatever
+the size of the data.
+"""
+
+import json
+import uuid
+from collections.abc import Sequence
+from functools import cache
+from typing import Any
+
+import tiktoken
+from langchain_core.messages import AIMessage, BaseMessage
+from pydantic import BaseModel
+
+# Tokens of the chat history kept in the graph state.
+MAX_HISTORY_TOKENS = 2000
+# Tokens of an output field above which it is kept out of the history.
+MAX_FIELD_TOKENS = 200
+
+# Fields always kept in the history: the supervisor routes on them.
+_INLINE_FIELDS = frozenset({"error_message"})
+
+_OMITTED_ID = "history-omitted"
+
+
+@cache
+def _encoding() -> tiktoken.Encoding | None:
+    """
+    The encoding of the GPT-4o models, or `None` when it cannot be loaded,
+    e.g. offline. Loaded once either way: a failure is not retried.
+    """
+    try:
+        return tiktoken.get_encoding("o200k_base")
+    except Exception:
+        return None
+
+
+def count_tokens(text: str) -> int:
+    """
+    Count the tokens of a text with the encoding of the GPT-4o models.
+
+    Estimated from its length when the encoding cannot be loaded.
+    """
+    encoding = _encoding()
+    if encoding is None:
+        return len(text) // 4 + 1
+    # Special tokens in the text, e.g. `<|endoftext|>`, are counted as text.
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def message_tokens(message: BaseMessage) -> int:
+    """Count the tokens of a message's content."""
+    content = message.content
+    return count_tokens(content if isinstance(content, str) else json.dumps(content))
+
+
+def history_message(name: str, output: BaseModel) -> AIMessage:
+    """
+    Build the chat history message of an agent output.
+
+    Fields larger than `MAX_FIELD_TOKENS` are replaced by a reference to
+    their location in the graph state, e.g. `analyst_output.data_sample`.
+
+    Args:
+        name: The agent, e.g. `analyst`.
+        output: Its output, stored in the state as `<name>_output`.
+    """
+    content: dict[str, Any] = {}
+    for field, value in output.model_dump(mode="json").items():
+        serialized = json.dumps(value)
+        tokens = count_tokens(serialized)
+        if field in _INLINE_FIELDS or tokens <= MAX_FIELD_TOKENS:
+            content[field] = value
+        else:
+            content[field] = f"<{tokens} tokens in state {name}_output.{field}>"
+    return AIMessage(id=str(uuid.uuid4()), content=json.dumps(content), name=name)
+
+
+class BoundedHistory:
+    """
+    Reducer of the chat history keeping it within a token budget.
+
+    The first message, the user request, is always kept. The newest messages
+    are kept as long as they fit the budget, and a single note replaces the
+    older ones.
+
+    Args:
+        max_tokens: Tokens of the kept messages.
+    """
+
+    def __init__(self, max_tokens: int = MAX_HISTORY_TOKENS):
+        self.max_tokens = max_tokens
+
+    def __call__(
+        self, left: Sequence[BaseMessage], right: Sequence[BaseMessage]
+    ) -> list[BaseMessage]:
+        omitted: list[str] = []
+        messages: list[BaseMessage] = []
+        for message in [*left, *right]:
+            if message.id == _OMITTED_ID:
+                omitted.extend(message.additional_kwargs.get("omitted", []))
+            else:
+                messages.append(message)
+        if not messages:
+            return []
+
+        first, *rest = messages
+        budget = self.max_tokens - message_tokens(first)
+        kept: list[BaseMessage] = []
+        for index in range(len(rest) - 1, -1, -1):
+            tokens = message_tokens(rest[index])
+            if tokens > budget:
+                omitted.extend(
+                    message.name or message.type for message in rest[: index + 1]
+                )
+                break
+            budget -= tokens
+            kept.append(rest[index])
+        kept.reverse()
+
+        if not omitted:
+            return [first, *kept]
+        authors = ", ".join(dict.fromkeys(omitted))
+        note = AIMessage(
+            id=_OMITTED_ID,
+            name="history",
+            content=(
+                f"{len(omitted)} earlier messages from {authors} were left out of"
+                " the history to stay within its token budget."
+            ),
+            additional_kwargs={"omitted": omitted},
+        )
+        return [first, note, *kept]
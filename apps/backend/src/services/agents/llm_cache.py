@@ -0,0 +1,141 @@
+"""
+Cache of the LLM responses of the planner and developer stages.
+
+Requests for the same chart of a repository, e.g. "issues per week", send
+the planner the same prompt, and the developer the same plan and data
+sample. A repeated prompt is answered from this cache instead of a new Azure
+OpenAI round trip.
+
+The cache plugs into the chat models as a LangChain `BaseCache`. Entries are
+keyed on the normalized prompt and on the model parameters, which include the
+schemas of the tools bound to the model, so a change of prompt, model or tool
+misses the cache. They are stored in a `services.cache` backend, with its TTL
+and least recently used eviction.
+"""
+
+import hashlib
+import json
+import threading
+from typing import Any
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.messages import message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, Generation
+
+from services.cache import CacheBackend
+
+# Key of the `generation_info` flag set on the generations served from the
+# cache, which cost no tokens.
+CACHED = "cached"
+
+
+def _normalize(value: Any) -> Any:
+    """
+    Normalize a serialized prompt: collapse the whitespace of the strings and
+    drop the message ids, which differ between otherwise identical prompts.
+    """
+    if isinstance(value, str):
+        return " ".join(value.split())
+    if isinstance(value, list):
+        return [_normalize(item) for item in value]
+    if isinstance(value, dict):
+        return {key: _normalize(item) for key, item in value.items() if key != "id"}
+    return value
+
+
+def _generation_info(generation: Generation) -> dict[str, Any] | None:
+    info = generation.generation_info
+    return (
+        {key: value for key, value in info.items() if key != CACHED} if info else info
+    )
+
+
+def _dump_generation(generation: Generation) -> dict[str, Any]:
+    if isinstance(generation, ChatGeneration):
+        message = message_to_dict(generation.message)
+        # The id of the run that produced the message is not reused.
+        message["data"]["id"] = None
+        return {"message": message, "generation_info": _generation_info(generation)}
+    return {"text": generation.text, "generation_info": _generation_info(generation)}
+
+
+def _load_generation(data: dict[str, Any]) -> Generation:
+    generation_info = {**(data["generation_info"] or {}), CACHED: True}
+    if "message" in data:
+        return ChatGeneration(
+            message=messages_from_dict([data["message"]])[0],
+            generation_info=generation_info,
+        )
+    return Generation(text=data["text"], generation_info=generation_info)
+
+
+class LLMResponseCache(BaseCache):
+    """
+    Exact-match cache of LLM responses, with hit and miss counters.
+
+    Args:
+        backend: Where the entries are stored.
+        ttl: Seconds a response is served before the LLM is asked again.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str, llm_string: str) -> str:
+        """
+        Build the cache key of an LLM call.
+
+        Args:
+            prompt: The serialized messages sent to the model.
+            llm_string: The model and call parameters, including the tools.
+        """
+        try:
+            normalized: Any = _normalize(json.loads(prompt))
+        except json.JSONDecodeError:
+            normalized = _normalize(prompt)
+        return hashlib.sha256(
+            json.dumps([normalized, llm_string], sort_keys=True).encode()
+        ).hexdigest()
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        value = self.backend.get(self.key(prompt, llm_string))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if value is None:
+            return None
+        return [_load_generation(generation) for generation in value["generations"]]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        self.backend.set(
+            self.key(prompt, llm_string),
+            {
+                "generations": [
+                    _dump_generation(generation) for generation in return_val
+                ]
+            },
+            self.ttl,
+        )
+
+    def clear(self, **kwargs: Any) -> None:
+        self.backend.clear()
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """The hits, misses and hit rate since the cache was created."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
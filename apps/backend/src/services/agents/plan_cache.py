@@ -0,0 +1,371 @@
+"""
+Semantic cache of the planner outputs.
+
+Users phrase the same chart in many ways, e.g. "PRs merged per month" and
+"monthly merged pull requests", which the exact-match LLM cache tells apart.
+Here the request messages are embedded, and a new request of a repository
+reuses the plan of its nearest previous request when their similarity is
+above a threshold, skipping the planner LLM altogether.
+
+Similar requests can still ask for different charts, e.g. opened instead of
+merged pull requests. A plan is therefore only reused when both messages
+also mention the same key terms: datasets, states, time buckets and scopes,
+negations, rankings, statistics, chart types and numbers.
+
+The embedding model is pluggable: `HashingEmbedder` runs offline and
+needs no fitting, `EmbeddingsEmbedder` wraps any LangChain embedding model.
+The index is a SQLite table of the vectors, searched by brute force among
+the plans of the repository.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+import zlib
+from contextlib import closing
+from itertools import pairwise
+from pathlib import Path
+from typing import Any, Protocol
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS plans (
+    id INTEGER PRIMARY KEY,
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    embedder TEXT NOT NULL,
+    message TEXT NOT NULL,
+    terms TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    plan TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS plans_repo ON plans (owner, repo, embedder);
+CREATE INDEX IF NOT EXISTS plans_accessed_at ON plans (accessed_at);
+"""
+
+# Canonical form of the words that change the meaning of a chart request. A
+# word may stand for several terms, e.g. "monthly" for "per month".
+_KEY_TERMS = {
+    **dict.fromkeys(["issue", "issues"], "issue"),
+    **dict.fromkeys(["pr", "prs", "pull_request", "pulls"], "pull_request"),
+    **dict.fromkeys(["commit", "commits"], "commit"),
+    **dict.fromkeys(["open", "opened", "opening"], "open"),
+    **dict.fromkeys(["close", "closed", "closing"], "closed"),
+    **dict.fromkeys(["merge", "merged", "merging", "merges"], "merged"),
+    **dict.fromkeys(["unmerged"], "not merged"),
+    **dict.fromkeys(["create", "created", "new"], "created"),
+    **dict.fromkeys(["update", "updated"], "updated"),
+    **dict.fromkeys(["day", "days"], "day"),
+    **dict.fromkeys(["week", "weeks"], "week"),
+    **dict.fromkeys(["month", "months"], "month"),
+    **dict.fromkeys(["year", "years"], "year"),
+    **dict.fromkeys(["daily"], "per day"),
+    **dict.fromkeys(["weekly"], "per week"),
+    **dict.fromkeys(["monthly"], "per month"),
+    **dict.fromkeys(["yearly", "annual", "annually"], "per year"),
+    **dict.fromkeys(["per", "each", "every"], "per"),
+    **dict.fromkeys(["last", "past", "previous"], "last"),
+    **dict.fromkeys(["this", "current"], "this"),
+    **dict.fromkeys(["not", "no", "non", "without", "never"], "not"),
+    **dict.fromkeys(["top", "largest", "biggest", "most", "highest", "max"], "top"),
+    **dict.fromkeys(
+        ["bottom", "smallest", "least", "fewest", "lowest", "min"], "bottom"
+    ),
+    **dict.fromkeys(["average", "mean", "avg"], "mean"),
+    **dict.fromkeys(["median"], "median"),
+    **dict.fromkeys(["percentile", "p90", "p95", "p99"], "percentile"),
+    **dict.fromkeys(["cumulative", "running"], "cumulative"),
+    **dict.fromkeys(["rolling", "moving"], "rolling"),
+    **dict.fromkeys(["comment", "comments"], "comment"),
+    **dict.fromkeys(["label", "labels"], "label"),
+    **dict.fromkeys(["unlabeled", "unlabelled"], "not label"),
+    **dict.fromkeys(["author", "authors", "contributor", "contributors"], "author"),
+    **dict.fromkeys(["review", "reviews"], "review"),
+    **dict.fromkeys(["addition", "additions"], "addition"),
+    **dict.fromkeys(["deletion", "deletions"], "deletion"),
+    **dict.fromkeys(["bar", "bars"], "bar"),
+    **dict.fromkeys(["line", "lines"], "line"),
+    **dict.fromkeys(["pie", "donut"], "pie"),
+    **dict.fromkeys(["area"], "area"),
+    **dict.fromkeys(["scatter"], "scatter"),
+    **dict.fromkeys(["histogram"], "histogram"),
+    **dict.fromkeys(["stacked"], "stacked"),
+}
+
+_CANONICAL_TERMS = frozenset(
+    term for terms in _KEY_TERMS.values() for term in terms.split()
+)
+
+# Words that do not tell chart requests apart.
+_STOP_WORDS = frozenset(
+    {
+        "a",
+        "an",
+        "and",
+        "are",
+        "as",
+        "at",
+        "by",
+        "chart",
+        "display",
+        "for",
+        "from",
+        "graph",
+        "how",
+        "in",
+        "is",
+        "many",
+        "number",
+        "of",
+        "on",
+        "over",
+        "plot",
+        "show",
+        "the",
+        "time",
+        "to",
+        "versus",
+        "visualize",
+        "vs",
+        "was",
+        "were",
+        "what",
+        "with",
+    }
+)
+
+_PULL_REQUEST = re.compile(r"\bpull[\s-]+requests?\b")
+_WORD = re.compile(r"[a-z0-9_]+")
+
+
+def tokenize(message: str) -> list[str]:
+    """Lowercase words of a message, key terms in their canonical form."""
+    words = _WORD.findall(_PULL_REQUEST.sub("pull_request", message.lower()))
+    return [term for word in words for term in _KEY_TERMS.get(word, word).split()]
+
+
+def key_terms(message: str) -> frozenset[str]:
+    """The key terms and numbers of a message, which a reused plan must share."""
+    return frozenset(
+        token
+        for token in tokenize(message)
+        if token in _CANONICAL_TERMS or token.isdigit()
+    )
+
+
+def _upgrade(plan: dict[str, Any]) -> dict[str, Any]:
+    """Fill in the fields added to the plans since a plan was cached."""
+    aggregation = (plan.get("technical_specs") or {}).get("aggregation")
+    if aggregation is not None:
+        aggregation.setdefault("bins", None)
+    return plan
+
+
+class Embedder(Protocol):
+    """Model embedding the request messages."""
+
+    # Identifies the vector space: plans embedded by another model are ignored.
+    name: str
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        """Embed texts as the rows of a matrix, of unit norm."""
+        ...
+
+
+def _normalize_rows(vectors: np.ndarray) -> np.ndarray:
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    return vectors / np.where(norms == 0, 1, norms)
+
+
+class HashingEmbedder:
+    """
+    Offline embedding of the words, word pairs and character trigrams of a
+    text, hashed into a fixed number of dimensions.
+
+    Stop words are left out and key terms weigh more. The trigrams match the
+    variants of the other words, e.g. "contributor" and "contributions".
+
+    Args:
+        dimensions: Size of the vectors.
+    """
+
+    def __init__(self, dimensions: int = 1024):
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def _features(self, text: str) -> list[tuple[str, float]]:
+        tokens = [token for token in tokenize(text) if token not in _STOP_WORDS]
+        features = [
+            (token, 2.0 if token in _CANONICAL_TERMS else 1.0) for token in tokens
+        ]
+        features += [(f"{a} {b}", 1.0) for a, b in pairwise(tokens)]
+        for token in tokens:
+            padded = f"<{token}>"
+            features += [(f"#{padded[i : i + 3]}", 0.5) for i in range(len(padded) - 2)]
+        return features
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for feature, weight in self._features(text):
+                # A stable hash: vectors are persisted across processes.
+                digest = zlib.crc32(feature.encode())
+                sign = 1.0 if digest & 1 else -1.0
+                vectors[row, (digest >> 1) % self.dimensions] += sign * weight
+        return _normalize_rows(vectors)
+
+
+class EmbeddingsEmbedder:
+    """
+    Embedding with a LangChain embedding model, e.g. `AzureOpenAIEmbeddings`.
+
+    Args:
+        embeddings: The embedding model.
+        name: Identifies the model, e.g. its deployment name.
+    """
+
+    def __init__(self, embeddings: Embeddings, name: str):
+        self.embeddings = embeddings
+        self.name = name
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        vectors = np.array(self.embeddings.embed_documents(texts), dtype=np.float32)
+        return _normalize_rows(vectors)
+
+
+class PlanCache:
+    """
+    SQLite index of the planner outputs by embedded request message.
+
+    Args:
+        path: Location of the SQLite database file.
+        embedder: The model embedding the messages.
+        threshold: Minimum cosine similarity of a reused plan's message.
+        ttl: Seconds a plan is reused before the planner is asked again.
+        max_entries: Number of plans kept before evicting the oldest used.
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        embedder: Embedder,
+        threshold: float = 0.8,
+        ttl: float = 7 * 24 * 3600,
+        max_entries: int = 1024,
+    ):
+        self.path = Path(path)
+        self.embedder = embedder
+        self.threshold = threshold
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per operation, so the cache can be used from any thread.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def _count(self, hit: bool) -> None:
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def lookup(self, owner: str, repo: str, message: str) -> dict[str, Any] | None:
+        """
+        Get the plan of the most similar previous request of a repository.
+
+        Returns:
+            The plan, as stored by `add`, or `None` when no previous request
+            is similar enough.
+        """
+        now = time.time()
+        terms = json.dumps(sorted(key_terms(message)))
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT id, vector, plan FROM plans"
+                " WHERE owner = ? AND repo = ? AND embedder = ? AND terms = ?"
+                " AND expires_at > ?",
+                (
+                    owner.strip().lower(),
+                    repo.strip().lower(),
+                    self.embedder.name,
+                    terms,
+                    now,
+                ),
+            ).fetchall()
+        if not rows:
+            self._count(hit=False)
+            return None
+
+        query = self.embedder.embed([message])[0]
+        vectors = np.stack([np.frombuffer(row[1], dtype=np.float32) for row in rows])
+        similarities = vectors @ query
+        best = int(np.argmax(similarities))
+        if similarities[best] < self.threshold:
+            self._count(hit=False)
+            return None
+
+        self._count(hit=True)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "UPDATE plans SET accessed_at = ? WHERE id = ?", (now, rows[best][0])
+            )
+        return _upgrade(json.loads(rows[best][2]))
+
+    def add(self, owner: str, repo: str, message: str, plan: dict[str, Any]) -> None:
+        """Index the plan made for a request."""
+        now = time.time()
+        vector = self.embedder.embed([message])[0].astype(np.float32)
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO plans (owner, repo, embedder, message, terms, vector,"
+                " plan, expires_at, accessed_at) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    owner.strip().lower(),
+                    repo.strip().lower(),
+                    self.embedder.name,
+                    message,
+                    json.dumps(sorted(key_terms(message))),
+                    vector.tobytes(),
+                    json.dumps(plan),
+                    now + self.ttl,
+                    now,
+                ),
+            )
+            connection.execute("DELETE FROM plans WHERE expires_at <= ?", (now,))
+            connection.execute(
+                "DELETE FROM plans WHERE id NOT IN"
+                " (SELECT id FROM plans ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        """Remove every plan and reset the counters."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM plans")
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self) -> dict[str, Any]:
+        """The hits, misses and hit rate since the cache was created."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": self.hits / lookups if lookups else None,
+            }
@@ -1,13 +1,15 @@
+import asyncio
 import json
-import uuid
 from typing import Any, Dict
 
 from langchain.agents import AgentExecutor, create_openai_tools_agent
 from langchain.prompts import ChatPromptTemplate, MessagesPlaceholder
 from langchain.tools.base import StructuredTool
-from langchain_core.messages import AIMessage
+from langchain_openai import AzureChatOpenAI
 
 from services.agents.base import BaseAgent
+from services.agents.history import history_message
+from services.agents.plan_cache import PlanCache
 from services.agents.tools import create_technical_plan
 from services.agents.types import (
     AgentContext,
@@ -33,6 +35,11 @@ Your task is to analyze chart generation requests and provide a structured outpu
    - Chart Type: Specify the exact chart type (line, bar, etc.)
    - Library: Theonly available library to develop the solution is "Recharts"
    - Data Format: Define the exact structure of required data
+   - Aggregation: When the chart shows grouped or time-bucketed values
+     (counts, sums, averages, percentiles), describe how to aggregate the rows
+     so the chart receives the aggregated series instead of the raw data.
+     Time buckets, time zones, empty buckets, rolling averages and running
+     totals are computed from it: do not ask for date handling in the chart
    - Technical Guidelines: List implementation guidelines and constraints
 
 Be precise and thorough. 
@@ -40,7 +47,22 @@ Your output will be parsed into a structured format and used directly for implem
 
 
 class PlannerAgent(BaseAgent):
-    """Agent responsible for planning and requirements analysis."""
+    """
+    Agent responsible for planning and requirements analysis.
+
+    Args:
+        plan_cache: Reuses the plans of similar previous requests, if set.
+    """
+
+    def __init__(
+        self,
+        llm: AzureChatOpenAI,
+        tools: list[Any],
+        system_message: str,
+        plan_cache: PlanCache | None = None,
+    ):
+        self.plan_cache = plan_cache
+        super().__init__(llm, tools, system_message)
 
     def _create_agent_executor(self) -> AgentExecutor:
         # Create a tool using the Pydantic model
@@ -72,11 +94,15 @@ class PlannerAgent(BaseAgent):
             tools=[create_plan_tool, *self.tools],
             verbose=True,
             handle_parsing_errors=True,
+            # Invoke the LLM rather than stream from it, so its cache is used.
+            # Its tokens are still streamed when the graph is run in the
+            # messages mode.
+            stream_runnable=False,
         )
 
-    def execute(self, context: Dict[str, Any]) -> AgentContext:
-        """Execute the planning phase."""
-        result = self.agent_executor.invoke(
+    async def _plan(self, context: Dict[str, Any]) -> PlannerOutput:
+        """Ask the LLM for the plan of the request."""
+        result = await self.agent_executor.ainvoke(
             {
                 "input": (
                     f"Create a technical plan for generating a chart based on this request: {
@@ -88,7 +114,7 @@ class PlannerAgent(BaseAgent):
         )
 
         # Parse the result into a PlannerOutput instance
-        plan_data = PlannerOutput(
+        return PlannerOutput(
             requirements=result["output"]["requirements"],
             acceptance_criteria=result["output"]["acceptance_criteria"],
             technical_specs=TechnicalSpecs(
@@ -97,15 +123,26 @@ class PlannerAgent(BaseAgent):
             error_message=result["output"].get("error_message", None),
         )
 
+    async def execute(self, context: Dict[str, Any]) -> AgentContext:
+        """Execute the planning phase."""
+        request = (context["owner"], context["repo"], context["message"])
+        cached = (
+            await asyncio.to_thread(self.plan_cache.lookup, *request)
+            if self.plan_cache is not None
+            else None
+        )
+        if cached is not None:
+            plan_data = PlannerOutput.model_validate(cached)
+        else:
+            plan_data = await self._plan(context)
+            if self.plan_cache is not None and plan_data.error_message is None:
+                await asyncio.to_thread(
+                    self.plan_cache.add, *request, plan_data.model_dump(mode="json")
+                )
+
         context.pop("chat_history", None)
         return AgentContext(
             **context,
-            chat_history=[
-                AIMessage(
-                    id=str(uuid.uuid4()),
-                    content=plan_data.model_dump_json(),
-                    name="planner",
-                )
-            ],
+            chat_history=[history_message("planner", plan_data)],
             planner_output=plan_data,
         )
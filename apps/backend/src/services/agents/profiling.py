@@ -0,0 +1,225 @@
+"""
+Profile and sample of the chart data, for the developer prompt.
+
+The developer used to understand the data from its first rows, dumped as is,
+and a schema inferred from the first of them. The first rows of a dataset
+are rarely representative: they are the most recent issues, all open, or the
+first buckets of a series. And every long commit message or title they hold
+is paid for in prompt tokens.
+
+Instead, every column of the full dataset is profiled here: its type,
+nullability, number of distinct values, range of numbers and dates, and most
+frequent categories. The sample is a handful of rows spread over the
+categories of the most telling column, or evenly over the dataset, with the
+long texts shortened.
+"""
+
+import json
+import numbers
+import re
+from typing import Any
+
+import numpy as np
+import pandas as pd
+
+# Rows of the sample of a dataset.
+SAMPLE_SIZE = 6
+# Most frequent values listed per categorical column.
+TOP_K = 5
+# Categories above which a column does not stratify the sample.
+MAX_STRATA = 12
+# Characters of the sampled strings, and items of the sampled lists.
+MAX_TEXT_LENGTH = 80
+MAX_LIST_ITEMS = 3
+
+_ISO_DATE = re.compile(r"^\d{4}-\d{2}-\d{2}")
+
+
+def _value_type(value: Any) -> str:
+    if isinstance(value, bool | np.bool_):
+        return "boolean"
+    if isinstance(value, numbers.Integral):
+        return "integer"
+    if isinstance(value, numbers.Real):
+        return "number"
+    if isinstance(value, str):
+        return "string"
+    if isinstance(value, list | tuple):
+        return "list"
+    return "object"
+
+
+def _column_type(values: pd.Series) -> str:
+    """The type of the non-null values of a column, e.g. `datetime`."""
+    types = set(values.map(_value_type))
+    if not types:
+        return "null"
+    if types == {"integer", "number"}:
+        return "number"
+    if len(types) > 1:
+        return "mixed"
+    (kind,) = types
+    if (
+        kind == "string"
+        and values.map(lambda value: bool(_ISO_DATE.match(value))).all()
+        and pd.to_datetime(values, utc=True, errors="coerce", format="ISO8601")
+        .notna()
+        .all()
+    ):
+        return "datetime"
+    return kind
+
+
+def _compact(value: Any) -> Any:
+    """Shorten the long strings and lists of a sampled value."""
+    if isinstance(value, str) and len(value) > MAX_TEXT_LENGTH:
+        return value[: MAX_TEXT_LENGTH - 1] + "…"
+    if isinstance(value, list) and len(value) > MAX_LIST_ITEMS:
+        return [_compact(item) for item in value[:MAX_LIST_ITEMS]]
+    return value
+
+
+def _label(value: Any) -> str:
+    label = value if isinstance(value, str) else json.dumps(value, default=str)
+    return _compact(label)
+
+
+def profile_column(values: pd.Series, top_k: int = TOP_K) -> dict[str, Any]:
+    """
+    Profile the values of a column.
+
+    Returns:
+        Its `type` and whether it is `nullable`, with the count of `nulls`.
+        Unless the values are objects, their `distinct` count, then the `min`,
+        `max` and `mean` of numbers, the `min` and `max` of dates, and the
+        `top` values of the other columns whose values repeat. The items of
+        list columns are profiled, with the `max_items` of a list.
+    """
+    present = values[values.notna()]
+    kind = _column_type(present)
+    profile: dict[str, Any] = {"type": kind, "nullable": len(present) < len(values)}
+    if profile["nullable"]:
+        profile["nulls"] = len(values) - len(present)
+    if kind in ("null", "mixed", "object"):
+        return profile
+
+    items = present
+    if kind == "list":
+        items = present.explode().dropna()
+        profile["max_items"] = int(present.map(len).max())
+    counts = items.value_counts()
+    profile["distinct"] = len(counts)
+
+    if kind in ("integer", "number"):
+        numeric = pd.to_numeric(present)
+        profile["min"] = numeric.min().item()
+        profile["max"] = numeric.max().item()
+        profile["mean"] = round(float(numeric.mean()), 2)
+    elif kind == "datetime":
+        timestamps = pd.to_datetime(present, utc=True, format="ISO8601")
+        profile["min"] = present.loc[timestamps.idxmin()]
+        profile["max"] = present.loc[timestamps.idxmax()]
+    elif len(counts) < len(items):
+        # Unique values, e.g. urls or titles, have no telling top values.
+        profile["top"] = {
+            _label(value): int(count) for value, count in counts.head(top_k).items()
+        }
+    return profile
+
+
+def _strata_column(profiles: dict[str, dict[str, Any]]) -> str | None:
+    """The categorical column with the fewest categories, if any."""
+    candidates = [
+        (profile["distinct"], index, name)
+        for index, (name, profile) in enumerate(profiles.items())
+        if profile["type"] in ("string", "boolean")
+        and 1 < profile["distinct"] <= MAX_STRATA
+    ]
+    return min(candidates)[2] if candidates else None
+
+
+def _spread(positions: list[int], size: int) -> list[int]:
+    """Evenly spaced positions, the first and last included."""
+    if len(positions) <= size:
+        return positions
+    if size == 1:
+        return positions[:1]
+    step = (len(positions) - 1) / (size - 1)
+    return [positions[round(index * step)] for index in range(size)]
+
+
+def stratified_sample(
+    frame: pd.DataFrame, column: str | None, size: int = SAMPLE_SIZE
+) -> list[int]:
+    """
+    Select the positions of the sampled rows of a dataframe.
+
+    Args:
+        frame: The dataset.
+        column: Every category of this column, missing values included, is
+            sampled, as evenly as the size allows. Without it, the rows are
+            sampled evenly over the dataset, e.g. over the buckets of a series.
+        size: Rows of the sample.
+
+    Returns:
+        The positions, in the order of the rows.
+    """
+    if column is None:
+        return _spread(list(range(len(frame))), size)
+    strata = sorted(
+        (
+            list(positions)
+            for positions in frame.groupby(
+                frame[column], dropna=False, sort=False
+            ).indices.values()
+        ),
+        key=len,
+        reverse=True,
+    )
+    quotas = [0] * len(strata)
+    remaining = min(size, len(frame))
+    while remaining:
+        for index, positions in enumerate(strata):
+            if remaining and quotas[index] < len(positions):
+                quotas[index] += 1
+                remaining -= 1
+    return sorted(
+        position
+        for positions, quota in zip(strata, quotas, strict=True)
+        for position in _spread(positions, quota)
+    )
+
+
+def describe(
+    rows: list[dict[str, Any]], sample_size: int = SAMPLE_SIZE
+) -> tuple[list[dict[str, Any]], dict[str, Any]]:
+    """
+    Profile a dataset and sample its rows.
+
+    Args:
+        rows: The full dataset, as written to the chart data.
+        sample_size: Rows of the sample.
+
+    Returns:
+        The sampled rows, compacted, and the description of the dataset: its
+        `total_records`, the profile of its `columns` and how the `sample`
+        was drawn.
+    """
+    # Object columns keep the values as they are in the chart data.
+    frame = pd.DataFrame(rows, dtype=object)
+    profiles = {str(column): profile_column(frame[column]) for column in frame.columns}
+    column = _strata_column(profiles)
+    positions = stratified_sample(frame, column, sample_size)
+    sample = [
+        {key: _compact(value) for key, value in rows[position].items()}
+        for position in positions
+    ]
+    return sample, {
+        "total_records": len(rows),
+        "columns": profiles,
+        "sample": (
+            f"{len(sample)} of {len(rows)} rows, stratified by {column}"
+            if column
+            else f"{len(sample)} of {len(rows)} rows, evenly spaced"
+        ),
+    }
@@ -0,0 +1,400 @@
+"""
+Local store of the repository data fetched from GitHub.
+
+The normalized `Issues`, `Commits` and `PullRequests` rows are persisted in
+SQLite, keyed by owner/repo. A refresh only pulls the items changed since the
+last high-water mark: issues and pull requests are requested newest update
+first, so a sync stops at the first item updated before the mark. Commits
+are walked from the head of the default branch down to the head of the last
+sync.
+
+The rows are shared by every token, but a token is only served them without
+a sync once it read the repository itself: the data of a private repository
+is never served to a token that cannot read it.
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+from collections.abc import AsyncIterator, Callable, Iterable, Iterator
+from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, Literal
+
+from services.agents.columns import (
+    DATASET_MODELS,
+    Columns,
+    columns_from_rows,
+    iter_rows,
+)
+from services.agents.types import Commits, Issues, PullRequests
+from services.github.client import AsyncGitHubClient
+
+Dataset = Literal["issues", "commits", "pull_requests"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS rows (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    key TEXT NOT NULL,
+    sort_key TEXT NOT NULL,
+    data TEXT NOT NULL,
+    PRIMARY KEY (owner, repo, dataset, key)
+);
+CREATE INDEX IF NOT EXISTS rows_sort_key
+    ON rows (owner, repo, dataset, sort_key DESC);
+CREATE TABLE IF NOT EXISTS sync_state (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    dataset TEXT NOT NULL,
+    high_water_mark TEXT,
+    synced_at TEXT NOT NULL,
+    PRIMARY KEY (owner, repo, dataset)
+);
+CREATE TABLE IF NOT EXISTS access (
+    owner TEXT NOT NULL,
+    repo TEXT NOT NULL,
+    credentials TEXT NOT NULL,
+    checked_at TEXT NOT NULL,
+    PRIMARY KEY (owner, repo, credentials)
+);
+"""
+
+
+def credentials_hash(client: AsyncGitHubClient) -> str:
+    """Identify the token of a client without storing it."""
+    token = (client.headers or {}).get("Authorization", "")
+    return hashlib.sha256(token.encode()).hexdigest()
+
+
+class RepoStore:
+    """
+    SQLite store of the issues, commits and pull requests of each repository.
+
+    Args:
+        path: Location of the SQLite database file.
+        sync_interval: Data synced more recently than this is served as is,
+            without asking GitHub for changes.
+    """
+
+    def __init__(self, path: str | Path, sync_interval: timedelta = timedelta(0)):
+        self.path = Path(path)
+        self.sync_interval = sync_interval
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per operation, so the store can be used from any thread.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def high_water_mark(self, owner: str, repo: str, dataset: Dataset) -> str | None:
+        """
+        Get the sort key of the newest item synced for the dataset, or the oid
+        of the head commit for the commits.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT high_water_mark FROM sync_state"
+                " WHERE owner = ? AND repo = ? AND dataset = ?",
+                (owner, repo, dataset),
+            ).fetchone()
+        return row[0] if row else None
+
+    def is_fresh(
+        self, owner: str, repo: str, dataset: Dataset, credentials: str = ""
+    ) -> bool:
+        """
+        Check whether the dataset was synced within the sync interval, and
+        the repository read with the credentials within the interval too.
+        """
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT sync_state.synced_at, access.checked_at FROM sync_state"
+                " LEFT JOIN access ON access.owner = sync_state.owner"
+                " AND access.repo = sync_state.repo AND access.credentials = ?"
+                " WHERE sync_state.owner = ? AND sync_state.repo = ?"
+                " AND sync_state.dataset = ?",
+                (credentials, owner, repo, dataset),
+            ).fetchone()
+        if row is None or row[1] is None:
+            return False
+        now = datetime.now(UTC)
+        return all(
+            now - datetime.fromisoformat(timestamp) < self.sync_interval
+            for timestamp in row
+        )
+
+    def freshness_token(self, owner: str, repo: str) -> str:
+        """
+        Get a token that changes whenever new data is synced for a repository.
+
+        Built from the high-water marks of every dataset, so results computed
+        from the stored data can be cached until the data changes.
+        """
+        with closing(self._connect()) as connection:
+            rows = connection.execute(
+                "SELECT dataset, high_water_mark FROM sync_state"
+                " WHERE owner = ? AND repo = ? ORDER BY dataset",
+                (owner, repo),
+            ).fetchall()
+        return ";".join(f"{dataset}={mark or ''}" for dataset, mark in rows)
+
+    def save_rows(
+        self,
+        owner: str,
+        repo: str,
+        dataset: Dataset,
+        rows: Iterable[tuple[str, str, dict[str, Any]]],
+    ) -> None:
+        """
+        Insert or update rows of a dataset.
+
+        Args:
+            rows: `(key, sort_key, row)` tuples. `key` identifies the item and
+                `sort_key` is the ISO timestamp the dataset is ordered by.
+        """
+        with closing(self._connect()) as connection, connection:
+            connection.executemany(
+                "INSERT OR REPLACE INTO rows"
+                " (owner, repo, dataset, key, sort_key, data)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (
+                    (owner, repo, dataset, key, sort_key, json.dumps(row))
+                    for key, sort_key, row in rows
+                ),
+            )
+
+    def mark_synced(
+        self,
+        owner: str,
+        repo: str,
+        dataset: Dataset,
+        high_water_mark: str | None,
+        credentials: str = "",
+    ) -> None:
+        """
+        Record a completed sync and its new high-water mark, and that the
+        repository could be read with the credentials of the sync.
+        """
+        now = datetime.now(UTC).isoformat()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO sync_state"
+                " (owner, repo, dataset, high_water_mark, synced_at)"
+                " VALUES (?, ?, ?, ?, ?)",
+                (owner, repo, dataset, high_water_mark, now),
+            )
+            connection.execute(
+                "INSERT OR REPLACE INTO access (owner, repo, credentials, checked_at)"
+                " VALUES (?, ?, ?, ?)",
+                (owner, repo, credentials, now),
+            )
+
+    def _iter_rows(
+        self,
+        owner: str,
+        repo: str,
+        dataset: Dataset,
+        states: list[str] | None,
+        limit: int | None,
+    ) -> Iterator[dict[str, Any]]:
+        query = "SELECT data FROM rows WHERE owner = ? AND repo = ? AND dataset = ?"
+        params: list[Any] = [owner, repo, dataset]
+        if states:
+            placeholders = ", ".join("?" for _ in states)
+            query += f" AND json_extract(data, '$.state') IN ({placeholders})"
+            params.extend(states)
+        query += " ORDER BY sort_key DESC LIMIT ?"
+        params.append(-1 if limit is None else limit)
+        with closing(self._connect()) as connection:
+            for (data,) in connection.execute(query, params):
+                yield json.loads(data)
+
+    def load_rows(
+        self,
+        owner: str,
+        repo: str,
+        dataset: Dataset,
+        states: list[str] | None = None,
+        limit: int | None = None,
+    ) -> list[dict[str, Any]]:
+        """
+        Load the rows of a dataset, newest first.
+
+        Args:
+            states: Only return rows in one of these states. All rows if empty.
+            limit: Maximum number of rows to return.
+        """
+        return list(self._iter_rows(owner, repo, dataset, states, limit))
+
+    def load_columns(
+        self,
+        owner: str,
+        repo: str,
+        dataset: Dataset,
+        states: list[str] | None = None,
+        limit: int | None = None,
+        columns: list[str] | None = None,
+    ) -> Columns:
+        """
+        Load the rows of a dataset like `load_rows`, as columns.
+
+        Args:
+            columns: Only load these columns. Every column when `None`.
+        """
+        return columns_from_rows(
+            self._iter_rows(owner, repo, dataset, states, limit),
+            DATASET_MODELS[dataset],
+            columns,
+        )
+
+
+async def _sync(
+    store: RepoStore,
+    owner: str,
+    repo: str,
+    dataset: Dataset,
+    iter_pages: Callable[[int | None], AsyncIterator[Any]],
+    to_rows: Callable[[Any], Iterable[dict[str, Any]]],
+    key: str,
+    sort_key: str,
+    max_items: int | None,
+    mark_on_key: bool = False,
+    credentials: str = "",
+) -> None:
+    """
+    Save every item changed since the last sync, one page at a time.
+
+    The items are walked newest first, down to the high-water mark: the
+    `sort_key` of the newest item synced or, with `mark_on_key`, its `key`.
+    The history of a branch is not in date order, so commits are walked down
+    to the head commit of the last sync rather than to its date.
+
+    The mark only moves once the walk reached it or ran out of pages: only
+    the first sync, without a mark, stops after `max_items` items, as the
+    older ones were never in the store. Later syncs are not limited, so an
+    item changed since the last sync is never skipped.
+
+    Args:
+        iter_pages: Iterates over the pages of items, newest first, stopping
+            after the given number of items, or at the end when `None`.
+        credentials: Identifies the token the pages are fetched with.
+    """
+    mark = await asyncio.to_thread(store.high_water_mark, owner, repo, dataset)
+    new_mark: str | None = None
+    async for page in iter_pages(max_items if mark is None else None):
+        batch: list[tuple[str, str, dict[str, Any]]] = []
+        reached_mark = False
+        for row in to_rows(page):
+            if mark is not None and (
+                row[key] == mark if mark_on_key else row[sort_key] < mark
+            ):
+                reached_mark = True
+                break
+            batch.append((row[key], row[sort_key], row))
+            if mark_on_key:
+                new_mark = new_mark or row[key]
+            elif new_mark is None or row[sort_key] > new_mark:
+                new_mark = row[sort_key]
+        await asyncio.to_thread(store.save_rows, owner, repo, dataset, batch)
+        if reached_mark:
+            break
+    await asyncio.to_thread(
+        store.mark_synced, owner, repo, dataset, new_mark or mark, credentials
+    )
+
+
+async def sync_issues(
+    client: AsyncGitHubClient,
+    store: RepoStore,
+    owner: str,
+    repo: str,
+    page_size: int,
+    max_items: int | None = None,
+) -> None:
+    """Pull the issues updated since the last sync into the store."""
+    credentials = credentials_hash(client)
+    if await asyncio.to_thread(store.is_fresh, owner, repo, "issues", credentials):
+        return
+    await _sync(
+        store,
+        owner,
+        repo,
+        "issues",
+        lambda limit: client.iter_repo_issues(
+            owner=owner, name=repo, page_size=page_size, max_items=limit
+        ),
+        lambda page: iter_rows(
+            (edge.node for edge in page.edges or [] if edge), Issues
+        ),
+        key="url",
+        sort_key="updated_at",
+        max_items=max_items,
+        credentials=credentials,
+    )
+
+
+async def sync_commits(
+    client: AsyncGitHubClient,
+    store: RepoStore,
+    owner: str,
+    repo: str,
+    page_size: int,
+    max_items: int | None = None,
+) -> None:
+    """Pull the commits made since the last sync into the store."""
+    credentials = credentials_hash(client)
+    if await asyncio.to_thread(store.is_fresh, owner, repo, "commits", credentials):
+        return
+    await _sync(
+        store,
+        owner,
+        repo,
+        "commits",
+        lambda limit: client.iter_repo_commits(
+            owner=owner, name=repo, page_size=page_size, max_items=limit
+        ),
+        lambda page: iter_rows(
+            (edge.node for edge in page.edges or [] if edge), Commits
+        ),
+        key="oid",
+        sort_key="committed_date",
+        max_items=max_items,
+        mark_on_key=True,
+        credentials=credentials,
+    )
+
+
+async def sync_pull_requests(
+    client: AsyncGitHubClient,
+    store: RepoStore,
+    owner: str,
+    repo: str,
+    page_size: int,
+    max_items: int | None = None,
+) -> None:
+    """Pull the pull requests updated since the last sync into the store."""
+    credentials = credentials_hash(client)
+    if await asyncio.to_thread(
+        store.is_fresh, owner, repo, "pull_requests", credentials
+    ):
+        return
+    await _sync(
+        store,
+        owner,
+        repo,
+        "pull_requests",
+        lambda limit: client.iter_repo_pull_requests(
+            owner=owner, name=repo, page_size=page_size, max_items=limit
+        ),
+        lambda page: iter_rows(page.nodes or [], PullRequests),
+        key="url",
+        sort_key="updated_at",
+        max_items=max_items,
+        credentials=credentials,
+    )
@@ -0,0 +1,116 @@
+"""
+Server-Sent Events streaming of an agent graph run.
+
+The graph is run with `astream` in the `debug` and `messages` modes: the
+start and end of every node are forwarded as `node` events, the LLM tokens
+of the developer as `token` events as soon as they are produced, and the
+generated chart as a final `result` event.
+"""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Any
+
+from langchain_core.messages import AIMessageChunk
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph.state import CompiledStateGraph
+
+# Nodes whose LLM tokens are streamed to the client.
+STREAMED_NODES = frozenset({"developer"})
+
+
+def format_sse(event: str, data: Any) -> str:
+    """Format an event in the Server-Sent Events wire format."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+def _token_text(chunk: Any) -> str:
+    """Text of an LLM chunk, including the arguments of streamed tool calls."""
+    if not isinstance(chunk, AIMessageChunk):
+        return ""
+    text = chunk.content if isinstance(chunk.content, str) else ""
+    return text + "".join(
+        tool_call.get("args") or "" for tool_call in chunk.tool_call_chunks
+    )
+
+
+async def stream_graph_events(
+    graph: CompiledStateGraph,
+    context: dict[str, Any],
+    config: RunnableConfig | None = None,
+) -> AsyncIterator[tuple[str, dict[str, Any]]]:
+    """
+    Run the agent graph and yield `(event, data)` pairs as it progresses.
+
+    Events:
+        node: `{"node": name, "status": "started" | "finished"}`.
+        token: `{"node": name, "content": text}`, LLM output of the
+            streamed nodes.
+        result: `{"typescript_code": ..., "explanation": ..., "data": ...}`,
+            with the chart data the code loads.
+        error: `{"message": ...}`, the run stops.
+    """
+    developer_output = None
+    chart_data = None
+    async for mode, data in graph.astream(
+        context, config, stream_mode=["debug", "messages"]
+    ):
+        if mode == "messages":
+            chunk, metadata = data
+            node = metadata.get("langgraph_node")
+            if node in STREAMED_NODES and (content := _token_text(chunk)):
+                yield "token", {"node": node, "content": content}
+            continue
+
+        payload = data["payload"]
+        if data["type"] == "task":
+            yield "node", {"node": payload["name"], "status": "started"}
+        elif data["type"] == "task_result":
+            if payload["error"] is not None:
+                yield "error", {"message": str(payload["error"])}
+                return
+            yield "node", {"node": payload["name"], "status": "finished"}
+            for channel, value in payload["result"]:
+                if channel == "developer_output" and value is not None:
+                    developer_output = value
+                elif channel == "chart_data" and value is not None:
+                    chart_data = value
+
+    if developer_output is None:
+        yield "error", {"message": "No chart was generated"}
+        return
+    yield (
+        "result",
+        {
+            "typescript_code": developer_output.typescript_code,
+            "explanation": developer_output.explanation,
+            "data": chart_data,
+        },
+    )
+
+
+async def with_heartbeat(
+    events: AsyncIterator[str], interval: float
+) -> AsyncIterator[str]:
+    """
+    Forward SSE messages, sending a comment whenever none was sent for a while.
+
+    Keeps proxies from closing the connection while a node runs without
+    producing any event.
+    """
+    iterator = aiter(events)
+    next_event = asyncio.ensure_future(anext(iterator))
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_event}, timeout=interval)
+            if not done:
+                yield ": keep-alive\n\n"
+                continue
+            try:
+                yield next_event.result()
+            except StopAsyncIteration:
+                return
+            next_event = asyncio.ensure_future(anext(iterator))
+    finally:
+        next_event.cancel()
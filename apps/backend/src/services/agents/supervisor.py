@@ -15,6 +15,13 @@ SUPERVISOR_SYSTEM_MESSAGE = (
 )
 
 
+def _error_message(output: Any) -> str | None:
+    """Get the error reported by a worker output, a model or a dict."""
+    if isinstance(output, dict):
+        return output.get("error_message")
+    return getattr(output, "error_message", None)
+
+
 class SupervisorAgent:
     """Agent responsible for managing the team and task allocation."""
 
@@ -79,3 +86,44 @@ class SupervisorAgent:
             )
             | JsonOutputFunctionsParser()
         )
+
+    async def execute(self, context: dict[str, Any]) -> dict[str, Any]:
+        """Select the worker to act next."""
+        return await self.agent_executor.ainvoke(context)
+
+    async def route(self, context: dict[str, Any]) -> dict[str, Any]:
+        """
+        Select the worker to act next from the outputs already produced.
+
+        Workers run in the order of `team_members`, each one until its output
+        is set. The LLM is only asked when a worker reported an error, and
+        each worker is retried once: the run finishes with the error when a
+        retried worker fails again.
+        """
+        failed = [
+            member
+            for member in self.team_members
+            if _error_message(context.get(f"{member}_output"))
+        ]
+        if failed:
+            retried = context.get("retried") or []
+            repeated = [member for member in failed if member in retried]
+            if repeated:
+                return {
+                    "next": "FINISH",
+                    "error_message": _error_message(context[f"{repeated[0]}_output"]),
+                }
+            choice = await self.execute(context)
+            if choice.get("next") not in self.team_members:
+                return choice
+            # The selected worker and the ones after it run again, in order.
+            start = self.team_members.index(choice["next"])
+            return {
+                **choice,
+                **{f"{member}_output": None for member in self.team_members[start:]},
+                "retried": [*retried, *failed],
+            }
+        for member in self.team_members:
+            if not context.get(f"{member}_output"):
+                return {"next": member}
+        return {"next": "FINISH"}
@@ -0,0 +1,386 @@
+"""
+Chart templates rendered without the developer LLM.
+
+Writing a chart component from scratch is the slowest stage of a request.
+Yet when the analyst aggregated the data, the shape of `data.json` is known
+exactly from the `Aggregation` of the plan: one row per time bucket or
+group, with a `value` column or, pivoted, one column per series. The common
+charts of such data (lines over time, stacked bars by label, pies by state,
+histograms) are rendered here from parameterized Recharts components, with
+the data route, the keys and the axis labels filled in deterministically.
+
+The developer LLM is only asked when no template fits the chart type or the
+data shape.
+"""
+
+import json
+import re
+from dataclasses import dataclass
+from string import Template
+from typing import Literal
+
+from services.agents.types import (
+    Aggregation,
+    AnalystOutput,
+    DeveloperOutput,
+    PlannerOutput,
+)
+
+TemplateKind = Literal["line", "bar", "stacked_bar", "pie", "histogram"]
+
+# Words of the planned chart type selecting each template, most specific
+# first: the chart names come before the words describing the data, e.g. a
+# "bar chart of the time series" is a bar chart.
+_CHART_TYPES: list[tuple[TemplateKind, tuple[str, ...]]] = [
+    ("histogram", ("histogram",)),
+    ("pie", ("pie", "donut", "doughnut")),
+    ("stacked_bar", ("stacked",)),
+    ("line", ("line",)),
+    ("bar", ("bar", "column")),
+    ("histogram", ("distribution",)),
+    ("line", ("time series", "timeseries")),
+]
+
+_HEADER = Template(
+    """import React, { $hooks } from 'react';
+import axios from 'axios';
+import {
+  $components
+} from 'recharts';
+
+type Row = Record<string, string | number | null>;
+
+const DATA_ROUTE = $data_route;
+const X_KEY = $x_key;
+const X_LABEL = $x_label;
+const Y_LABEL = $y_label;
+const COLORS = [
+  '#8884d8', '#82ca9d', '#ffc658', '#ff7f50',
+  '#8dd1e1', '#a4de6c', '#d0ed57', '#83a6ed',
+];
+
+const Chart: React.FC = () => {
+  const [data, setData] = useState<Row[]>([]);
+  const [error, setError] = useState<string | null>(null);
+
+  useEffect(() => {
+    axios
+      .get<Row[]>(DATA_ROUTE)
+      .then((response) => setData(response.data))
+      .catch((reason) => setError(String(reason)));
+  }, []);
+"""
+)
+
+# Every column but the x axis is a series: `value`, or one per pivoted group.
+_SERIES = """
+  const seriesKeys = useMemo(
+    () =>
+      Array.from(new Set(data.flatMap((row) => Object.keys(row)))).filter(
+        (key) => key !== X_KEY
+      ),
+    [data]
+  );
+"""
+
+_STATUS = """
+  if (error) {
+    return <div role="alert">Could not load the chart data: {error}</div>;
+  }
+  if (data.length === 0) {
+    return <div>No data to display.</div>;
+  }
+"""
+
+_AXES = """        <CartesianGrid strokeDasharray="3 3" />
+        <XAxis
+          dataKey={X_KEY}
+          label={{ value: X_LABEL, position: 'insideBottom', offset: -10 }}
+        />
+        <YAxis label={{ value: Y_LABEL, angle: -90, position: 'insideLeft' }} />
+        <Tooltip />
+"""
+
+_FOOTER = """};
+
+export default Chart;
+"""
+
+_BODIES: dict[TemplateKind, str] = {
+    "line": _SERIES
+    + _STATUS
+    + """
+  return (
+    <ResponsiveContainer width="100%" height={400}>
+      <LineChart data={data} margin={{ top: 20, right: 30, left: 20, bottom: 30 }}>
+"""
+    + _AXES
+    + """        {seriesKeys.length > 1 && <Legend verticalAlign="top" />}
+        {seriesKeys.map((key, index) => (
+          <Line
+            key={key}
+            type="monotone"
+            dataKey={key}
+            name={key === 'value' ? Y_LABEL : key}
+            stroke={COLORS[index % COLORS.length]}
+            dot={false}
+            connectNulls
+          />
+        ))}
+      </LineChart>
+    </ResponsiveContainer>
+  );
+""",
+    "bar": _SERIES
+    + _STATUS
+    + """
+  return (
+    <ResponsiveContainer width="100%" height={400}>
+      <BarChart data={data} margin={{ top: 20, right: 30, left: 20, bottom: 30 }}>
+"""
+    + _AXES
+    + """        {seriesKeys.length > 1 && <Legend verticalAlign="top" />}
+        {seriesKeys.map((key, index) => (
+          <Bar
+            key={key}
+            dataKey={key}
+            name={key === 'value' ? Y_LABEL : key}
+            fill={COLORS[index % COLORS.length]}
+          />
+        ))}
+      </BarChart>
+    </ResponsiveContainer>
+  );
+""",
+    "stacked_bar": _SERIES
+    + _STATUS
+    + """
+  return (
+    <ResponsiveContainer width="100%" height={400}>
+      <BarChart data={data} margin={{ top: 20, right: 30, left: 20, bottom: 30 }}>
+"""
+    + _AXES
+    + """        <Legend verticalAlign="top" />
+        {seriesKeys.map((key, index) => (
+          <Bar
+            key={key}
+            dataKey={key}
+            stackId="stack"
+            fill={COLORS[index % COLORS.length]}
+          />
+        ))}
+      </BarChart>
+    </ResponsiveContainer>
+  );
+""",
+    "histogram": """
+  // Bins in ascending order of their value.
+  const bins = useMemo(
+    () =>
+      [...data].sort((a, b) =>
+        Number.isNaN(Number(a[X_KEY])) || Number.isNaN(Number(b[X_KEY]))
+          ? String(a[X_KEY]).localeCompare(String(b[X_KEY]))
+          : Number(a[X_KEY]) - Number(b[X_KEY])
+      ),
+    [data]
+  );
+"""
+    + _STATUS
+    + """
+  return (
+    <ResponsiveContainer width="100%" height={400}>
+      <BarChart
+        data={bins}
+        barCategoryGap={1}
+        margin={{ top: 20, right: 30, left: 20, bottom: 30 }}
+      >
+"""
+    + _AXES
+    + """        <Bar dataKey="value" name={Y_LABEL} fill={COLORS[0]} />
+      </BarChart>
+    </ResponsiveContainer>
+  );
+""",
+    "pie": _STATUS
+    + """
+  return (
+    <ResponsiveContainer width="100%" height={400}>
+      <PieChart>
+        <Pie
+          data={data}
+          dataKey="value"
+          nameKey={X_KEY}
+          outerRadius={140}
+          label={(entry) => `${entry.name}: ${entry.value}`}
+        >
+          {data.map((row, index) => (
+            <Cell key={String(row[X_KEY])} fill={COLORS[index % COLORS.length]} />
+          ))}
+        </Pie>
+        <Tooltip />
+        <Legend />
+      </PieChart>
+    </ResponsiveContainer>
+  );
+""",
+}
+
+_COMPONENTS: dict[TemplateKind, str] = {
+    "line": "CartesianGrid, Legend, Line, LineChart, ResponsiveContainer, "
+    "Tooltip, XAxis, YAxis",
+    "bar": "Bar, BarChart, CartesianGrid, Legend, ResponsiveContainer, Tooltip, "
+    "XAxis, YAxis",
+    "stacked_bar": "Bar, BarChart, CartesianGrid, Legend, ResponsiveContainer, "
+    "Tooltip, XAxis, YAxis",
+    "histogram": "Bar, BarChart, CartesianGrid, ResponsiveContainer, Tooltip, "
+    "XAxis, YAxis",
+    "pie": "Cell, Legend, Pie, PieChart, ResponsiveContainer, Tooltip",
+}
+
+
+@dataclass(frozen=True)
+class ChartTemplate:
+    """
+    A template and its parameters.
+
+    Attributes:
+        kind: The template.
+        x_key: The column on the x axis, or naming the pie slices.
+        x_label: The label of the x axis.
+        y_label: The label of the values.
+    """
+
+    kind: TemplateKind
+    x_key: str
+    x_label: str
+    y_label: str
+
+
+def _humanize(column: str) -> str:
+    """Label of a column, e.g. `Merged at` for `merged_at`."""
+    return column.replace("_", " ").strip().capitalize()
+
+
+def _value_label(aggregation: Aggregation) -> str:
+    """Label of the aggregated values, e.g. `Average additions`."""
+    column = (aggregation.value_column or "").replace("_", " ")
+    match aggregation.metric:
+        case "count":
+            label = f"Number of {aggregation.dataset.replace('_', ' ')}"
+        case "sum":
+            label = f"Total {column}"
+        case "mean":
+            label = f"Average {column}"
+        case "percentile":
+            label = f"P{aggregation.percentile or 50:g} {column}"
+    if aggregation.cumulative:
+        label = f"Cumulative {label[0].lower()}{label[1:]}"
+    if aggregation.rolling_window:
+        label = f"{label} ({aggregation.rolling_window}-bucket average)"
+    return label
+
+
+def _kind(chart_type: str) -> TemplateKind | None:
+    normalized = chart_type.lower()
+    for kind, keywords in _CHART_TYPES:
+        # Whole words only: a "timeline" is not a line.
+        if any(re.search(rf"\b{keyword}s?\b", normalized) for keyword in keywords):
+            return kind
+    return None
+
+
+def select_template(chart_type: str, aggregation: Aggregation) -> ChartTemplate | None:
+    """
+    Select the template drawing aggregated data as the planned chart type.
+
+    Args:
+        chart_type: The chart type of the plan, e.g. `stacked bar chart`.
+        aggregation: The aggregation the chart data was computed with.
+
+    Returns:
+        The template, or `None` when none fits the chart type and the shape
+        of the data.
+    """
+    kind = _kind(chart_type)
+    if kind is None:
+        return None
+    group_by = aggregation.group_by
+    pivoted = aggregation.pivot and bool(group_by)
+
+    if kind in ("pie", "histogram"):
+        # One slice or bin per group: a single group column and a value.
+        if aggregation.time_column or len(group_by) != 1 or pivoted:
+            return None
+        # A bar per distinct value is not a histogram.
+        if kind == "histogram" and not aggregation.bins:
+            return None
+        x_key = group_by[0]
+    elif aggregation.time_column:
+        # One row per bucket, with a value or a column per pivoted group.
+        if group_by and not (pivoted and len(group_by) == 1):
+            return None
+        x_key = aggregation.time_column
+    elif (len(group_by) == 1 and not pivoted) or (len(group_by) == 2 and pivoted):
+        # One row per group, with a value or a column per group of the second.
+        x_key = group_by[0]
+    else:
+        return None
+
+    if kind == "stacked_bar" and not pivoted:
+        kind = "bar"
+    x_label = _humanize(x_key)
+    if aggregation.time_column and aggregation.time_bucket:
+        x_label = f"{x_label} ({aggregation.time_bucket})"
+    return ChartTemplate(
+        kind=kind,
+        x_key=x_key,
+        x_label=x_label,
+        y_label=_value_label(aggregation),
+    )
+
+
+def render(template: ChartTemplate, data_route: str) -> str:
+    """Render the TSX component of a template, loading the data from a route."""
+    header = _HEADER.substitute(
+        hooks=(
+            "useEffect, useState"
+            if template.kind == "pie"
+            else "useEffect, useMemo, useState"
+        ),
+        components=_COMPONENTS[template.kind],
+        data_route=json.dumps(data_route),
+        x_key=json.dumps(template.x_key),
+        x_label=json.dumps(template.x_label),
+        y_label=json.dumps(template.y_label),
+    )
+    return header + _BODIES[template.kind] + _FOOTER
+
+
+def render_chart(
+    planner_output: PlannerOutput, analyst_output: AnalystOutput
+) -> DeveloperOutput | None:
+    """
+    Render the planned chart from a template, when one fits.
+
+    Only aggregated data, whose shape the plan defines, is drawn from a
+    template.
+
+    Returns:
+        The chart, or `None` when the developer LLM has to write it.
+    """
+    description = analyst_output.data_description
+    if planner_output.error_message or "aggregation" not in description:
+        return None
+    aggregation = Aggregation.model_validate(description["aggregation"])
+    template = select_template(planner_output.technical_specs.chart_type, aggregation)
+    if template is None:
+        return None
+    return DeveloperOutput(
+        typescript_code=render(template, analyst_output.file_route),
+        explanation=(
+            f"{template.kind.replace('_', ' ').capitalize()} chart of "
+            f"{template.y_label.lower()} by {template.x_label.lower()}, drawn "
+            f"from the aggregated data at {analyst_output.file_route}."
+        ),
+        error_message=None,
+    )
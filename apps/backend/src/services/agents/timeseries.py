@@ -0,0 +1,137 @@
+"""
+Time-series helpers over the timestamp columns of the datasets.
+
+Timestamps such as `Issues.created_at`, `PullRequests.merged_at` or
+`Commits.committed_date` are ISO strings in UTC. These helpers bucket them by
+day, week or month in a given time zone, fill the buckets without any row,
+and compute rolling windows and cumulative sums, all with vectorized pandas
+operations.
+"""
+
+from datetime import date
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+import pandas as pd
+
+# pandas period of each time bucket. Weeks start on Monday.
+PERIODS = {"day": "D", "week": "W", "month": "M"}
+
+
+def bucket(timestamps: pd.Series, time_bucket: str, timezone: str = "UTC") -> pd.Series:
+    """
+    Truncate timestamps to the start of their bucket.
+
+    Args:
+        timestamps: ISO timestamps, naive ones are read as UTC.
+        time_bucket: "day", "week" or "month".
+        timezone: IANA time zone the buckets are aligned on, e.g. a day starts
+            at midnight in this time zone.
+
+    Returns:
+        The naive local start of the bucket of every timestamp, `NaT` for
+        missing timestamps.
+
+    Raises:
+        ValueError: When the time zone does not exist.
+    """
+    try:
+        zone = ZoneInfo(timezone)
+    except (ZoneInfoNotFoundError, ValueError) as exc:
+        raise ValueError(f"Unknown time zone {timezone!r}") from exc
+    local = pd.to_datetime(timestamps, utc=True, format="ISO8601").dt.tz_convert(zone)
+    return local.dt.tz_localize(None).dt.to_period(PERIODS[time_bucket]).dt.start_time
+
+
+def bucket_range(
+    start: pd.Timestamp, end: pd.Timestamp, time_bucket: str
+) -> pd.DatetimeIndex:
+    """Every bucket start between two bucket starts, inclusive."""
+    return pd.period_range(start, end, freq=PERIODS[time_bucket]).start_time
+
+
+def bucket_bounds(
+    since: date, until: date, time_bucket: str
+) -> list[tuple[date, date, date]]:
+    """
+    The start, first and last day of every bucket between two days, inclusive.
+
+    The first and last days of the first and last buckets are cut to `since`
+    and `until`, their start is not.
+    """
+    return [
+        (
+            period.start_time.date(),
+            max(period.start_time.date(), since),
+            min(period.end_time.date(), until),
+        )
+        for period in pd.period_range(since, until, freq=PERIODS[time_bucket])
+    ]
+
+
+def fill_gaps(
+    series: pd.Series, time_bucket: str, fill_value: float | None = 0
+) -> pd.Series:
+    """
+    Add the missing buckets to a series indexed by bucket start.
+
+    Args:
+        series: Values indexed by bucket start, or by a MultiIndex whose first
+            level is the bucket start and the others the groups.
+        time_bucket: The size of the buckets of the index.
+        fill_value: The value of the added buckets. `None` leaves them empty,
+            e.g. for averages.
+    """
+    if series.empty:
+        return series
+    times = series.index.get_level_values(0)
+    buckets = bucket_range(times.min(), times.max(), time_bucket)
+    if series.index.nlevels == 1:
+        index = pd.Index(buckets, name=series.index.name)
+    else:
+        # Every group gets every bucket.
+        index = pd.MultiIndex.from_product(
+            [
+                buckets,
+                *(
+                    series.index.unique(level=level)
+                    for level in range(1, series.index.nlevels)
+                ),
+            ],
+            names=series.index.names,
+        )
+    return series.reindex(index, fill_value=fill_value)
+
+
+def accumulate(
+    series: pd.Series,
+    rolling_window: int | None = None,
+    cumulative: bool = False,
+) -> pd.Series:
+    """
+    Smooth or accumulate a series over time, within each group.
+
+    Args:
+        series: Values indexed like in `fill_gaps`.
+        rolling_window: Average each bucket with the previous ones, over this
+            many buckets.
+        cumulative: Replace each bucket by the running total up to it.
+    """
+    series = series.sort_index(level=0, sort_remaining=False)
+    groups = list(range(1, series.index.nlevels))
+    if rolling_window:
+
+        def rolling_mean(values: pd.Series) -> pd.Series:
+            return values.rolling(rolling_window, min_periods=1).mean()
+
+        series = (
+            series.groupby(level=groups, dropna=False).transform(rolling_mean)
+            if groups
+            else rolling_mean(series)
+        )
+    if cumulative:
+        series = (
+            series.groupby(level=groups, dropna=False).cumsum()
+            if groups
+            else series.cumsum()
+        )
+    return series
@@ -1,10 +1,28 @@
+import asyncio
+from datetime import date
 from typing import Any, Type
 
 from langchain.tools import BaseTool
+from langchain_core.runnables import ensure_config
+from langchain_core.tools import ToolException
 from pydantic import BaseModel, PrivateAttr
 
+from services.agents.columns import (
+    Columns,
+    empty_columns,
+    extend_columns,
+    node_fields,
+)
+from services.agents.store import (
+    RepoStore,
+    sync_commits,
+    sync_issues,
+    sync_pull_requests,
+)
+from services.agents.timeseries import bucket_bounds
 from services.agents.types import (
     Commits,
+    GetRepoCountsInput,
     GetRepoIssuesInput,
     GetRepoPullRequestsInput,
     Issues,
@@ -12,11 +30,44 @@ from services.agents.types import (
     RepoInput,
     TechnicalSpecs,
 )
-from services.gql.client import Client
-from services.gql.enums import IssueState, PullRequestState, StatusState
-from services.gql.get_repo_commits import (
-    GetRepoCommitsRepositoryDefaultBranchRefTargetCommit,
+from services.github.client import MAX_PAGE_SIZE, AsyncGitHubClient
+from services.github.counts import (
+    CountDataset,
+    CountState,
+    DateField,
+    search_query,
 )
+from services.gql.enums import IssueState, PullRequestState
+
+# Key of the per-request GitHub client in the `configurable` runnable config.
+GITHUB_CLIENT = "github_client"
+# Key of the columns each tool should fetch in the current run, by tool name,
+# in the `configurable` runnable config. Set by the analyst around its agent run.
+DATASET_COLUMNS = "dataset_columns"
+
+
+def current_github_client() -> AsyncGitHubClient:
+    """
+    Get the GitHub client of the current graph run.
+
+    The tools are built once and shared by every request, so the client
+    authenticated with the caller's token is passed in the runnable config.
+    """
+    client = ensure_config().get("configurable", {}).get(GITHUB_CLIENT)
+    if client is None:
+        raise ValueError(f"The runnable config does not hold a {GITHUB_CLIENT}")
+    return client
+
+
+def requested_columns(tool_name: str) -> list[str] | None:
+    """
+    Get the columns the current graph run needs from a tool.
+
+    Set by the analyst from the planned aggregation, so the tools only fetch
+    the fields the chart uses. `None` when every column is needed.
+    """
+    columns = ensure_config().get("configurable", {}).get(DATASET_COLUMNS) or {}
+    return columns.get(tool_name)
 
 
 def create_developer_output(
@@ -62,202 +113,343 @@ def create_technical_plan(
     }
 
 
-class GetRepoIssuesTools(BaseTool):
+class GitHubTool(BaseTool):
+    """
+    Tool fetching GitHub data with the async client of the current run.
+
+    The tools are implemented by `_arun`, which the agents await. A sync call,
+    e.g. `invoke` from a script, runs it to completion in an event loop of its
+    own: it cannot be made from a running event loop, nor with a client whose
+    HTTP connections belong to another loop.
+    """
+
+    def _run(self, *args: Any, **kwargs: Any) -> Any:
+        return asyncio.run(self._arun(*args, **kwargs))
+
+
+class GetRepoIssuesTools(GitHubTool):
     """Tool that gets the latest issues from a GitHub repository."""
 
     name: str = "get_repo_issues"
-    description: str = "Get the latest 100 issues from a GitHub repository"
+    description: str = "Get the most recently updated issues from a GitHub repository"
     args_schema: Type[BaseModel] = GetRepoIssuesInput
-    _client: Client = PrivateAttr()
+    _page_size: int = PrivateAttr()
+    _max_items: int | None = PrivateAttr()
+    _store: RepoStore | None = PrivateAttr()
+    _validate: bool = PrivateAttr()
 
     def __init__(
         self,
-        client: Client,
         return_direct: bool = True,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        store: RepoStore | None = None,
+        validate: bool = False,
     ):
         super().__init__()
-        self._client = client
+        self._page_size = page_size
+        self._max_items = max_items
+        self._store = store
+        self._validate = validate
         self.return_direct = return_direct
 
-    def _run(
+    async def _arun(
         self,
         owner: str,
         name: str,
         states: list[IssueState],
-    ) -> list[dict[str, Any]]:
-        """Run the tool asynchronously."""
+    ) -> Columns:
+        """
+        Run the tool asynchronously.
+
+        With a store, changes are synced into it and the rows served from it.
+        Otherwise the columns are filled from the GitHub pages as they arrive,
+        only fetching the fields of the requested columns.
+        """
+        client = current_github_client()
+        columns = requested_columns(self.name)
         issue_states = [IssueState(state) for state in states]
-        result = self._client.get_repo_issues(
+        if self._store is not None:
+            await sync_issues(
+                client,
+                self._store,
+                owner,
+                name,
+                page_size=self._page_size,
+                max_items=self._max_items,
+            )
+            return await asyncio.to_thread(
+                self._store.load_columns,
+                owner,
+                name,
+                "issues",
+                states=[state.value for state in issue_states],
+                limit=self._max_items,
+                columns=columns,
+            )
+
+        issues = empty_columns(Issues, columns)
+        async for page in client.iter_repo_issues(
             owner=owner,
             name=name,
             state=issue_states,
-        )
-        assert result.repository is not None
-        assert result.repository.issues is not None
-        assert result.repository.issues.edges is not None
-        edges = result.repository.issues.edges
-        issues: list[dict[str, Any]] = []
-        for edge in edges:
-            if (not edge) or (not edge.node):
-                continue
-            labels = []
-            if edge.node.labels and edge.node.labels.edges:
-                for label in edge.node.labels.edges:
-                    if label and label.node:
-                        labels.append(label.node.name)
-            issues.append(
-                Issues(
-                    url=edge.node.url,
-                    title=edge.node.title,
-                    state=edge.node.state,
-                    state_reason=edge.node.state_reason,
-                    comments_count=edge.node.comments.total_count,
-                    created_at=edge.node.created_at,
-                    updated_at=edge.node.updated_at,
-                    labels=labels,
-                ).model_dump(mode="json")
+            page_size=self._page_size,
+            max_items=self._max_items,
+            fields=None if columns is None else node_fields(columns),
+        ):
+            extend_columns(
+                issues,
+                (edge.node for edge in page.edges or [] if edge),
+                Issues,
+                validate=self._validate and columns is None,
             )
         return issues
 
+
+class GetRepoCountsTool(GitHubTool):
+    """Tool that counts the issues or pull requests of a GitHub repository."""
+
+    name: str = "get_repo_counts"
+    description: str = (
+        "Count the issues or pull requests of a GitHub repository by state, "
+        "optionally per day, week or month, without fetching them. Use it "
+        "when the chart only shows counts"
+    )
+    args_schema: Type[BaseModel] = GetRepoCountsInput
+
+    def __init__(self, return_direct: bool = True):
+        super().__init__()
+        self.return_direct = return_direct
+        # Invalid arguments are reported to the agent instead of failing the run.
+        self.handle_tool_error = True
+
     async def _arun(
         self,
-        *args: Any,
-        **kwargs: Any,
-    ) -> Any:
-        raise NotImplementedError("This tool only supports sync execution")
+        owner: str,
+        name: str,
+        dataset: CountDataset,
+        states: list[CountState],
+        date_field: DateField | None,
+        time_bucket: str | None,
+        since: date | None,
+        until: date | None,
+    ) -> Columns:
+        """
+        Run the tool asynchronously.
+
+        Without a time range, the totals of the repository connections are
+        read. Otherwise one search per state and time bucket is counted, a
+        hundred searches per request.
+
+        Returns:
+            A `count` column, with the `state` and the `period` start of each
+            count when counting by state or time bucket.
 
+        Raises:
+            ToolException: When the arguments do not describe valid counts,
+                e.g. merged issues.
+        """
+        client = current_github_client()
+        if since is None and until is None and time_bucket is None:
+            counts = await client.repo_counts(owner, name)
+            if counts is None:
+                raise ToolException(f"Repository {owner}/{name} not found")
+            totals = counts[dataset]
+            if not states:
+                return {"count": [sum(totals.values())]}
+            unknown = [state for state in states if state not in totals]
+            if unknown:
+                raise ToolException(f"There are no {', '.join(unknown)} {dataset}")
+            return {"state": list(states), "count": [totals[state] for state in states]}
 
-class GetRepoCommitsTool(BaseTool):
+        if time_bucket is None:
+            periods: list[tuple[date | None, date | None, date | None]] = [
+                (since, since, until)
+            ]
+        elif since is None:
+            raise ToolException("Counting per time bucket needs a since date")
+        else:
+            periods = list(bucket_bounds(since, until or date.today(), time_bucket))
+        points = [
+            (period, start, end, state)
+            for period, start, end in periods
+            for state in (states or [None])
+        ]
+        try:
+            queries = {
+                str(index): search_query(
+                    owner, name, dataset, state, date_field, since=start, until=end
+                )
+                for index, (_, start, end, state) in enumerate(points)
+            }
+        except ValueError as exc:
+            raise ToolException(str(exc)) from exc
+        counts = await client.search_counts(queries)
+
+        columns: Columns = {}
+        if time_bucket is not None:
+            columns["period"] = [
+                period.isoformat() if period else None for period, _, _, _ in points
+            ]
+        if states:
+            columns["state"] = [state for _, _, _, state in points]
+        columns["count"] = [counts[key] for key in queries]
+        return columns
+
+
+class GetRepoCommitsTool(GitHubTool):
     """Tool that gets the latest commits from a GitHub repository."""
 
     name: str = "get_repo_commits"
-    description: str = "Get the latest 100 commits from a GitHub repository"
+    description: str = (
+        "Get the latest commits from the default branch of a GitHub repository"
+    )
     args_schema: Type[BaseModel] = RepoInput
-    _client: Client = PrivateAttr()
+    _page_size: int = PrivateAttr()
+    _max_items: int | None = PrivateAttr()
+    _store: RepoStore | None = PrivateAttr()
+    _validate: bool = PrivateAttr()
 
     def __init__(
         self,
-        client: Client,
         return_direct: bool = True,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        store: RepoStore | None = None,
+        validate: bool = False,
     ):
         super().__init__()
-        self._client = client
+        self._page_size = page_size
+        self._max_items = max_items
+        self._store = store
+        self._validate = validate
         self.return_direct = return_direct
 
-    def _run(
+    async def _arun(
         self,
         owner: str,
         name: str,
-    ) -> list[dict[str, Any]]:
-        """Run the tool asynchronously."""
-        result = self._client.get_repo_commits(
+    ) -> Columns:
+        """
+        Run the tool asynchronously.
+
+        With a store, changes are synced into it and the rows served from it.
+        Otherwise the columns are filled from the GitHub pages as they arrive,
+        only fetching the fields of the requested columns.
+        """
+        client = current_github_client()
+        columns = requested_columns(self.name)
+        if self._store is not None:
+            await sync_commits(
+                client,
+                self._store,
+                owner,
+                name,
+                page_size=self._page_size,
+                max_items=self._max_items,
+            )
+            return await asyncio.to_thread(
+                self._store.load_columns,
+                owner,
+                name,
+                "commits",
+                limit=self._max_items,
+                columns=columns,
+            )
+
+        commits = empty_columns(Commits, columns)
+        async for page in client.iter_repo_commits(
             owner=owner,
             name=name,
-        )
-        assert result.repository is not None
-        assert result.repository.default_branch_ref is not None
-        assert result.repository.default_branch_ref.target is not None
-        assert isinstance(
-            result.repository.default_branch_ref.target,
-            GetRepoCommitsRepositoryDefaultBranchRefTargetCommit,
-        )
-        assert result.repository.default_branch_ref.target.history is not None
-        assert result.repository.default_branch_ref.target.history.edges is not None
-        edges = result.repository.default_branch_ref.target.history.edges
-        commits: list[dict[str, Any]] = []
-        for edge in edges:
-            if not edge or not edge.node:
-                continue
-            commits.append(
-                Commits(
-                    message=edge.node.message,
-                    author=edge.node.author.name if edge.node.author else None,
-                    committed_date=edge.node.committed_date,
-                    authored_date=edge.node.authored_date,
-                    changed_files_if_available=edge.node.changed_files_if_available
-                    if edge.node.changed_files_if_available
-                    else 0,
-                    additions=edge.node.additions,
-                    deletions=edge.node.deletions,
-                    status=edge.node.status.state
-                    if edge.node.status and edge.node.status.state
-                    else StatusState.PENDING,
-                ).model_dump(mode="json")
+            page_size=self._page_size,
+            max_items=self._max_items,
+            fields=None if columns is None else node_fields(columns),
+        ):
+            extend_columns(
+                commits,
+                (edge.node for edge in page.edges or [] if edge),
+                Commits,
+                validate=self._validate and columns is None,
             )
         return commits
 
-    async def _arun(
-        self,
-        *args: Any,
-        **kwargs: Any,
-    ) -> Any:
-        raise NotImplementedError("This tool only supports sync execution")
 
-
-class GetRepoPullRequestsTool(BaseTool):
+class GetRepoPullRequestsTool(GitHubTool):
     """Tool that gets the latest pull requests from a GitHub repository."""
 
     name: str = "get_repo_pull_requests"
-    description: str = "Get the latest 100 pull requests from a GitHub repository"
+    description: str = (
+        "Get the most recently updated pull requests from a GitHub repository"
+    )
     args_schema: Type[BaseModel] = GetRepoPullRequestsInput
-    _client: Client = PrivateAttr()
+    _page_size: int = PrivateAttr()
+    _max_items: int | None = PrivateAttr()
+    _store: RepoStore | None = PrivateAttr()
+    _validate: bool = PrivateAttr()
 
     def __init__(
         self,
-        client: Client,
         return_direct: bool = True,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        store: RepoStore | None = None,
+        validate: bool = False,
     ):
         super().__init__()
-        self._client = client
+        self._page_size = page_size
+        self._max_items = max_items
+        self._store = store
+        self._validate = validate
         self.return_direct = return_direct
 
-    def _run(
+    async def _arun(
         self,
         owner: str,
         name: str,
         states: list[PullRequestState],
-    ) -> list[dict[str, Any]]:
-        """Run the tool asynchronously."""
+    ) -> Columns:
+        """
+        Run the tool asynchronously.
+
+        With a store, changes are synced into it and the rows served from it.
+        Otherwise the columns are filled from the GitHub pages as they arrive,
+        only fetching the fields of the requested columns.
+        """
+        client = current_github_client()
+        columns = requested_columns(self.name)
         pr_states = [PullRequestState(state) for state in states]
-        result = self._client.get_repo_pull_requests(
+        if self._store is not None:
+            await sync_pull_requests(
+                client,
+                self._store,
+                owner,
+                name,
+                page_size=self._page_size,
+                max_items=self._max_items,
+            )
+            return await asyncio.to_thread(
+                self._store.load_columns,
+                owner,
+                name,
+                "pull_requests",
+                states=[state.value for state in pr_states],
+                limit=self._max_items,
+                columns=columns,
+            )
+
+        pull_requests = empty_columns(PullRequests, columns)
+        async for page in client.iter_repo_pull_requests(
             owner=owner,
             name=name,
             state=pr_states,
-        )
-        pull_requests: list[dict[str, Any]] = []
-        assert result.repository is not None
-        assert result.repository.pull_requests is not None
-        assert result.repository.pull_requests.nodes is not None
-        nodes = result.repository.pull_requests.nodes
-        for node in nodes:
-            if not node:
-                continue
-            labels = []
-            if node.labels and node.labels.edges:
-                for label in node.labels.edges:
-                    if label and label.node:
-                        labels.append(label.node.name)
-            pull_requests.append(
-                PullRequests(
-                    url=node.url,
-                    merged_at=node.merged_at,
-                    title=node.title,
-                    created_at=node.created_at,
-                    updated_at=node.updated_at,
-                    additions=node.additions,
-                    deletions=node.deletions,
-                    commits=node.commits.total_count,
-                    reviews=node.reviews.total_count if node.reviews else 0,
-                    comments=node.comments.total_count if node.comments else 0,
-                    state=node.state,
-                    labels=labels,
-                ).model_dump(mode="json")
+            page_size=self._page_size,
+            max_items=self._max_items,
+            fields=None if columns is None else node_fields(columns),
+        ):
+            extend_columns(
+                pull_requests,
+                page.nodes or [],
+                PullRequests,
+                validate=self._validate and columns is None,
             )
         return pull_requests
-
-    async def _arun(
-        self,
-        *args: Any,
-        **kwargs: Any,
-    ) -> Any:
-        raise NotImplementedError("This tool only supports sync execution")
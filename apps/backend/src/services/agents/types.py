@@ -1,11 +1,25 @@
-import operator
-from datetime import datetime
-from typing import Annotated, Any, List, Sequence, TypedDict
+from datetime import date, datetime
+from typing import Annotated, Any, List, Literal, Sequence, TypedDict
 
 from langchain_core.messages import BaseMessage
 from pydantic import BaseModel, Field
 
+from services.agents.history import BoundedHistory
 from services.gql.enums import IssueState, PullRequestState, StatusState
+from services.gql.get_repo_commits import (
+    GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryEdgesNode,
+)
+from services.gql.get_repo_issues import GetRepoIssuesRepositoryIssuesEdgesNode
+from services.gql.get_repo_pull_requests import (
+    GetRepoPullRequestsRepositoryPullRequestsNodes,
+)
+
+
+def _label_names(labels: Any) -> list[str]:
+    """Flatten a generated labels connection into a list of label names."""
+    if not labels or not labels.edges:
+        return []
+    return [label.node.name for label in labels.edges if label and label.node]
 
 
 class Issues(BaseModel):
@@ -22,10 +36,25 @@ class Issues(BaseModel):
     updated_at: datetime
     labels: list[str]
 
+    @classmethod
+    def from_node(cls, node: GetRepoIssuesRepositoryIssuesEdgesNode) -> "Issues":
+        """Build the row from a GraphQL issue node."""
+        return cls(
+            url=node.url,
+            title=node.title,
+            state=node.state,
+            state_reason=node.state_reason,
+            comments_count=node.comments.total_count,
+            created_at=node.created_at,
+            updated_at=node.updated_at,
+            labels=_label_names(node.labels),
+        )
+
 
 class Commits(BaseModel):
     """Model to create a dataframe from the commits data."""
 
+    oid: str
     committed_date: datetime
     authored_date: datetime
     author: str | None
@@ -35,6 +64,28 @@ class Commits(BaseModel):
     deletions: int
     status: StatusState
 
+    @classmethod
+    def from_node(
+        cls,
+        node: GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryEdgesNode,
+    ) -> "Commits":
+        """Build the row from a GraphQL commit node."""
+        return cls(
+            oid=node.oid,
+            message=node.message,
+            author=node.author.name if node.author else None,
+            committed_date=node.committed_date,
+            authored_date=node.authored_date,
+            changed_files_if_available=node.changed_files_if_available
+            if node.changed_files_if_available
+            else 0,
+            additions=node.additions,
+            deletions=node.deletions,
+            status=node.status.state
+            if node.status and node.status.state
+            else StatusState.PENDING,
+        )
+
 
 class PullRequests(BaseModel):
     """Model to create a dataframe from the pull requests data."""
@@ -52,6 +103,93 @@ class PullRequests(BaseModel):
     state: PullRequestState
     labels: list[str]
 
+    @classmethod
+    def from_node(
+        cls,
+        node: GetRepoPullRequestsRepositoryPullRequestsNodes,
+    ) -> "PullRequests":
+        """Build the row from a GraphQL pull request node."""
+        return cls(
+            url=node.url,
+            merged_at=node.merged_at,
+            title=node.title,
+            created_at=node.created_at,
+            updated_at=node.updated_at,
+            additions=node.additions,
+            deletions=node.deletions,
+            commits=node.commits.total_count,
+            reviews=node.reviews.total_count if node.reviews else 0,
+            comments=node.comments.total_count if node.comments else 0,
+            state=node.state,
+            labels=_label_names(node.labels),
+        )
+
+
+class Aggregation(BaseModel):
+    """Aggregation of the dataset rows into the series drawn by the chart."""
+
+    dataset: Literal["issues", "commits", "pull_requests"] = Field(
+        description="The dataset to aggregate"
+    )
+    group_by: list[str] = Field(
+        description=(
+            "Columns to group the rows by, e.g. state, labels or author. "
+            "Rows with several labels count once per label."
+        )
+    )
+    bins: int | None = Field(
+        description=(
+            "Cut the first group_by column, a number such as comments or "
+            "additions, into this many equal-width bins, e.g. for a "
+            "histogram. Null to group by its values."
+        ),
+    )
+    time_column: str | None = Field(
+        description=(
+            "Timestamp column to bucket the rows by, e.g. created_at, "
+            "merged_at or committed_date. Null for no time axis."
+        )
+    )
+    time_bucket: Literal["day", "week", "month"] | None = Field(
+        description="Size of the time buckets. Null for no time axis."
+    )
+    timezone: str | None = Field(
+        description=(
+            "IANA time zone the time buckets are aligned on, e.g. "
+            "Europe/Paris. Null for UTC."
+        )
+    )
+    fill_gaps: bool = Field(
+        description="Add the time buckets without any row, with a zero count"
+    )
+    rolling_window: int | None = Field(
+        description=(
+            "Average each time bucket with the previous ones, over this many "
+            "buckets. Null for no smoothing."
+        )
+    )
+    cumulative: bool = Field(
+        description="Show the running total over time instead of each bucket"
+    )
+    metric: Literal["count", "sum", "mean", "percentile"] = Field(
+        description="How the rows of each group are aggregated"
+    )
+    value_column: str | None = Field(
+        description=(
+            "Numeric column aggregated by sum, mean and percentile, e.g. "
+            "additions, comments or merge_time_hours. Null for count."
+        )
+    )
+    percentile: float | None = Field(
+        description="The percentile (0-100) computed by the percentile metric"
+    )
+    pivot: bool = Field(
+        description=(
+            "Turn the values of the last group_by column into one series "
+            "column each, e.g. for stacked bars"
+        )
+    )
+
 
 class TechnicalSpecs(BaseModel):
     chart_type: str = Field(description="The type of chart to be generated")
@@ -60,6 +198,12 @@ class TechnicalSpecs(BaseModel):
     technical_constraints: List[str] = Field(
         description="List of technical constraints"
     )
+    aggregation: Aggregation | None = Field(
+        description=(
+            "How to aggregate the fetched rows into the chart data. "
+            "Null when the chart needs the raw rows."
+        )
+    )
 
 
 class PlannerOutput(BaseModel):
@@ -109,12 +253,16 @@ class AgentContext(TypedDict):
     message: str
     owner: str
     repo: str
-    chat_history: Annotated[Sequence[BaseMessage], operator.add]
+    chat_history: Annotated[Sequence[BaseMessage], BoundedHistory()]
     next: str | None
     planner_output: PlannerOutput | None
     analyst_output: AnalystOutput | None
     developer_output: DeveloperOutput | None
     error_message: str | None
+    # The data of the chart, as written by the analyst.
+    chart_data: Any
+    # The workers the rule-based supervisor already retried after an error.
+    retried: list[str] | None
 
 
 class RepoInput(BaseModel):
@@ -144,3 +292,32 @@ class GetRepoPullRequestsInput(RepoInput):
             "If not provided, returns all PRs."
         ),
     )
+
+
+class GetRepoCountsInput(RepoInput):
+    """Input for get_repo_counts tool."""
+
+    dataset: Literal["issues", "pull_requests"] = Field(
+        description="Count issues or pull requests"
+    )
+    states: list[Literal["open", "closed", "merged"]] = Field(
+        description=(
+            "States counted separately, e.g. open and closed. Closed pull "
+            "requests exclude the merged ones. Empty to count every item."
+        )
+    )
+    date_field: Literal["created", "updated", "closed", "merged"] | None = Field(
+        description=(
+            "The date the time range and buckets apply to, e.g. merged for "
+            "PRs merged per month. Null to count regardless of dates."
+        )
+    )
+    time_bucket: Literal["day", "week", "month"] | None = Field(
+        description="Count per day, week or month. Null for a single count."
+    )
+    since: date | None = Field(
+        description="First day of the time range. Required with a time_bucket."
+    )
+    until: date | None = Field(
+        description="Last day of the time range. Null for today."
+    )
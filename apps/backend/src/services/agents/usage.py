@@ -0,0 +1,135 @@
+"""
+Per-stage accounting of the LLM tokens and latency.
+
+The handler is attached to the LLMs of the graph and attributes every call
+to the graph node it runs in, e.g. `planner` or `supervisor`, so the prompt
+size, completion size and latency of each stage can be followed over time.
+The calls answered from the LLM cache cost no tokens: they are only counted
+as `cached_calls`.
+"""
+
+import threading
+import time
+from collections import defaultdict
+from dataclasses import asdict, dataclass
+from typing import Any
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+from services.agents.llm_cache import CACHED
+
+
+@dataclass
+class StageStats:
+    """Totals of the LLM calls of a stage."""
+
+    calls: int = 0
+    cached_calls: int = 0
+    prompt_tokens: int = 0
+    completion_tokens: int = 0
+    latency_seconds: float = 0.0
+
+
+def _token_usage(response: LLMResult) -> tuple[int, int]:
+    """The prompt and completion tokens of a response."""
+    usage = (response.llm_output or {}).get("token_usage")
+    if usage:
+        return usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+    prompt_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            metadata = getattr(
+                getattr(generation, "message", None), "usage_metadata", None
+            )
+            if metadata:
+                prompt_tokens += metadata.get("input_tokens", 0)
+                completion_tokens += metadata.get("output_tokens", 0)
+    return prompt_tokens, completion_tokens
+
+
+def _is_cached(response: LLMResult) -> bool:
+    """Whether a response was served from the LLM cache."""
+    generations = [generation for batch in response.generations for generation in batch]
+    return bool(generations) and all(
+        (generation.generation_info or {}).get(CACHED) for generation in generations
+    )
+
+
+class StageUsage(BaseCallbackHandler):
+    """Callback handler totalling the LLM usage of each graph node."""
+
+    # Cheap enough to run in the event loop.
+    run_inline = True
+
+    def __init__(self) -> None:
+        self._stages: defaultdict[str, StageStats] = defaultdict(StageStats)
+        self._runs: dict[UUID, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _start(self, run_id: UUID, metadata: dict[str, Any] | None) -> None:
+        stage = (metadata or {}).get("langgraph_node") or "other"
+        with self._lock:
+            self._runs[run_id] = (stage, time.perf_counter())
+
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any],
+        messages: list[list[Any]],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, metadata)
+
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any],
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start(run_id, metadata)
+
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        prompt_tokens, completion_tokens = _token_usage(response)
+        with self._lock:
+            run = self._runs.pop(run_id, None)
+            if run is None:
+                return
+            stage, started_at = run
+            stats = self._stages[stage]
+            if _is_cached(response):
+                stats.cached_calls += 1
+                return
+            stats.calls += 1
+            stats.prompt_tokens += prompt_tokens
+            stats.completion_tokens += completion_tokens
+            stats.latency_seconds += time.perf_counter() - started_at
+
+    def on_llm_error(
+        self, error: BaseException, *, run_id: UUID, **kwargs: Any
+    ) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """The totals and per-call averages of each stage, cached calls aside."""
+        with self._lock:
+            return {
+                stage: {
+                    **asdict(stats),
+                    "mean_prompt_tokens": (
+                        stats.prompt_tokens / stats.calls if stats.calls else None
+                    ),
+                    "mean_latency_seconds": (
+                        stats.latency_seconds / stats.calls if stats.calls else None
+                    ),
+                }
+                for stage, stats in self._stages.items()
+                if stats.calls or stats.cached_calls
+            }
@@ -0,0 +1,189 @@
+"""
+Cache of the results of the analytics endpoint.
+
+A chart generation runs several LLM calls and GitHub fetches, so a repeated
+request (e.g. reloading a dashboard) is answered from this cache instead.
+Entries expire after a TTL and the least recently used entries are evicted
+once the cache is full. Two backends are available: an in-memory one, local
+to the worker process, and an SQLite one, shared by every worker.
+"""
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Protocol
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    accessed_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed_at ON entries (accessed_at);
+"""
+
+
+class CacheBackend(Protocol):
+    """Storage of the cache entries."""
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Get an entry, or `None` when it is missing or expired."""
+        ...
+
+    def set(self, key: str, value: dict[str, Any], ttl: float) -> None:
+        """Store an entry for `ttl` seconds."""
+        ...
+
+    def clear(self) -> None:
+        """Remove every entry."""
+        ...
+
+
+class MemoryCacheBackend:
+    """
+    LRU cache held in the memory of the current process.
+
+    Args:
+        max_entries: Number of entries kept before evicting the oldest used.
+    """
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, dict[str, Any]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at <= time.time():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: dict[str, Any], ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class SQLiteCacheBackend:
+    """
+    LRU cache persisted in SQLite, shared by every worker process.
+
+    Args:
+        path: Location of the SQLite database file.
+        max_entries: Number of entries kept before evicting the oldest used.
+    """
+
+    def __init__(self, path: str | Path, max_entries: int = 256):
+        self.path = Path(path)
+        self.max_entries = max_entries
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per operation, so the cache can be used from any thread.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            row = connection.execute(
+                "SELECT value FROM entries WHERE key = ? AND expires_at > ?",
+                (key, now),
+            ).fetchone()
+            if row is None:
+                return None
+            connection.execute(
+                "UPDATE entries SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+        return json.loads(row[0])
+
+    def set(self, key: str, value: dict[str, Any], ttl: float) -> None:
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT OR REPLACE INTO entries (key, value, expires_at, accessed_at)"
+                " VALUES (?, ?, ?, ?)",
+                (key, json.dumps(value), now + ttl, now),
+            )
+            connection.execute("DELETE FROM entries WHERE expires_at <= ?", (now,))
+            connection.execute(
+                "DELETE FROM entries WHERE key NOT IN"
+                " (SELECT key FROM entries ORDER BY accessed_at DESC LIMIT ?)",
+                (self.max_entries,),
+            )
+
+    def clear(self) -> None:
+        with closing(self._connect()) as connection, connection:
+            connection.execute("DELETE FROM entries")
+
+
+class ResultCache:
+    """
+    Cache of analytics results keyed on the normalized request.
+
+    Args:
+        backend: Where the entries are stored.
+        ttl: Seconds an entry is served before being recomputed.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float):
+        self.backend = backend
+        self.ttl = ttl
+
+    @staticmethod
+    def key(
+        owner: str,
+        repo: str,
+        message: str,
+        freshness: str = "",
+        credentials: str = "",
+    ) -> str:
+        """
+        Build the cache key of a request.
+
+        Args:
+            owner: The owner of the repository.
+            repo: The repository to analyze.
+            message: The user prompt.
+            freshness: Token changing whenever the repository data changes.
+            credentials: The credential the data is fetched with, so results
+                of private repositories are only served to the same token.
+        """
+        normalized = {
+            "owner": owner.strip().lower(),
+            "repo": repo.strip().lower(),
+            "message": " ".join(message.split()).casefold(),
+            "freshness": freshness,
+            "credentials": hashlib.sha256(credentials.encode()).hexdigest(),
+        }
+        return hashlib.sha256(
+            json.dumps(normalized, sort_keys=True).encode()
+        ).hexdigest()
+
+    def get(self, key: str) -> dict[str, Any] | None:
+        """Get a cached result."""
+        return self.backend.get(key)
+
+    def set(self, key: str, value: dict[str, Any]) -> None:
+        """Cache a result for the configured TTL."""
+        self.backend.set(key, value, self.ttl)
@@ -0,0 +1,288 @@
+"""
+Batching of several GitHub GraphQL operations into a single request.
+
+Each operation added to a `BatchQuery` is one of the generated `Client`
+queries (`get_repo_issues`, `get_repo_commits`, ...), or another query with
+its result model, e.g. the search counts of `services.github.counts`. Its
+variables are prefixed and its top-level fields aliased with the position of
+the operation, `op<index>__`, so the issues, pull requests and commits of a
+repository, or the same query over many repositories, can be sent as one
+document. The response is split back into the result models, by key.
+"""
+
+import re
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from functools import cache
+from typing import Any, get_type_hints
+
+import httpx
+from pydantic import BaseModel
+
+from services.github.rate_limit import estimate_requests, requests_to_cost
+from services.gql.client import Client
+from services.gql.exceptions import (
+    GraphQLClientGraphQLError,
+    GraphQLClientGraphQLMultiError,
+)
+
+_HEADER = re.compile(r"^\s*query\s+(\w+)\s*(?:\(([^)]*)\))?\s*\{", re.DOTALL)
+_VARIABLE = re.compile(r"\$(\w+)")
+_NAME = re.compile(r"[_A-Za-z][_0-9A-Za-z]*")
+
+RATE_LIMIT_SELECTION = "rateLimit { cost remaining resetAt }"
+
+
+@dataclass
+class Operation:
+    """A generated query, ready to be merged into a batch."""
+
+    key: str
+    operation_name: str
+    query: str
+    variables: dict[str, Any]
+    result_type: type[BaseModel]
+
+
+@dataclass
+class BatchResult:
+    """Typed results of a batch, by operation key."""
+
+    results: dict[str, BaseModel] = field(default_factory=dict)
+    errors: dict[str, GraphQLClientGraphQLMultiError] = field(default_factory=dict)
+
+
+class _Recorded(Exception):
+    def __init__(self, query: str, operation_name: str, variables: dict[str, Any]):
+        self.query = query
+        self.operation_name = operation_name
+        self.variables = variables
+
+
+class _OperationRecorder(Client):
+    """Client that captures the document a generated method would send."""
+
+    def __init__(self) -> None:
+        # Nothing is ever sent, so no HTTP client is needed.
+        pass
+
+    def execute(
+        self,
+        query: str,
+        operation_name: str | None = None,
+        variables: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> Any:
+        raise _Recorded(query, operation_name or "", variables or {})
+
+
+_recorder = _OperationRecorder()
+
+
+def record_operation(method: str, key: str = "", **arguments: Any) -> Operation:
+    """
+    Capture the document, variables and result model of a generated query.
+
+    Args:
+        method: Name of the `Client` method, e.g. `get_repo_issues`.
+        key: Identifier of the operation, when it is part of a batch.
+        arguments: Arguments of the client method.
+    """
+    if method.startswith("_") or method not in vars(Client):
+        raise ValueError(f"{method} is not a generated query")
+    try:
+        getattr(_recorder, method)(**arguments)
+    except _Recorded as recorded:
+        return Operation(
+            key=key,
+            operation_name=recorded.operation_name,
+            query=recorded.query,
+            variables=recorded.variables,
+            result_type=_result_type(method),
+        )
+    raise ValueError(f"{method} is not a generated query")
+
+
+@cache
+def _result_type(method: str) -> type[BaseModel]:
+    return get_type_hints(getattr(Client, method))["return"]
+
+
+def _alias_top_level_fields(body: str, prefix: str) -> str:
+    """Alias every top-level field of a selection set as `<prefix><field>`."""
+    result: list[str] = []
+    braces = parens = 0
+    index = 0
+    while index < len(body):
+        char = body[index]
+        if char == "{":
+            braces += 1
+        elif char == "}":
+            braces -= 1
+        elif char == "(":
+            parens += 1
+        elif char == ")":
+            parens -= 1
+        elif braces == 0 and parens == 0 and (match := _NAME.match(body, index)):
+            name = match.group()
+            result.append(f"{prefix}{name}: {name}")
+            index = match.end()
+            continue
+        result.append(char)
+        index += 1
+    return "".join(result)
+
+
+class BatchQuery:
+    """
+    Several generated queries merged into one GraphQL document.
+
+    Example:
+        batch = BatchQuery()
+        for repo in ["langchain", "langgraph"]:
+            batch.add("get_repo_issues", key=repo, owner="langchain-ai", name=repo)
+        result = client.execute_batch(batch)
+        issues = result.results["langchain"]  # GetRepoIssues
+    """
+
+    def __init__(self, include_rate_limit: bool = True):
+        self.include_rate_limit = include_rate_limit
+        self.operations: list[Operation] = []
+
+    def add(self, method: str, key: str | None = None, **arguments: Any) -> str:
+        """
+        Add a generated client query to the batch.
+
+        Args:
+            method: Name of the `Client` method, e.g. `get_repo_issues`.
+            key: Identifier of the operation in the results. Generated if omitted.
+            arguments: Arguments of the client method.
+
+        Returns:
+            The key of the operation.
+        """
+        key = key if key is not None else f"op{len(self.operations)}"
+        return self.add_operation(record_operation(method, key, **arguments))
+
+    def add_operation(self, operation: Operation) -> str:
+        """
+        Add a query to the batch, under the key of the operation.
+
+        Returns:
+            The key of the operation.
+        """
+        if any(added.key == operation.key for added in self.operations):
+            raise ValueError(f"Duplicate batch key: {operation.key!r}")
+        self.operations.append(operation)
+        return operation.key
+
+    @staticmethod
+    def _prefix(index: int) -> str:
+        """Prefix of the variables and fields of the operation at `index`."""
+        return f"op{index}__"
+
+    def document(self) -> tuple[str, dict[str, Any]]:
+        """Build the merged document and its variables."""
+        definitions: list[str] = []
+        selections: list[str] = []
+        variables: dict[str, Any] = {}
+        for index, operation in enumerate(self.operations):
+            header = _HEADER.match(operation.query)
+            if header is None:
+                raise ValueError(f"Cannot batch {operation.operation_name}")
+            body = operation.query[header.end() : operation.query.rindex("}")]
+            prefix = self._prefix(index)
+            variable = rf"${prefix}\1"
+            if header.group(2):
+                definitions.append(_VARIABLE.sub(variable, header.group(2)))
+            selections.append(
+                _alias_top_level_fields(_VARIABLE.sub(variable, body), prefix)
+            )
+            for name, value in operation.variables.items():
+                variables[f"{prefix}{name}"] = value
+        if self.include_rate_limit:
+            selections.append(RATE_LIMIT_SELECTION)
+
+        signature = f"({', '.join(definitions)})" if definitions else ""
+        query = f"query Batch{signature} {{\n{''.join(selections)}\n}}"
+        return query, variables
+
+    def parse_response(
+        self,
+        response: httpx.Response,
+        get_data: Callable[[httpx.Response], dict[str, Any]],
+    ) -> BatchResult:
+        """
+        Validate a batch response with the client `get_data` and parse it.
+
+        Args:
+            response: The HTTP response of the batch request.
+            get_data: The `get_data` method of the client that sent the batch.
+        """
+        try:
+            data = get_data(response)
+            errors: list[dict[str, Any]] = []
+        except GraphQLClientGraphQLMultiError as exc:
+            if exc.data is None:
+                raise
+            data = exc.data
+            errors = [error.orginal or {} for error in exc.errors]
+        return self.parse(data, errors)
+
+    def cost(self) -> int:
+        """Estimate the point cost of the whole batch."""
+        return requests_to_cost(
+            sum(
+                estimate_requests(operation.operation_name, operation.variables)
+                for operation in self.operations
+            )
+        )
+
+    def parse(
+        self,
+        data: dict[str, Any],
+        errors: list[dict[str, Any]] | None = None,
+    ) -> BatchResult:
+        """
+        Split a batch response back into the generated result models.
+
+        Operations with GraphQL errors are reported in `BatchResult.errors`
+        instead of failing the whole batch. Errors that cannot be attributed to
+        an operation are raised.
+        """
+        errors = errors or []
+        prefixes = [self._prefix(index) for index in range(len(self.operations))]
+
+        def attributed(error: dict[str, Any], prefix: str) -> bool:
+            return str((error.get("path") or [""])[0]).startswith(prefix)
+
+        unattributed = [
+            error
+            for error in errors
+            if not any(attributed(error, prefix) for prefix in prefixes)
+        ]
+        if unattributed:
+            raise GraphQLClientGraphQLMultiError.from_errors_dicts(
+                errors_dicts=unattributed, data=data
+            )
+
+        batch_result = BatchResult()
+        for operation, prefix in zip(self.operations, prefixes, strict=True):
+            operation_errors = [error for error in errors if attributed(error, prefix)]
+            if operation_errors:
+                batch_result.errors[operation.key] = GraphQLClientGraphQLMultiError(
+                    errors=[
+                        GraphQLClientGraphQLError.from_dict(error)
+                        for error in operation_errors
+                    ],
+                    data=data,
+                )
+                continue
+            batch_result.results[operation.key] = operation.result_type.model_validate(
+                {
+                    name.removeprefix(prefix): value
+                    for name, value in data.items()
+                    if name.startswith(prefix)
+                }
+            )
+        return batch_result
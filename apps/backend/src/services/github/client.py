@@ -0,0 +1,561 @@
+"""
+GitHub GraphQL client built on top of the generated ariadne client.
+
+The generated `Client` only fetches a single page per call. This module adds
+cursor-paginated helpers that follow `pageInfo.endCursor` / `hasNextPage` and
+yield one connection page at a time, so callers can process very large
+repositories without holding every page in memory. `AsyncGitHubClient`
+exposes the same helpers as async generators.
+"""
+
+from collections.abc import (
+    AsyncIterator,
+    Awaitable,
+    Callable,
+    Collection,
+    Iterator,
+    Mapping,
+)
+from functools import partial
+from typing import Any, Protocol, TypeVar
+
+import httpx
+
+from services.github.async_base_client import AsyncBaseClient
+from services.github.batch import BatchQuery, BatchResult, record_operation
+from services.github.counts import (
+    REPO_COUNTS_QUERY,
+    parse_repo_counts,
+    parse_search_counts,
+    search_counts_batch,
+    split_searches,
+)
+from services.github.decoding import DecodeMode, decode
+from services.github.projection import project_operation
+from services.github.rate_limit import RateLimiter, estimate_cost
+from services.gql.base_model import UNSET, UnsetType
+from services.gql.client import Client
+from services.gql.enums import IssueState, PullRequestState
+from services.gql.get_repo_commits import (
+    GetRepoCommits,
+    GetRepoCommitsRepositoryDefaultBranchRefTargetCommit,
+    GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistory,
+)
+from services.gql.get_repo_issues import GetRepoIssues, GetRepoIssuesRepositoryIssues
+from services.gql.get_repo_pull_requests import (
+    GetRepoPullRequests,
+    GetRepoPullRequestsRepositoryPullRequests,
+)
+
+# GitHub rejects connection page sizes above 100.
+MAX_PAGE_SIZE = 100
+
+P = TypeVar("P")
+
+
+class PageInfo(Protocol):
+    """Pagination info shared by every generated connection model."""
+
+    has_next_page: bool
+    end_cursor: str | None
+
+
+Page = tuple[P, PageInfo, int]
+
+
+def _validate_limits(page_size: int, max_items: int | None) -> None:
+    if not 1 <= page_size <= MAX_PAGE_SIZE:
+        raise ValueError(f"page_size must be between 1 and {MAX_PAGE_SIZE}")
+    if max_items is not None and max_items < 0:
+        raise ValueError("max_items must not be negative")
+
+
+def _next_page_size(page_size: int, max_items: int | None, fetched: int) -> int:
+    return page_size if max_items is None else min(page_size, max_items - fetched)
+
+
+def paginate(
+    fetch_page: Callable[[int, str | None], Page[P] | None],
+    page_size: int = MAX_PAGE_SIZE,
+    max_items: int | None = None,
+) -> Iterator[P]:
+    """
+    Follow a GraphQL connection cursor and yield one page at a time.
+
+    Args:
+        fetch_page: Callable receiving `(first, after)` and returning the page,
+            its page info and the number of items it holds, or `None` when the
+            connection does not exist.
+        page_size: Number of items requested per page (1-100).
+        max_items: Stop once this many items have been fetched.
+            `None` fetches the whole connection.
+    """
+    _validate_limits(page_size, max_items)
+    fetched = 0
+    cursor: str | None = None
+    while max_items is None or fetched < max_items:
+        first = _next_page_size(page_size, max_items, fetched)
+        result = fetch_page(first, cursor)
+        if result is None:
+            return
+        page, page_info, count = result
+        yield page
+        fetched += count
+        if not page_info.has_next_page or not page_info.end_cursor:
+            return
+        cursor = page_info.end_cursor
+
+
+async def apaginate(
+    fetch_page: Callable[[int, str | None], Awaitable[Page[P] | None]],
+    page_size: int = MAX_PAGE_SIZE,
+    max_items: int | None = None,
+) -> AsyncIterator[P]:
+    """Async version of `paginate`."""
+    _validate_limits(page_size, max_items)
+    fetched = 0
+    cursor: str | None = None
+    while max_items is None or fetched < max_items:
+        first = _next_page_size(page_size, max_items, fetched)
+        result = await fetch_page(first, cursor)
+        if result is None:
+            return
+        page, page_info, count = result
+        yield page
+        fetched += count
+        if not page_info.has_next_page or not page_info.end_cursor:
+            return
+        cursor = page_info.end_cursor
+
+
+def _issues_page(result: GetRepoIssues) -> Page[GetRepoIssuesRepositoryIssues] | None:
+    if result.repository is None:
+        return None
+    issues = result.repository.issues
+    return issues, issues.page_info, len(issues.edges or [])
+
+
+def _commits_page(
+    result: GetRepoCommits,
+) -> Page[GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistory] | None:
+    if (
+        result.repository is None
+        or result.repository.default_branch_ref is None
+        or not isinstance(
+            result.repository.default_branch_ref.target,
+            GetRepoCommitsRepositoryDefaultBranchRefTargetCommit,
+        )
+    ):
+        return None
+    history = result.repository.default_branch_ref.target.history
+    return history, history.page_info, len(history.edges or [])
+
+
+def _pull_requests_page(
+    result: GetRepoPullRequests,
+) -> Page[GetRepoPullRequestsRepositoryPullRequests] | None:
+    if result.repository is None:
+        return None
+    prs = result.repository.pull_requests
+    return prs, prs.page_info, len(prs.nodes or [])
+
+
+def _with_headers(headers: dict[str, str] | None, kwargs: dict[str, Any]) -> None:
+    """Merge the client headers into the per-request `headers` keyword argument."""
+    kwargs["headers"] = {**(headers or {}), **kwargs.get("headers", {})}
+
+
+class GitHubClient(Client):
+    """
+    GitHub GraphQL client with cursor-paginated fetches.
+
+    The client headers are sent with every request rather than configured on
+    the HTTP client, so a shared connection pool can serve several tokens.
+    A shared `http_client` is left open when the client exits.
+
+    The pages are decoded according to `decode_mode`, see
+    `services.github.decoding`.
+    """
+
+    def __init__(
+        self,
+        url: str = "",
+        headers: dict[str, str] | None = None,
+        http_client: httpx.Client | None = None,
+        decode_mode: DecodeMode = "validate",
+    ) -> None:
+        super().__init__(url=url, headers=headers, http_client=http_client)
+        self._owns_http_client = http_client is None
+        self.decode_mode = decode_mode
+
+    def __exit__(
+        self,
+        exc_type: object,
+        exc_val: object,
+        exc_tb: object,
+    ) -> None:
+        if self._owns_http_client:
+            self.http_client.close()
+
+    def execute(
+        self,
+        query: str,
+        operation_name: str | None = None,
+        variables: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        _with_headers(self.headers, kwargs)
+        return super().execute(query, operation_name, variables, **kwargs)
+
+    def execute_batch(self, batch: BatchQuery, **kwargs: Any) -> BatchResult:
+        """Send several generated queries as a single aliased request."""
+        query, variables = batch.document()
+        response = self.execute(
+            query=query, operation_name="Batch", variables=variables, **kwargs
+        )
+        return batch.parse_response(response, self.get_data)
+
+    def fetch(
+        self, method: str, fields: Collection[str] | None = None, **arguments: Any
+    ) -> Any:
+        """
+        Run a generated query, decoding its result with the `decode_mode`.
+
+        Args:
+            method: Name of the generated method, e.g. `get_repo_issues`.
+            fields: Only select these fields of the items, see
+                `services.github.projection`. Every field when `None`.
+            arguments: Arguments of the generated method.
+        """
+        if fields is None and self.decode_mode == "validate":
+            return getattr(self, method)(**arguments)
+        if fields is None:
+            operation = record_operation(method, **arguments)
+        else:
+            operation, _ = project_operation(method, fields, **arguments)
+        response = self.execute(
+            query=operation.query,
+            operation_name=operation.operation_name,
+            variables=operation.variables,
+        )
+        return decode(response, operation.result_type, self.decode_mode, self.get_data)
+
+    def repo_counts(self, owner: str, name: str) -> dict[str, dict[str, int]] | None:
+        """
+        Count the issues and pull requests of a repository by state.
+
+        Returns:
+            The counts by dataset then state, e.g. `counts["issues"]["open"]`,
+            or `None` when the repository does not exist.
+        """
+        response = self.execute(
+            query=REPO_COUNTS_QUERY,
+            operation_name="GetRepoCounts",
+            variables={"owner": owner, "name": name},
+        )
+        return parse_repo_counts(self.get_data(response))
+
+    def search_counts(self, queries: Mapping[str, str]) -> dict[str, int]:
+        """
+        Count the results of several issue and pull request searches at once.
+
+        The searches are sent `MAX_SEARCH_COUNTS` at a time, one request after
+        the other.
+
+        Args:
+            queries: Search queries by key, e.g. built with
+                `services.github.counts.search_query`.
+
+        Returns:
+            The number of results of each search, by key.
+        """
+        counts: dict[str, int] = {}
+        for searches in split_searches(queries):
+            batch = search_counts_batch(searches)
+            counts.update(parse_search_counts(self.execute_batch(batch)))
+        return counts
+
+    def iter_repo_issues(
+        self,
+        owner: str,
+        name: str,
+        state: list[IssueState] | UnsetType = UNSET,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        fields: Collection[str] | None = None,
+    ) -> Iterator[GetRepoIssuesRepositoryIssues]:
+        """
+        Iterate over the issues of a repository, newest update first.
+
+        Args:
+            owner: The owner of the repository.
+            name: The name of the repository.
+            state: Filter issues by state. All issues when not provided.
+            page_size: Number of issues requested per page.
+            max_items: Maximum number of issues to fetch.
+            fields: Only fetch these fields of the issues, e.g. `created_at`.
+        """
+
+        def fetch_page(first: int, after: str | None):
+            return _issues_page(
+                self.fetch(
+                    "get_repo_issues",
+                    fields=fields,
+                    owner=owner,
+                    name=name,
+                    state=state,
+                    first=first,
+                    after=after,
+                )
+            )
+
+        return paginate(fetch_page, page_size=page_size, max_items=max_items)
+
+    def iter_repo_commits(
+        self,
+        owner: str,
+        name: str,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        fields: Collection[str] | None = None,
+    ) -> Iterator[GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistory]:
+        """
+        Iterate over the commit history of the default branch, newest first.
+
+        Args:
+            owner: The owner of the repository.
+            name: The name of the repository.
+            page_size: Number of commits requested per page.
+            max_items: Maximum number of commits to fetch.
+            fields: Only fetch these fields of the commits.
+        """
+
+        def fetch_page(first: int, after: str | None):
+            return _commits_page(
+                self.fetch(
+                    "get_repo_commits",
+                    fields=fields,
+                    owner=owner,
+                    name=name,
+                    first=first,
+                    after=after,
+                )
+            )
+
+        return paginate(fetch_page, page_size=page_size, max_items=max_items)
+
+    def iter_repo_pull_requests(
+        self,
+        owner: str,
+        name: str,
+        state: list[PullRequestState] | UnsetType = UNSET,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        fields: Collection[str] | None = None,
+    ) -> Iterator[GetRepoPullRequestsRepositoryPullRequests]:
+        """
+        Iterate over the pull requests of a repository, newest update first.
+
+        Args:
+            owner: The owner of the repository.
+            name: The name of the repository.
+            state: Filter pull requests by state. All PRs when not provided.
+            page_size: Number of pull requests requested per page.
+            max_items: Maximum number of pull requests to fetch.
+            fields: Only fetch these fields of the pull requests.
+        """
+
+        def fetch_page(first: int, after: str | None):
+            return _pull_requests_page(
+                self.fetch(
+                    "get_repo_pull_requests",
+                    fields=fields,
+                    owner=owner,
+                    name=name,
+                    state=state,
+                    first=first,
+                    after=after,
+                )
+            )
+
+        return paginate(fetch_page, page_size=page_size, max_items=max_items)
+
+
+class AsyncGitHubClient(AsyncBaseClient):
+    """
+    Async GitHub GraphQL client with cursor-paginated fetches.
+
+    When a `rate_limiter` is given, every request goes through it so that the
+    token stays within its GitHub point budget. The pages are decoded like in
+    `GitHubClient`.
+    """
+
+    def __init__(
+        self,
+        url: str = "",
+        headers: dict[str, str] | None = None,
+        http_client: httpx.AsyncClient | None = None,
+        rate_limiter: RateLimiter | None = None,
+        decode_mode: DecodeMode = "validate",
+    ) -> None:
+        super().__init__(url=url, headers=headers, http_client=http_client)
+        self._owns_http_client = http_client is None
+        self.rate_limiter = rate_limiter
+        self.decode_mode = decode_mode
+
+    async def __aexit__(
+        self,
+        exc_type: object,
+        exc_val: object,
+        exc_tb: object,
+    ) -> None:
+        if self._owns_http_client:
+            await self.http_client.aclose()
+
+    async def execute(
+        self,
+        query: str,
+        operation_name: str | None = None,
+        variables: dict[str, Any] | None = None,
+        cost: int | None = None,
+        **kwargs: Any,
+    ) -> httpx.Response:
+        _with_headers(self.headers, kwargs)
+        send = partial(super().execute, query, operation_name, variables, **kwargs)
+        if self.rate_limiter is None:
+            return await send()
+        return await self.rate_limiter.send(
+            token=kwargs["headers"].get("Authorization", ""),
+            cost=cost if cost is not None else estimate_cost(operation_name, variables),
+            send=send,
+        )
+
+    async def execute_batch(self, batch: BatchQuery, **kwargs: Any) -> BatchResult:
+        """Send several generated queries as a single aliased request."""
+        query, variables = batch.document()
+        response = await self.execute(
+            query=query,
+            operation_name="Batch",
+            variables=variables,
+            cost=batch.cost(),
+            **kwargs,
+        )
+        return batch.parse_response(response, self.get_data)
+
+    async def fetch(
+        self, method: str, fields: Collection[str] | None = None, **arguments: Any
+    ) -> Any:
+        """
+        Async version of `GitHubClient.fetch`.
+
+        The query is recorded from the generated sync `Client`, whose methods
+        have no async counterpart, and sent through the async transport.
+        """
+        cost = None
+        if fields is None:
+            operation = record_operation(method, **arguments)
+        else:
+            operation, cost = project_operation(method, fields, **arguments)
+        response = await self.execute(
+            query=operation.query,
+            operation_name=operation.operation_name,
+            variables=operation.variables,
+            cost=cost,
+        )
+        return decode(response, operation.result_type, self.decode_mode, self.get_data)
+
+    async def repo_counts(
+        self, owner: str, name: str
+    ) -> dict[str, dict[str, int]] | None:
+        """Async version of `GitHubClient.repo_counts`."""
+        response = await self.execute(
+            query=REPO_COUNTS_QUERY,
+            operation_name="GetRepoCounts",
+            variables={"owner": owner, "name": name},
+            cost=1,
+        )
+        return parse_repo_counts(self.get_data(response))
+
+    async def search_counts(self, queries: Mapping[str, str]) -> dict[str, int]:
+        """Async version of `GitHubClient.search_counts`."""
+        counts: dict[str, int] = {}
+        for searches in split_searches(queries):
+            batch = search_counts_batch(searches)
+            counts.update(parse_search_counts(await self.execute_batch(batch)))
+        return counts
+
+    def iter_repo_issues(
+        self,
+        owner: str,
+        name: str,
+        state: list[IssueState] | UnsetType = UNSET,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        fields: Collection[str] | None = None,
+    ) -> AsyncIterator[GetRepoIssuesRepositoryIssues]:
+        """Async version of `GitHubClient.iter_repo_issues`."""
+
+        async def fetch_page(first: int, after: str | None):
+            return _issues_page(
+                await self.fetch(
+                    "get_repo_issues",
+                    fields=fields,
+                    owner=owner,
+                    name=name,
+                    state=state,
+                    first=first,
+                    after=after,
+                )
+            )
+
+        return apaginate(fetch_page, page_size=page_size, max_items=max_items)
+
+    def iter_repo_commits(
+        self,
+        owner: str,
+        name: str,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        fields: Collection[str] | None = None,
+    ) -> AsyncIterator[GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistory]:
+        """Async version of `GitHubClient.iter_repo_commits`."""
+
+        async def fetch_page(first: int, after: str | None):
+            return _commits_page(
+                await self.fetch(
+                    "get_repo_commits",
+                    fields=fields,
+                    owner=owner,
+                    name=name,
+                    first=first,
+                    after=after,
+                )
+            )
+
+        return apaginate(fetch_page, page_size=page_size, max_items=max_items)
+
+    def iter_repo_pull_requests(
+        self,
+        owner: str,
+        name: str,
+        state: list[PullRequestState] | UnsetType = UNSET,
+        page_size: int = MAX_PAGE_SIZE,
+        max_items: int | None = None,
+        fields: Collection[str] | None = None,
+    ) -> AsyncIterator[GetRepoPullRequestsRepositoryPullRequests]:
+        """Async version of `GitHubClient.iter_repo_pull_requests`."""
+
+        async def fetch_page(first: int, after: str | None):
+            return _pull_requests_page(
+                await self.fetch(
+                    "get_repo_pull_requests",
+                    fields=fields,
+                    owner=owner,
+                    name=name,
+                    state=state,
+                    first=first,
+                    after=after,
+                )
+            )
+
+        return apaginate(fetch_page, page_size=page_size, max_items=max_items)
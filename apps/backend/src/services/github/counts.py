@@ -0,0 +1,188 @@
+"""
+Count-only GitHub queries for summary charts.
+
+Charts such as "open vs closed issues" or "PRs merged per month" only need
+numbers. Instead of downloading the items to count them, these queries read
+the `totalCount` of the repository connections, or the `issueCount` of
+searches restricted with qualifiers such as date ranges. Up to a hundred
+searches are batched into a single request, so a whole series costs a few
+round trips at most.
+"""
+
+from collections.abc import Mapping
+from datetime import date
+from typing import Any, Literal, cast
+
+from pydantic import BaseModel, Field
+
+from services.github.batch import BatchQuery, BatchResult, Operation
+
+CountDataset = Literal["issues", "pull_requests"]
+CountState = Literal["open", "closed", "merged"]
+DateField = Literal["created", "updated", "closed", "merged"]
+
+# Searches batched into a single request. Longer series are split into several
+# requests.
+MAX_SEARCH_COUNTS = 100
+
+SEARCH_COUNT_QUERY = """
+query SearchCount($query: String!) {
+  search(query: $query, type: ISSUE) {
+    issueCount
+  }
+}
+"""
+
+# Search qualifiers of each state. Closed pull requests exclude the merged
+# ones, like the CLOSED state of the `pullRequests` connection.
+_STATE_QUALIFIERS: dict[CountDataset, dict[CountState, str]] = {
+    "issues": {"open": "is:open", "closed": "is:closed"},
+    "pull_requests": {
+        "open": "is:open",
+        "closed": "is:closed is:unmerged",
+        "merged": "is:merged",
+    },
+}
+
+REPO_COUNTS_QUERY = """
+query GetRepoCounts($owner: String!, $name: String!) {
+  repository(owner: $owner, name: $name) {
+    issues_open: issues(states: [OPEN]) {
+      totalCount
+    }
+    issues_closed: issues(states: [CLOSED]) {
+      totalCount
+    }
+    pull_requests_open: pullRequests(states: [OPEN]) {
+      totalCount
+    }
+    pull_requests_closed: pullRequests(states: [CLOSED]) {
+      totalCount
+    }
+    pull_requests_merged: pullRequests(states: [MERGED]) {
+      totalCount
+    }
+  }
+}
+"""
+
+
+def parse_repo_counts(data: dict[str, Any]) -> dict[str, dict[str, int]] | None:
+    """
+    Read the item counts by state of a `GetRepoCounts` response.
+
+    Returns:
+        The counts by dataset then state, e.g. `counts["issues"]["open"]`,
+        or `None` when the repository does not exist.
+    """
+    repository = data.get("repository")
+    if repository is None:
+        return None
+    counts: dict[str, dict[str, int]] = {}
+    for dataset, states in _STATE_QUALIFIERS.items():
+        counts[dataset] = {
+            state: repository[f"{dataset}_{state}"]["totalCount"] for state in states
+        }
+    return counts
+
+
+def search_query(
+    owner: str,
+    repo: str,
+    dataset: CountDataset,
+    state: CountState | None = None,
+    date_field: DateField | None = None,
+    since: date | None = None,
+    until: date | None = None,
+) -> str:
+    """
+    Build the search query matching the items of a repository.
+
+    Args:
+        dataset: Search issues or pull requests.
+        state: Only match items in this state.
+        date_field: The date `since` and `until` apply to.
+        since: Only match items whose date is on or after this day.
+        until: Only match items whose date is on or before this day.
+
+    Raises:
+        ValueError: For a state or date the dataset does not have, e.g.
+            merged issues.
+    """
+    qualifiers = [
+        f"repo:{owner}/{repo}",
+        "is:issue" if dataset == "issues" else "is:pr",
+    ]
+    if state is not None:
+        if state not in _STATE_QUALIFIERS[dataset]:
+            raise ValueError(f"There are no {state} {dataset}")
+        qualifiers.append(_STATE_QUALIFIERS[dataset][state])
+    if since is not None or until is not None:
+        if date_field is None:
+            raise ValueError("A date_field is needed to filter by date")
+        if date_field == "merged" and dataset != "pull_requests":
+            raise ValueError("Only pull requests have a merge date")
+        if since is not None and until is not None:
+            qualifiers.append(f"{date_field}:{since.isoformat()}..{until.isoformat()}")
+        elif since is not None:
+            qualifiers.append(f"{date_field}:>={since.isoformat()}")
+        elif until is not None:
+            qualifiers.append(f"{date_field}:<={until.isoformat()}")
+    return " ".join(qualifiers)
+
+
+def split_searches(queries: Mapping[str, str]) -> list[dict[str, str]]:
+    """Split searches into groups that each fit in a single request."""
+    items = list(queries.items())
+    return [
+        dict(items[start : start + MAX_SEARCH_COUNTS])
+        for start in range(0, len(items), MAX_SEARCH_COUNTS)
+    ]
+
+
+class SearchCountSearch(BaseModel):
+    issue_count: int = Field(alias="issueCount")
+
+
+class SearchCount(BaseModel):
+    """Result of a `SearchCount` query."""
+
+    search: SearchCountSearch
+
+
+def search_counts_batch(queries: Mapping[str, str]) -> BatchQuery:
+    """
+    Batch the searches counting the results of several queries.
+
+    Args:
+        queries: The search queries, by key.
+    """
+    if not 1 <= len(queries) <= MAX_SEARCH_COUNTS:
+        raise ValueError(f"Between 1 and {MAX_SEARCH_COUNTS} searches are allowed")
+    batch = BatchQuery()
+    for key, query in queries.items():
+        batch.add_operation(
+            Operation(
+                key=key,
+                operation_name="SearchCount",
+                query=SEARCH_COUNT_QUERY,
+                variables={"query": query},
+                result_type=SearchCount,
+            )
+        )
+    return batch
+
+
+def parse_search_counts(result: BatchResult) -> dict[str, int]:
+    """
+    Read the counts of a `search_counts_batch` result, by query key.
+
+    Raises:
+        GraphQLClientGraphQLMultiError: When a search failed.
+    """
+    if result.errors:
+        raise next(iter(result.errors.values()))
+    return {
+        key: cast(SearchCount, count).search.issue_count
+        for key, count in result.results.items()
+    }
@@ -0,0 +1,165 @@
+"""
+Decoding of GraphQL responses into the generated result models.
+
+The generated client parses the response body with `response.json()` and
+then validates the resulting dicts with `model_validate`, walking the deep
+model tree of a connection page twice. Two other modes are available:
+
+- `json`: the response bytes are validated straight into the models with a
+  cached `TypeAdapter`, in a single pass of the pydantic-core JSON parser.
+- `trusted`: the parsed payload is turned into models like `model_construct`
+  does, without any validation. Only for payloads known to match the
+  generated queries. The models are then built in Python, which on CPython
+  is slower than the pydantic-core validation of `json` (see
+  `benchmarks/decoding.py`), so `json` is the default.
+
+Responses with GraphQL errors, or that do not match the models, go through
+the generic `get_data` path so the usual client errors are raised.
+"""
+
+import types
+from collections.abc import Callable
+from enum import Enum
+from functools import cache, partial
+from typing import (
+    Annotated,
+    Any,
+    Generic,
+    Literal,
+    TypeVar,
+    Union,
+    get_args,
+    get_origin,
+)
+
+import httpx
+from pydantic import BaseModel, TypeAdapter, ValidationError
+from pydantic_core import PydanticUndefined
+
+from services.gql.exceptions import GraphQLClientHttpError
+
+DecodeMode = Literal["validate", "json", "trusted"]
+
+M = TypeVar("M", bound=BaseModel)
+
+
+class GraphQLResponse(BaseModel, Generic[M]):
+    """Envelope of a GraphQL response."""
+
+    data: M | None = None
+    errors: list[dict[str, Any]] | None = None
+
+
+@cache
+def response_adapter(model: type[M]) -> TypeAdapter[GraphQLResponse[M]]:
+    """The adapter validating the JSON response of a query, built once per model."""
+    return TypeAdapter(GraphQLResponse[model])
+
+
+def _converter(annotation: Any) -> Callable[[Any], Any] | None:
+    """How `construct` turns a raw value into the annotated type, `None` as is."""
+    origin = get_origin(annotation)
+    if origin is Annotated:
+        return _converter(get_args(annotation)[0])
+    if origin in (Union, types.UnionType):
+        members = [arg for arg in get_args(annotation) if arg is not type(None)]
+        if len(members) == 1:
+            return _converter(members[0])
+        # Generated unions of object types are discriminated by `__typename`.
+        by_typename = {
+            typename: member
+            for member in members
+            for typename in get_args(member.model_fields["typename__"].annotation)
+        }
+        return lambda value: construct(by_typename[value["__typename"]], value)
+    if origin is list:
+        item = _converter(get_args(annotation)[0])
+        if item is None:
+            return None
+        return lambda values: [
+            None if value is None else item(value) for value in values
+        ]
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return partial(construct, annotation)
+    if isinstance(annotation, type) and issubclass(annotation, Enum):
+        return annotation
+    return None
+
+
+_set = object.__setattr__
+
+
+@cache
+def _construct_plan(
+    model: type[BaseModel],
+) -> list[tuple[str, str, Callable[[Any], Any] | None, Any]]:
+    """The `(alias, name, converter, default)` of every field of a model."""
+    return [
+        (
+            field.alias or name,
+            name,
+            _converter(field.annotation),
+            PydanticUndefined if field.default_factory else field.default,
+        )
+        for name, field in model.model_fields.items()
+    ]
+
+
+def construct(model: type[M], data: dict[str, Any]) -> M:
+    """
+    Build a model and its nested models from trusted data, without validation.
+
+    Equivalent to `model_construct` on every nested model, with the field
+    conversions worked out once per model.
+
+    Args:
+        model: A generated result model.
+        data: The payload, keyed by GraphQL field names.
+    """
+    values: dict[str, Any] = {}
+    fields_set: set[str] = set()
+    for alias, name, convert, default in _construct_plan(model):
+        if alias in data:
+            value = data[alias]
+            values[name] = value if convert is None or value is None else convert(value)
+            fields_set.add(name)
+        elif default is not PydanticUndefined:
+            values[name] = default
+    instance = model.__new__(model)
+    _set(instance, "__dict__", values)
+    _set(instance, "__pydantic_fields_set__", fields_set)
+    _set(instance, "__pydantic_extra__", None)
+    _set(instance, "__pydantic_private__", None)
+    return instance
+
+
+def decode(
+    response: httpx.Response,
+    model: type[M],
+    mode: DecodeMode,
+    get_data: Callable[[httpx.Response], dict[str, Any]],
+) -> M:
+    """
+    Decode the response of a generated query into its result model.
+
+    Args:
+        response: The HTTP response of the query.
+        model: The result model of the query, e.g. `GetRepoIssues`.
+        mode: `validate` like the generated client, `json` or `trusted`.
+        get_data: The `get_data` method of the client that sent the query,
+            used for the generic path.
+    """
+    if mode == "json":
+        if not response.is_success:
+            raise GraphQLClientHttpError(
+                status_code=response.status_code, response=response
+            )
+        try:
+            envelope = response_adapter(model).validate_json(response.content)
+        except ValidationError:
+            envelope = None
+        if envelope is not None and envelope.data is not None and not envelope.errors:
+            return envelope.data
+    elif mode == "trusted":
+        return construct(model, get_data(response))
+    return model.model_validate(get_data(response))
@@ -0,0 +1,320 @@
+"""
+Projection of the repository queries on a subset of the node fields.
+
+The generated queries always select every field of the issues, commits and
+pull requests, e.g. the body, author and reviews of every pull request, even
+when only their creation date and state are used. A projection sends the same
+query with only the requested fields of the items, so the payload, the parse
+time and the nested connections GitHub charges for shrink accordingly.
+
+Results are still typed: they are parsed into subclasses of the generated
+models in which the fields left out are optional and `None`.
+"""
+
+import types
+from collections.abc import Collection
+from dataclasses import dataclass
+from functools import cache
+from typing import Annotated, Any, Union, get_args, get_origin
+
+from pydantic import BaseModel, Field, create_model
+
+from services.github.batch import Operation, record_operation
+from services.github.rate_limit import requests_to_cost
+from services.gql.get_repo_commits import GetRepoCommits
+from services.gql.get_repo_issues import GetRepoIssues
+from services.gql.get_repo_pull_requests import GetRepoPullRequests
+
+_FIELDS = "__FIELDS__"
+
+
+@dataclass(frozen=True)
+class Projection:
+    """
+    How to project a generated query.
+
+    Attributes:
+        operation_name: Name of the projected operation.
+        query: The query, with `__FIELDS__` in place of the item selection.
+        result_type: The result model of the generated query.
+        path: Fields leading from the result model to the item model.
+        selections: The selection of each item field, by model field name.
+        required: Item fields always selected, e.g. the pagination order.
+        connections: Item fields selecting a connection with `first`, which
+            GitHub charges for.
+    """
+
+    operation_name: str
+    query: str
+    result_type: type[BaseModel]
+    path: tuple[str, ...]
+    selections: dict[str, str]
+    required: frozenset[str]
+    connections: frozenset[str] = frozenset()
+
+
+_LABELS = "labels(first: 5) { edges { node { name } } }"
+
+PROJECTIONS = {
+    "get_repo_issues": Projection(
+        operation_name="GetRepoIssuesProjection",
+        query="""
+query GetRepoIssuesProjection(
+  $owner: String!
+  $name: String!
+  $state: [IssueState!]
+  $first: Int = 100
+  $after: String
+) {
+  repository(owner: $owner, name: $name) {
+    issues(
+      first: $first
+      after: $after
+      states: $state
+      orderBy: {direction: DESC, field: UPDATED_AT}
+    ) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      edges {
+        node {
+          __FIELDS__
+        }
+      }
+    }
+  }
+}
+""",
+        result_type=GetRepoIssues,
+        path=("repository", "issues", "edges", "node"),
+        selections={
+            "title": "title",
+            "url": "url",
+            "state": "state",
+            "state_reason": "stateReason",
+            "created_at": "createdAt",
+            "updated_at": "updatedAt",
+            "comments": "comments { totalCount }",
+            "labels": _LABELS,
+        },
+        required=frozenset({"url", "state", "updated_at"}),
+        connections=frozenset({"labels"}),
+    ),
+    "get_repo_commits": Projection(
+        operation_name="GetRepoCommitsProjection",
+        query="""
+query GetRepoCommitsProjection(
+  $owner: String!
+  $name: String!
+  $first: Int = 100
+  $after: String
+) {
+  repository(owner: $owner, name: $name) {
+    defaultBranchRef {
+      target {
+        __typename
+        ... on Commit {
+          history(first: $first, after: $after) {
+            pageInfo {
+              hasNextPage
+              endCursor
+            }
+            edges {
+              node {
+                __FIELDS__
+              }
+            }
+          }
+        }
+      }
+    }
+  }
+}
+""",
+        result_type=GetRepoCommits,
+        path=(
+            "repository",
+            "default_branch_ref",
+            "target",
+            "history",
+            "edges",
+            "node",
+        ),
+        selections={
+            "oid": "oid",
+            "committed_date": "committedDate",
+            "authored_date": "authoredDate",
+            "author": "author { name }",
+            "message": "message",
+            "committer": "committer { name }",
+            "changed_files_if_available": "changedFilesIfAvailable",
+            "additions": "additions",
+            "deletions": "deletions",
+            "status": "status { state }",
+        },
+        required=frozenset({"oid", "committed_date"}),
+    ),
+    "get_repo_pull_requests": Projection(
+        operation_name="GetRepoPullRequestsProjection",
+        query="""
+query GetRepoPullRequestsProjection(
+  $owner: String!
+  $name: String!
+  $state: [PullRequestState!]
+  $first: Int = 100
+  $after: String
+) {
+  repository(owner: $owner, name: $name) {
+    pullRequests(
+      states: $state
+      first: $first
+      after: $after
+      orderBy: {direction: DESC, field: UPDATED_AT}
+    ) {
+      pageInfo {
+        hasNextPage
+        endCursor
+      }
+      totalCount
+      nodes {
+        __FIELDS__
+      }
+    }
+  }
+}
+""",
+        result_type=GetRepoPullRequests,
+        path=("repository", "pull_requests", "nodes"),
+        selections={
+            "merged_at": "mergedAt",
+            "title": "title",
+            "created_at": "createdAt",
+            "updated_at": "updatedAt",
+            "additions": "additions",
+            "deletions": "deletions",
+            "commits": "commits { totalCount }",
+            "labels": _LABELS,
+            "body": "body",
+            "url": "url",
+            "comments": "comments { totalCount }",
+            "reviews": "reviews { totalCount }",
+            "merged_by": "mergedBy { __typename login }",
+            "author": "author { __typename login }",
+            "state": "state",
+        },
+        required=frozenset({"url", "state", "updated_at"}),
+        connections=frozenset({"labels"}),
+    ),
+}
+
+
+def _models(annotation: Any) -> list[type[BaseModel]]:
+    """The models an annotation refers to, e.g. through `Optional` or `List`."""
+    if isinstance(annotation, type) and issubclass(annotation, BaseModel):
+        return [annotation]
+    return [model for arg in get_args(annotation) for model in _models(arg)]
+
+
+def _replace(annotation: Any, old: type[BaseModel], new: type[BaseModel]) -> Any:
+    """Substitute a model in an annotation, keeping its wrappers."""
+    if annotation is old:
+        return new
+    origin = get_origin(annotation)
+    args = get_args(annotation)
+    if origin is Annotated:
+        return Annotated[_replace(args[0], old, new), *annotation.__metadata__]
+    if origin in (Union, types.UnionType):
+        return Union[tuple(_replace(arg, old, new) for arg in args)]  # noqa: UP007
+    if origin is list:
+        return list[_replace(args[0], old, new)]
+    return annotation
+
+
+def _field(model: type[BaseModel], name: str, annotation: Any) -> tuple[Any, Any]:
+    """A `create_model` field definition, keeping the alias of the field."""
+    field = model.model_fields[name]
+    if field.is_required():
+        return annotation, Field(alias=field.alias)
+    return annotation, Field(default=field.default, alias=field.alias)
+
+
+def _project(
+    model: type[BaseModel], path: tuple[str, ...], fields: frozenset[str]
+) -> type[BaseModel]:
+    """Subclass a model along the path, the fields left out becoming `None`."""
+    if not path:
+        return create_model(  # type: ignore[call-overload]
+            f"{model.__name__}Projection",
+            __base__=model,
+            **{
+                name: (field.annotation | None, Field(default=None, alias=field.alias))
+                for name, field in model.model_fields.items()
+                if name not in fields
+            },
+        )
+    name, *rest = path
+    annotation = model.model_fields[name].annotation
+    # Follow the union member holding the rest of the path, e.g. `Commit`.
+    child = next(
+        member
+        for member in _models(annotation)
+        if not rest or rest[0] in member.model_fields
+    )
+    projected = _project(child, tuple(rest), fields)
+    return create_model(  # type: ignore[call-overload]
+        f"{model.__name__}Projection",
+        __base__=model,
+        **{name: _field(model, name, _replace(annotation, child, projected))},
+    )
+
+
+@cache
+def _projection(
+    method: str, fields: frozenset[str]
+) -> tuple[str, type[BaseModel], int]:
+    projection = PROJECTIONS[method]
+    unknown = fields - projection.selections.keys()
+    if unknown:
+        raise ValueError(f"Unknown fields for {method}: {sorted(unknown)}")
+    selected = fields | projection.required
+    query = projection.query.replace(
+        _FIELDS,
+        "\n".join(
+            selection
+            for name, selection in projection.selections.items()
+            if name in selected
+        ),
+    )
+    model = _project(projection.result_type, projection.path, selected)
+    return query, model, len(selected & projection.connections)
+
+
+def project_operation(
+    method: str, fields: Collection[str], **arguments: Any
+) -> tuple[Operation, int]:
+    """
+    Build a generated query selecting only some fields of the items.
+
+    Args:
+        method: Name of the `Client` method, e.g. `get_repo_pull_requests`.
+        fields: Fields of the item model to select, e.g. `created_at`. The
+            fields the pagination depends on are always selected.
+        arguments: Arguments of the client method.
+
+    Returns:
+        The operation, with the projected query and result model, and its
+        estimated point cost.
+
+    Raises:
+        ValueError: When the method cannot be projected or a field is unknown.
+    """
+    if method not in PROJECTIONS:
+        raise ValueError(f"{method} cannot be projected")
+    query, model, connections = _projection(method, frozenset(fields))
+    operation = record_operation(method, **arguments)
+    operation.operation_name = PROJECTIONS[method].operation_name
+    operation.query = query
+    operation.result_type = model
+    first = operation.variables.get("first") or 100
+    return operation, requests_to_cost(1 + first * connections)
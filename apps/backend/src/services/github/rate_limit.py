@@ -0,0 +1,276 @@
+"""
+Rate-limit-aware scheduling of GitHub GraphQL requests.
+
+GitHub meters GraphQL calls in points per token. The scheduler keeps the last
+known budget of every token (from the `X-RateLimit-*` headers, or from a
+`rateLimit { cost remaining resetAt }` object when a query selects it),
+estimates the cost of each query before sending it and delays requests that
+would overdraw the budget until it resets. Rate-limited (403/429) and bad
+gateway (502) responses are retried with exponential backoff and jitter.
+"""
+
+import asyncio
+import hashlib
+import math
+import random
+from collections import OrderedDict
+from collections.abc import Awaitable, Callable
+from dataclasses import asdict, dataclass
+from datetime import UTC, datetime, timedelta
+from email.utils import parsedate_to_datetime
+from typing import Any
+
+import httpx
+
+# Nested connections selected with `first` under each item of the top-level
+# connection. GitHub charges one request per connection to fill.
+_NESTED_CONNECTIONS = {
+    "GetRepoIssues": 1,
+    "GetRepoCommits": 0,
+    "GetRepoPullRequests": 1,
+}
+_DEFAULT_PAGE_SIZE = 100
+
+
+def estimate_requests(
+    operation_name: str | None, variables: dict[str, Any] | None
+) -> int:
+    """Estimate the number of connection requests GitHub needs for a query."""
+    first = (variables or {}).get("first") or _DEFAULT_PAGE_SIZE
+    nested = _NESTED_CONNECTIONS.get(operation_name or "", 0)
+    return 1 + first * nested
+
+
+def requests_to_cost(requests: int) -> int:
+    """Convert a number of connection requests to GraphQL points."""
+    return max(1, math.ceil(requests / 100))
+
+
+def estimate_cost(operation_name: str | None, variables: dict[str, Any] | None) -> int:
+    """
+    Estimate the point cost of a query before sending it.
+
+    Follows GitHub's formula: the number of requests needed to fill every
+    connection, divided by 100 and rounded up, with a minimum of one point.
+    """
+    return requests_to_cost(estimate_requests(operation_name, variables))
+
+
+@dataclass
+class RateLimitBudget:
+    """Last known GraphQL budget of a token."""
+
+    limit: int | None = None
+    remaining: int | None = None
+    used: int | None = None
+    reset_at: datetime | None = None
+    last_cost: int | None = None
+    in_flight: int = 0
+    delayed: int = 0
+    throttled_until: datetime | None = None
+
+
+class RateLimiter:
+    """
+    Schedule GitHub requests so every token stays within its point budget.
+
+    Args:
+        reserve: Points kept unused on every token.
+        max_retries: Retries of a rate-limited or 502 response.
+        backoff_base: Base delay in seconds of the exponential backoff.
+        backoff_max: Maximum delay in seconds between two retries.
+        max_tokens: Budgets tracked before the least recently used idle ones
+            are forgotten.
+    """
+
+    RETRY_STATUS_CODES = frozenset({403, 429, 502})
+
+    def __init__(
+        self,
+        reserve: int = 0,
+        max_retries: int = 5,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        max_tokens: int = 1024,
+    ):
+        self.reserve = reserve
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_tokens = max_tokens
+        self._budgets: OrderedDict[str, RateLimitBudget] = OrderedDict()
+
+    @staticmethod
+    def token_key(token: str) -> str:
+        """Identify a token without exposing it."""
+        return hashlib.sha256(token.encode()).hexdigest()[:12]
+
+    def budget(self, token: str) -> RateLimitBudget:
+        """Get the budget tracked for a token."""
+        key = self.token_key(token)
+        budget = self._budgets.get(key)
+        if budget is None:
+            budget = self._budgets[key] = RateLimitBudget()
+            self._evict()
+        self._budgets.move_to_end(key)
+        return budget
+
+    def _evict(self) -> None:
+        """
+        Forget the least recently used budgets over `max_tokens`. The budgets
+        with requests in flight or delayed are kept, as these requests still
+        account for them.
+        """
+        excess = len(self._budgets) - self.max_tokens
+        for key, budget in list(self._budgets.items()):
+            if excess <= 0:
+                return
+            if not budget.in_flight and not budget.delayed:
+                del self._budgets[key]
+                excess -= 1
+
+    def snapshot(self, token: str) -> dict[str, Any]:
+        """Budget state of a token, for monitoring."""
+        budget = self._budgets.get(self.token_key(token), RateLimitBudget())
+        return asdict(budget)
+
+    async def send(
+        self,
+        token: str,
+        cost: int,
+        send: Callable[[], Awaitable[httpx.Response]],
+    ) -> httpx.Response:
+        """
+        Send a request once the token can afford it, retrying on rate limits.
+
+        Args:
+            token: The credential the request is sent with.
+            cost: The estimated point cost of the request.
+            send: Coroutine function performing the request.
+        """
+        budget = self.budget(token)
+        attempt = 0
+        while True:
+            await self._reserve(budget, cost)
+            try:
+                response = await send()
+            finally:
+                budget.in_flight -= cost
+            self._update(budget, response)
+
+            if (
+                attempt == self.max_retries
+                or response.status_code not in self.RETRY_STATUS_CODES
+                or (response.status_code == 403 and not _is_rate_limited(response))
+            ):
+                return response
+
+            delay = self._retry_delay(budget, response, attempt)
+            if response.status_code != 502:
+                # Rate limits apply to the token: hold its other requests too.
+                budget.throttled_until = datetime.now(UTC) + timedelta(seconds=delay)
+            await asyncio.sleep(delay)
+            attempt += 1
+
+    async def _reserve(self, budget: RateLimitBudget, cost: int) -> None:
+        """Wait until the budget can afford `cost` points, then reserve them."""
+        while True:
+            now = datetime.now(UTC)
+            wait_until: datetime | None = None
+            if budget.throttled_until and budget.throttled_until > now:
+                wait_until = budget.throttled_until
+            elif (
+                budget.remaining is not None
+                and budget.reset_at is not None
+                and budget.reset_at > now
+                and budget.remaining - budget.in_flight - self.reserve < cost
+            ):
+                wait_until = budget.reset_at
+            if wait_until is None:
+                budget.in_flight += cost
+                return
+
+            budget.delayed += 1
+            try:
+                await asyncio.sleep((wait_until - now).total_seconds())
+            finally:
+                budget.delayed -= 1
+
+    def _update(self, budget: RateLimitBudget, response: httpx.Response) -> None:
+        """Refresh the budget from the rate limit headers and body."""
+        headers = response.headers
+        if "x-ratelimit-remaining" in headers:
+            budget.remaining = int(headers["x-ratelimit-remaining"])
+        if "x-ratelimit-limit" in headers:
+            budget.limit = int(headers["x-ratelimit-limit"])
+        if "x-ratelimit-used" in headers:
+            budget.used = int(headers["x-ratelimit-used"])
+        if "x-ratelimit-reset" in headers:
+            budget.reset_at = datetime.fromtimestamp(
+                int(headers["x-ratelimit-reset"]), UTC
+            )
+
+        if b'"rateLimit"' in response.content:
+            try:
+                rate_limit = (response.json().get("data") or {}).get("rateLimit")
+            except (ValueError, AttributeError):
+                rate_limit = None
+            if rate_limit:
+                budget.last_cost = rate_limit.get("cost", budget.last_cost)
+                budget.remaining = rate_limit.get("remaining", budget.remaining)
+                if rate_limit.get("resetAt"):
+                    budget.reset_at = datetime.fromisoformat(rate_limit["resetAt"])
+
+    def _retry_delay(
+        self,
+        budget: RateLimitBudget,
+        response: httpx.Response,
+        attempt: int,
+    ) -> float:
+        """
+        Seconds to wait before retrying a rate-limited or failed request, at
+        most `backoff_max`. A budget used up until its reset is still held back
+        by `_reserve`.
+        """
+        now = datetime.now(UTC)
+        delay = _parse_retry_after(response.headers.get("retry-after"), now)
+        if delay is None:
+            if budget.remaining == 0 and budget.reset_at and budget.reset_at > now:
+                delay = (budget.reset_at - now).total_seconds()
+            else:
+                # Exponential backoff with full jitter.
+                delay = random.uniform(
+                    0, min(self.backoff_max, self.backoff_base * 2**attempt)
+                )
+        return min(delay, self.backoff_max)
+
+
+def _parse_retry_after(value: str | None, now: datetime) -> float | None:
+    """
+    Read a Retry-After header, in seconds or as an HTTP date.
+
+    Returns:
+        The seconds to wait, or `None` without a valid header.
+    """
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=UTC)
+    return max(0.0, (retry_at - now).total_seconds())
+
+
+def _is_rate_limited(response: httpx.Response) -> bool:
+    """Tell a rate-limited 403 apart from a permission error."""
+    if "retry-after" in response.headers:
+        return True
+    if response.headers.get("x-ratelimit-remaining") == "0":
+        return True
+    return "rate limit" in response.text.lower()
@@ -0,0 +1,31 @@
+"""
+Shared HTTP connection pool for the GitHub GraphQL API.
+
+A single pool is created when the application starts and shared by every
+per-request client, so connections (and their TLS sessions) to
+api.github.com are reused and the number of open sockets stays bounded.
+Credentials are never stored on the pool: each client sends its own
+`Authorization` header with every request.
+"""
+
+import httpx
+
+from utils.config import Settings
+
+
+def create_http_client(settings: Settings) -> httpx.AsyncClient:
+    """
+    Create the process-wide HTTP client used to talk to GitHub.
+
+    Args:
+        settings: The application settings holding the pool configuration.
+    """
+    return httpx.AsyncClient(
+        http2=settings.github_http2,
+        limits=httpx.Limits(
+            max_connections=settings.github_max_connections,
+            max_keepalive_connections=settings.github_max_keepalive_connections,
+            keepalive_expiry=settings.github_keepalive_expiry,
+        ),
+        timeout=httpx.Timeout(settings.github_timeout),
+    )
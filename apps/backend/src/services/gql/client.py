@@ -21,14 +21,17 @@ class Client(BaseClient):
         owner: str,
         name: str,
         state: Union[Optional[List[IssueState]], UnsetType] = UNSET,
+        first: Union[Optional[int], UnsetType] = UNSET,
+        after: Union[Optional[str], UnsetType] = UNSET,
         **kwargs: Any
     ) -> GetRepoIssues:
         query = gql(
             """
-            query GetRepoIssues($owner: String!, $name: String!, $state: [IssueState!]) {
+            query GetRepoIssues($owner: String!, $name: String!, $state: [IssueState!], $first: Int = 100, $after: String) {
               repository(owner: $owner, name: $name) {
                 issues(
-                  first: 100
+                  first: $first
+                  after: $after
                   states: $state
                   orderBy: {direction: DESC, field: UPDATED_AT}
                 ) {
@@ -61,26 +64,44 @@ class Client(BaseClient):
             }
             """
         )
-        variables: Dict[str, object] = {"owner": owner, "name": name, "state": state}
+        variables: Dict[str, object] = {
+            "owner": owner,
+            "name": name,
+            "state": state,
+            "first": first,
+            "after": after,
+        }
         response = self.execute(
             query=query, operation_name="GetRepoIssues", variables=variables, **kwargs
         )
         data = self.get_data(response)
         return GetRepoIssues.model_validate(data)
 
-    def get_repo_commits(self, owner: str, name: str, **kwargs: Any) -> GetRepoCommits:
+    def get_repo_commits(
+        self,
+        owner: str,
+        name: str,
+        first: Union[Optional[int], UnsetType] = UNSET,
+        after: Union[Optional[str], UnsetType] = UNSET,
+        **kwargs: Any
+    ) -> GetRepoCommits:
         query = gql(
             """
-            query GetRepoCommits($owner: String!, $name: String!) {
+            query GetRepoCommits($owner: String!, $name: String!, $first: Int = 100, $after: String) {
               repository(owner: $owner, name: $name) {
                 defaultBranchRef {
                   target {
                     __typename
                     ... on Commit {
-                      history(first: 100) {
+                      history(first: $first, after: $after) {
+                        pageInfo {
+                          hasNextPage
+                          endCursor
+                        }
                         edges {
                           node {
                             ... on Commit {
+                              oid
                               committedDate
                               authoredDate
                               author {
@@ -107,7 +128,12 @@ class Client(BaseClient):
             }
             """
         )
-        variables: Dict[str, object] = {"owner": owner, "name": name}
+        variables: Dict[str, object] = {
+            "owner": owner,
+            "name": name,
+            "first": first,
+            "after": after,
+        }
         response = self.execute(
             query=query, operation_name="GetRepoCommits", variables=variables, **kwargs
         )
@@ -119,15 +145,18 @@ class Client(BaseClient):
         owner: str,
         name: str,
         state: Union[Optional[List[PullRequestState]], UnsetType] = UNSET,
+        first: Union[Optional[int], UnsetType] = UNSET,
+        after: Union[Optional[str], UnsetType] = UNSET,
         **kwargs: Any
     ) -> GetRepoPullRequests:
         query = gql(
             """
-            query GetRepoPullRequests($owner: String!, $name: String!, $state: [PullRequestState!]) {
+            query GetRepoPullRequests($owner: String!, $name: String!, $state: [PullRequestState!], $first: Int = 100, $after: String) {
               repository(owner: $owner, name: $name) {
                 pullRequests(
                   states: $state
-                  first: 100
+                  first: $first
+                  after: $after
                   orderBy: {direction: DESC, field: UPDATED_AT}
                 ) {
                   pageInfo {
@@ -177,7 +206,13 @@ class Client(BaseClient):
             }
             """
         )
-        variables: Dict[str, object] = {"owner": owner, "name": name, "state": state}
+        variables: Dict[str, object] = {
+            "owner": owner,
+            "name": name,
+            "state": state,
+            "first": first,
+            "after": after,
+        }
         response = self.execute(
             query=query,
             operation_name="GetRepoPullRequests",
@@ -41,6 +41,9 @@ class GetRepoCommitsRepositoryDefaultBranchRefTargetCommit(BaseModel):
 
 
 class GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistory(BaseModel):
+    page_info: "GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryPageInfo" = (
+        Field(alias="pageInfo")
+    )
     edges: Optional[
         List[
             Optional["GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryEdges"]
@@ -48,6 +51,11 @@ class GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistory(BaseModel):
     ]
 
 
+class GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryPageInfo(BaseModel):
+    has_next_page: bool = Field(alias="hasNextPage")
+    end_cursor: Optional[str] = Field(alias="endCursor")
+
+
 class GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryEdges(BaseModel):
     node: Optional[
         "GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryEdgesNode"
@@ -55,6 +63,7 @@ class GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryEdges(BaseModel
 
 
 class GetRepoCommitsRepositoryDefaultBranchRefTargetCommitHistoryEdgesNode(BaseModel):
+    oid: Any
     committed_date: Any = Field(alias="committedDate")
     authored_date: Any = Field(alias="authoredDate")
     author: Optional[
@@ -0,0 +1,244 @@
+"""
+Asynchronous chart generation jobs.
+
+A job is recorded in SQLite when submitted and run in the background by a
+bounded pool of workers, so clients poll for the result instead of holding
+a connection open for the whole pipeline. The queue is bounded as well:
+once it is full, new jobs are rejected so callers can back off.
+
+Job state survives a restart, but the GitHub token a job runs with is never
+persisted: jobs interrupted by a shutdown are marked as failed, and so are
+jobs left unfinished by a crashed process once they exceed the job timeout.
+"""
+
+import asyncio
+import json
+import sqlite3
+import uuid
+from collections.abc import Awaitable, Callable
+from contextlib import closing
+from datetime import UTC, datetime, timedelta
+from pathlib import Path
+from typing import Any, Literal
+
+JobStatus = Literal["queued", "running", "succeeded", "failed"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    status TEXT NOT NULL,
+    holder TEXT NOT NULL,
+    request TEXT NOT NULL,
+    result TEXT,
+    error TEXT,
+    created_at TEXT NOT NULL,
+    updated_at TEXT NOT NULL
+);
+"""
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is full."""
+
+
+class JobStore:
+    """
+    SQLite store of the jobs and their results.
+
+    Args:
+        path: Location of the SQLite database file.
+    """
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per operation, so the store can be used from any thread.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def create(self, request: dict[str, Any], holder: str) -> str:
+        """
+        Record a new queued job and return its ID.
+
+        Args:
+            request: The job input.
+            holder: Identifies the queue running the job.
+        """
+        job_id = uuid.uuid4().hex
+        now = datetime.now(UTC).isoformat()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "INSERT INTO jobs"
+                " (id, status, holder, request, created_at, updated_at)"
+                " VALUES (?, 'queued', ?, ?, ?, ?)",
+                (job_id, holder, json.dumps(request), now, now),
+            )
+        return job_id
+
+    def get(self, job_id: str) -> dict[str, Any] | None:
+        """Get a job, or `None` if it does not exist."""
+        with closing(self._connect()) as connection:
+            row = connection.execute(
+                "SELECT id, status, request, result, error, created_at, updated_at"
+                " FROM jobs WHERE id = ?",
+                (job_id,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "job_id": row[0],
+            "status": row[1],
+            "request": json.loads(row[2]),
+            "result": json.loads(row[3]) if row[3] is not None else None,
+            "error": row[4],
+            "created_at": row[5],
+            "updated_at": row[6],
+        }
+
+    def update(
+        self,
+        job_id: str,
+        status: JobStatus,
+        result: dict[str, Any] | None = None,
+        error: str | None = None,
+    ) -> None:
+        """Record the new status of a job, with its result or error."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "UPDATE jobs SET status = ?, result = ?, error = ?, updated_at = ?"
+                " WHERE id = ?",
+                (
+                    status,
+                    json.dumps(result) if result is not None else None,
+                    error,
+                    datetime.now(UTC).isoformat(),
+                    job_id,
+                ),
+            )
+
+    def fail_unfinished(
+        self,
+        error: str,
+        holder: str | None = None,
+        updated_before: datetime | None = None,
+    ) -> None:
+        """
+        Mark queued or running jobs as failed.
+
+        Args:
+            error: The reason recorded on the jobs.
+            holder: Only fail the jobs of this queue.
+            updated_before: Only fail the jobs not updated since then.
+        """
+        query = (
+            "UPDATE jobs SET status = 'failed', error = ?, updated_at = ?"
+            " WHERE status IN ('queued', 'running')"
+        )
+        params: list[Any] = [error, datetime.now(UTC).isoformat()]
+        if holder is not None:
+            query += " AND holder = ?"
+            params.append(holder)
+        if updated_before is not None:
+            query += " AND updated_at < ?"
+            params.append(updated_before.isoformat())
+        with closing(self._connect()) as connection, connection:
+            connection.execute(query, params)
+
+
+class JobQueue:
+    """
+    Bounded queue of jobs run by a fixed number of workers.
+
+    Args:
+        store: Where the jobs are recorded.
+        workers: Number of jobs run concurrently.
+        max_pending: Number of jobs waiting for a worker before new ones are
+            rejected.
+        timeout: Seconds a job may run before it is cancelled and fails.
+            Unfinished jobs not updated for longer than this are considered
+            abandoned.
+    """
+
+    def __init__(self, store: JobStore, workers: int, max_pending: int, timeout: float):
+        self.store = store
+        self.workers = workers
+        self.timeout = timeout
+        self.holder = uuid.uuid4().hex
+        self._queue: asyncio.Queue[tuple[str, Callable[[], Awaitable[Any]]]] = (
+            asyncio.Queue(maxsize=max_pending)
+        )
+        self._tasks: list[asyncio.Task[None]] = []
+
+    async def start(self) -> None:
+        """Start the workers, failing the jobs abandoned by crashed processes."""
+        await asyncio.to_thread(
+            self.store.fail_unfinished,
+            "Abandoned by its server process",
+            updated_before=datetime.now(UTC) - timedelta(seconds=self.timeout),
+        )
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    async def stop(self) -> None:
+        """Cancel the workers and fail the jobs they did not finish."""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        await asyncio.to_thread(
+            self.store.fail_unfinished,
+            "Interrupted by a server shutdown",
+            holder=self.holder,
+        )
+
+    async def submit(
+        self, request: dict[str, Any], run: Callable[[], Awaitable[dict[str, Any]]]
+    ) -> str:
+        """
+        Record a job and queue it.
+
+        Args:
+            request: The job input, stored with the job.
+            run: Coroutine function computing the job result.
+
+        Raises:
+            QueueFullError: When `max_pending` jobs are already waiting.
+        """
+        if self._queue.full():
+            raise QueueFullError("Too many jobs are pending")
+        job_id = await asyncio.to_thread(self.store.create, request, self.holder)
+        try:
+            self._queue.put_nowait((job_id, run))
+        except asyncio.QueueFull:
+            # Filled up while the job was being recorded.
+            await asyncio.to_thread(
+                self.store.update, job_id, "failed", error="Too many jobs are pending"
+            )
+            raise QueueFullError("Too many jobs are pending") from None
+        return job_id
+
+    async def _work(self) -> None:
+        while True:
+            job_id, run = await self._queue.get()
+            try:
+                await asyncio.to_thread(self.store.update, job_id, "running")
+                result = await asyncio.wait_for(run(), self.timeout)
+            except asyncio.CancelledError:
+                raise
+            except TimeoutError:
+                await asyncio.to_thread(
+                    self.store.update, job_id, "failed", error="Timed out"
+                )
+            except Exception as exc:
+                await asyncio.to_thread(
+                    self.store.update, job_id, "failed", error=str(exc)
+                )
+            else:
+                await asyncio.to_thread(
+                    self.store.update, job_id, "succeeded", result=result
+                )
+            finally:
+                self._queue.task_done()
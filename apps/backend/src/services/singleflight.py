@@ -0,0 +1,130 @@
+"""
+Coalescing of identical in-flight analytics requests.
+
+When many clients ask for the same chart at once, only the first request runs
+the agent graph: the others wait for it and share its result. Within a
+worker process the waiters await the same task. Across uvicorn workers, an
+SQLite lock lets a single worker compute the result while the others wait
+for it and then read it from the shared result cache.
+
+Requests are coalesced on their result cache key, which includes the hash of
+the caller's GitHub token: only the requests of the same token share an
+execution, and the results of different users are never merged.
+"""
+
+import asyncio
+import sqlite3
+import time
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager, closing
+from pathlib import Path
+from typing import Any
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS locks (
+    key TEXT PRIMARY KEY,
+    holder TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+
+class SQLiteLock:
+    """
+    Named locks shared by every process using the same SQLite file.
+
+    Args:
+        path: Location of the SQLite database file.
+        lease: Seconds after which a lock is considered abandoned, e.g. when
+            its holder crashed.
+        poll_interval: Seconds between two attempts to take a held lock.
+    """
+
+    def __init__(self, path: str | Path, lease: float, poll_interval: float = 0.5):
+        self.path = Path(path)
+        self.lease = lease
+        self.poll_interval = poll_interval
+        self.holder = uuid.uuid4().hex
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as connection:
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.executescript(_SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per operation, so the lock can be used from any thread.
+        return sqlite3.connect(self.path, timeout=30)
+
+    def try_acquire(self, key: str) -> bool:
+        """Take the lock if it is free or abandoned."""
+        now = time.time()
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "DELETE FROM locks WHERE key = ? AND expires_at <= ?", (key, now)
+            )
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO locks (key, holder, expires_at)"
+                " VALUES (?, ?, ?)",
+                (key, self.holder, now + self.lease),
+            )
+            return cursor.rowcount == 1
+
+    def release(self, key: str) -> None:
+        """Release the lock if this process holds it."""
+        with closing(self._connect()) as connection, connection:
+            connection.execute(
+                "DELETE FROM locks WHERE key = ? AND holder = ?", (key, self.holder)
+            )
+
+    @asynccontextmanager
+    async def hold(self, key: str) -> AsyncIterator[None]:
+        """Wait for the lock, and hold it for the duration of the block."""
+        while not await asyncio.to_thread(self.try_acquire, key):
+            await asyncio.sleep(self.poll_interval)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(self.release, key)
+
+
+class SingleFlight:
+    """
+    Run a single execution per key at a time and share its result.
+
+    Args:
+        lock: Lock coordinating the worker processes. Only the current
+            process is coordinated when omitted.
+    """
+
+    def __init__(self, lock: SQLiteLock | None = None):
+        self.lock = lock
+        self._in_flight: dict[str, asyncio.Task[Any]] = {}
+
+    async def run(self, key: str, fn: Callable[[], Awaitable[Any]]) -> tuple[Any, bool]:
+        """
+        Run `fn`, or wait for the execution already in flight for `key`.
+
+        Args:
+            key: Identifies identical executions.
+            fn: Coroutine function computing the result. When a `lock` is set,
+                it is called while holding it, so it should first check
+                whether another process already stored the result.
+
+        Returns:
+            The result, and whether it was shared from another execution.
+        """
+        task = self._in_flight.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.create_task(self._run_locked(key, fn))
+            self._in_flight[key] = task
+            task.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        # A waiter going away (e.g. a client disconnecting) must not cancel
+        # the execution the other waiters depend on.
+        return await asyncio.shield(task), shared
+
+    async def _run_locked(self, key: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if self.lock is None:
+            return await fn()
+        async with self.lock.hold(key):
+            return await fn()
@@ -2,7 +2,9 @@
 Configuration for the application.
 """
 
+from datetime import timedelta
 from functools import lru_cache
+from typing import Literal
 
 from pydantic import AnyUrl, SecretStr
 from pydantic_settings import BaseSettings
@@ -17,6 +19,45 @@ class Settings(BaseSettings):
     azure_openai_api_version: str = "2024-02-15-preview"
     github_graphql_url: AnyUrl = AnyUrl("https://api.github.com/graphql")
     codegen_gh_auth: SecretStr
+    github_page_size: int = 100
+    github_max_items: int | None = 1000
+    github_validate_rows: bool = False
+    github_decode_mode: Literal["validate", "json", "trusted"] = "json"
+    github_http2: bool = True
+    github_max_connections: int = 100
+    github_max_keepalive_connections: int = 20
+    github_keepalive_expiry: float = 30.0
+    github_timeout: float = 60.0
+    github_rate_limit_reserve: int = 50
+    github_max_retries: int = 5
+    github_backoff_base: float = 1.0
+    github_backoff_max: float = 60.0
+    github_rate_limit_max_tokens: int = 1024
+    job_store_path: str = "data/jobs.sqlite3"
+    job_workers: int = 4
+    job_max_pending: int = 100
+    job_timeout: timedelta = timedelta(minutes=15)
+    sse_heartbeat_interval: float = 15.0
+    supervisor_routing: Literal["llm", "rules"] = "rules"
+    repo_store_path: str | None = "data/repos.sqlite3"
+    repo_store_sync_interval: timedelta = timedelta(minutes=5)
+    result_cache_backend: Literal["memory", "sqlite"] | None = "memory"
+    result_cache_path: str = "data/results.sqlite3"
+    result_cache_ttl: timedelta = timedelta(hours=1)
+    result_cache_max_entries: int = 256
+    llm_cache_backend: Literal["memory", "sqlite"] | None = "sqlite"
+    llm_cache_path: str = "data/llm_cache.sqlite3"
+    llm_cache_ttl: timedelta = timedelta(days=1)
+    llm_cache_max_entries: int = 1024
+    plan_cache_path: str | None = "data/plans.sqlite3"
+    plan_cache_embedder: Literal["hashing", "azure"] = "hashing"
+    plan_cache_embedding_deployment: str = "text-embedding-3-small"
+    plan_cache_threshold: float = 0.8
+    plan_cache_ttl: timedelta = timedelta(days=7)
+    plan_cache_max_entries: int = 1024
+    chart_templates: bool = True
+    single_flight_lock_path: str = "data/locks.sqlite3"
+    single_flight_lease: timedelta = timedelta(minutes=10)
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,139 @@
+"""Chart data aggregation unit test module."""
+
+import pytest
+
+from services.agents.aggregation import aggregate, needed_columns
+from services.agents.types import Aggregation
+
+
+def _aggregation(**fields):
+    return Aggregation(
+        **{
+            "dataset": "pull_requests",
+            "group_by": [],
+            "bins": None,
+            "time_column": None,
+            "time_bucket": None,
+            "timezone": None,
+            "fill_gaps": False,
+            "rolling_window": None,
+            "cumulative": False,
+            "metric": "count",
+            "value_column": None,
+            "percentile": None,
+            "pivot": False,
+            **fields,
+        }
+    )
+
+
+PULL_REQUESTS = {
+    "state": ["OPEN", "MERGED", "MERGED", "CLOSED"],
+    "labels": [["bug", "ui"], ["bug"], [], ["docs"]],
+    "additions": [10, 20, 30, 40],
+    "created_at": [
+        "2024-01-01T10:00:00Z",
+        "2024-01-02T10:00:00Z",
+        "2024-01-20T10:00:00Z",
+        "2024-03-05T10:00:00Z",
+    ],
+    "merged_at": [None, "2024-01-03T10:00:00Z", "2024-01-21T22:00:00Z", None],
+}
+
+
+def test_count_by_group():
+    """Test that rows are counted per group, missing values included."""
+    data = aggregate(PULL_REQUESTS, _aggregation(group_by=["state"]))
+    assert sorted(data, key=lambda row: row["state"]) == [
+        {"state": "CLOSED", "value": 1},
+        {"state": "MERGED", "value": 2},
+        {"state": "OPEN", "value": 1},
+    ]
+
+
+def test_rows_count_once_per_label():
+    """Test that a row with several labels counts for each of them."""
+    data = aggregate(PULL_REQUESTS, _aggregation(group_by=["labels"]))
+    assert {row["labels"]: row["value"] for row in data} == {
+        "(none)": 1,
+        "bug": 2,
+        "docs": 1,
+        "ui": 1,
+    }
+
+
+@pytest.mark.parametrize(
+    ("metric", "percentile", "expected"),
+    [("sum", None, 100), ("mean", None, 25), ("percentile", 50, 25)],
+)
+def test_metrics(metric, percentile, expected):
+    """Test the metrics of a value column."""
+    data = aggregate(
+        PULL_REQUESTS,
+        _aggregation(metric=metric, value_column="additions", percentile=percentile),
+    )
+    assert data == [{"value": expected}]
+
+
+def test_monthly_series_with_gaps():
+    """Test that empty buckets are filled with zero counts."""
+    data = aggregate(
+        PULL_REQUESTS,
+        _aggregation(time_column="created_at", time_bucket="month", fill_gaps=True),
+    )
+    assert data == [
+        {"created_at": "2024-01-01", "value": 3},
+        {"created_at": "2024-02-01", "value": 0},
+        {"created_at": "2024-03-01", "value": 1},
+    ]
+
+
+def test_rows_without_timestamp_are_left_out():
+    """Test that unmerged pull requests are not on a merged_at axis."""
+    data = aggregate(
+        PULL_REQUESTS,
+        _aggregation(time_column="merged_at", time_bucket="month", cumulative=True),
+    )
+    assert data == [{"merged_at": "2024-01-01", "value": 2}]
+
+
+def test_pivot():
+    """Test that the last group becomes one column per value."""
+    data = aggregate(
+        PULL_REQUESTS,
+        _aggregation(
+            group_by=["state"],
+            time_column="created_at",
+            time_bucket="month",
+            fill_gaps=True,
+            pivot=True,
+        ),
+    )
+    assert data[0] == {"created_at": "2024-01-01", "CLOSED": 0, "MERGED": 2, "OPEN": 1}
+    assert len(data) == 3
+
+
+def test_bins():
+    """Test that a number is counted per bin, empty bins included."""
+    columns = {"comments": [0, 1, 2, 9, 10, None, "n/a"]}
+    data = aggregate(columns, _aggregation(group_by=["comments"], bins=5))
+    assert data == [
+        {"comments": 0.0, "value": 3},
+        {"comments": 2.0, "value": 0},
+        {"comments": 4.0, "value": 0},
+        {"comments": 6.0, "value": 0},
+        {"comments": 8.0, "value": 2},
+    ]
+
+
+def test_derived_merge_time():
+    """Test that merge_time_hours is derived from the timestamps."""
+    aggregation = _aggregation(metric="mean", value_column="merge_time_hours")
+    assert needed_columns(aggregation) == {"created_at", "merged_at"}
+    assert aggregate(PULL_REQUESTS, aggregation) == [{"value": 30.0}]
+
+
+def test_unknown_column():
+    """Test that an unknown column is reported as a ValueError."""
+    with pytest.raises(ValueError, match="Unknown column"):
+        aggregate(PULL_REQUESTS, _aggregation(group_by=["author"]))
@@ -0,0 +1,67 @@
+"""Analytics routes unit test module."""
+
+import asyncio
+import json
+
+from fastapi import Response
+
+from services.agents.types import DeveloperOutput
+from services.cache import MemoryCacheBackend, ResultCache
+from services.singleflight import SingleFlight
+from src.routes.v1.analytics import analytics
+from validation.api import AnalyticsRequest
+
+
+class _Graph:
+    """Agent graph writing the chart data of each request like the analyst."""
+
+    async def ainvoke(self, context, config=None):
+        data = [{"message": context["message"]}]
+        return {
+            "developer_output": DeveloperOutput(
+                typescript_code=f"// {context['message']}",
+                explanation=None,
+                error_message=None,
+            ),
+            "chart_data": data,
+        }
+
+
+def _request(message, cache, single_flight):
+    response = Response()
+    result = asyncio.run(
+        analytics(
+            AnalyticsRequest(message=message, owner="o", repo="r"),
+            response,
+            "token",
+            client=None,
+            graph=_Graph(),
+            store=None,
+            cache=cache,
+            single_flight=single_flight,
+        )
+    )
+    return result, response.headers.get("X-Cache")
+
+
+def test_cache_hit_restores_the_chart_data(tmp_path, monkeypatch):
+    """Test that a cached chart is served with its own data."""
+    # The charts are written relative to the backend, in the frontend.
+    (tmp_path / "backend").mkdir()
+    monkeypatch.chdir(tmp_path / "backend")
+    cache = ResultCache(MemoryCacheBackend(), ttl=60)
+    single_flight = SingleFlight()
+
+    _request("issues per week", cache, single_flight)
+    _request("PRs per month", cache, single_flight)
+    result, cache_status = _request("issues per week", cache, single_flight)
+
+    assert cache_status == "HIT"
+    assert result == {"typescript_code": "// issues per week", "explanation": None}
+    charts = tmp_path / "frontend"
+    assert (charts / "src/app/charts/o/r/chart.tsx").read_text() == (
+        "// issues per week"
+    )
+    assert json.loads((charts / "public/charts/o/r/data.json").read_text()) == [
+        {"message": "issues per week"}
+    ]
@@ -0,0 +1,90 @@
+"""GraphQL batch unit test module."""
+
+import pytest
+
+from services.github.batch import RATE_LIMIT_SELECTION, BatchQuery
+from services.gql.exceptions import GraphQLClientGraphQLMultiError
+
+
+def _batch():
+    batch = BatchQuery()
+    batch.add("get_repo_commits", key="a", owner="o", name="r", first=2)
+    batch.add("get_repo_issues", key="b", owner="o", name="s", first=1)
+    return batch
+
+
+def test_document_aliases_fields_and_variables():
+    """Test that every operation gets its own fields and variables."""
+    query, variables = _batch().document()
+
+    assert query.startswith("query Batch($op0__owner: String!, $op0__name: String!")
+    assert "op0__repository: repository(owner: $op0__owner, name: $op0__name)" in query
+    assert "op1__repository: repository(owner: $op1__owner, name: $op1__name)" in query
+    assert "history(first: $op0__first, after: $op0__after)" in query
+    assert RATE_LIMIT_SELECTION in query
+    assert variables["op0__first"] == 2
+    assert variables["op1__name"] == "s"
+
+
+def test_invalid_and_duplicate_keys():
+    """Test that keys must be distinct and methods generated queries."""
+    batch = _batch()
+    with pytest.raises(ValueError):
+        batch.add("get_repo_commits", key="a", owner="o", name="r")
+    with pytest.raises(ValueError):
+        batch.add("not_a_query", key="c")
+
+
+def test_keys_sharing_a_prefix_get_their_own_results():
+    """Test that keys such as `a` and `a_` are aliased and parsed apart."""
+    batch = BatchQuery(include_rate_limit=False)
+    for key in ["a", "a_", "1 x"] + [f"k{index}" for index in range(10)]:
+        batch.add("get_repo_commits", key=key, owner="o", name=key, first=1)
+    _, variables = batch.document()
+
+    assert variables["op1__name"] == "a_"
+    assert variables["op10__name"] == "k7"
+    result = batch.parse(
+        {f"op{index}__repository": None for index in range(len(batch.operations))},
+        [{"message": "Not found", "path": ["op1__repository"]}],
+    )
+    assert set(result.errors) == {"a_"}
+    assert len(result.results) == 12
+
+
+def test_parse_splits_the_results():
+    """Test that the response is split into the result models."""
+    result = _batch().parse(
+        {
+            "op0__repository": None,
+            "op1__repository": {
+                "issues": {
+                    "pageInfo": {"hasNextPage": False, "endCursor": None},
+                    "edges": [],
+                }
+            },
+            "rateLimit": {"cost": 1, "remaining": 4999, "resetAt": None},
+        }
+    )
+
+    assert not result.errors
+    assert result.results["a"].repository is None
+    assert result.results["b"].repository.issues.edges == []
+
+
+def test_parse_attributes_errors_to_operations():
+    """Test that an operation error does not fail the other operations."""
+    result = _batch().parse(
+        {"op0__repository": None, "op1__repository": None},
+        [{"message": "Not found", "path": ["op1__repository"]}],
+    )
+
+    assert set(result.results) == {"a"}
+    assert set(result.errors) == {"b"}
+    assert result.errors["b"].errors[0].message == "Not found"
+
+
+def test_parse_raises_unattributed_errors():
+    """Test that errors outside every operation are raised."""
+    with pytest.raises(GraphQLClientGraphQLMultiError):
+        _batch().parse({}, [{"message": "Something went wrong"}])
@@ -0,0 +1,82 @@
+"""Columnar dataset unit test module."""
+
+import pytest
+
+from benchmarks.decoding import commits_page, issues_page, pull_requests_page
+from services.agents.columns import (
+    columns_from_rows,
+    empty_columns,
+    extend_columns,
+    iter_rows,
+    node_fields,
+    to_rows,
+)
+from services.agents.types import Commits, Issues, PullRequests
+from services.gql.get_repo_commits import GetRepoCommits
+from services.gql.get_repo_issues import GetRepoIssues
+from services.gql.get_repo_pull_requests import GetRepoPullRequests
+
+
+def _issue_nodes():
+    page = GetRepoIssues.model_validate(issues_page(0))
+    return [edge.node for edge in page.repository.issues.edges]
+
+
+def _commit_nodes():
+    page = GetRepoCommits.model_validate(commits_page(0))
+    return [
+        edge.node for edge in page.repository.default_branch_ref.target.history.edges
+    ]
+
+
+def _pull_request_nodes():
+    page = GetRepoPullRequests.model_validate(pull_requests_page(0))
+    return page.repository.pull_requests.nodes
+
+
+DATASETS = [
+    (Issues, _issue_nodes),
+    (Commits, _commit_nodes),
+    (PullRequests, _pull_request_nodes),
+]
+
+
+@pytest.mark.parametrize(("model", "nodes"), DATASETS)
+def test_columns_match_the_validated_models(model, nodes):
+    """Test that the columns hold the values the models would serialize."""
+    columns = empty_columns(model)
+    extend_columns(columns, nodes(), model)
+    validated = empty_columns(model)
+    extend_columns(validated, nodes(), model, validate=True)
+
+    assert columns == validated
+    assert to_rows(columns) == [
+        model.from_node(node).model_dump(mode="json") for node in nodes()
+    ]
+
+
+@pytest.mark.parametrize(("model", "nodes"), DATASETS)
+def test_rows_rebuilt_from_columns(model, nodes):
+    """Test that rows turned into columns and back are left unchanged."""
+    rows = list(iter_rows(nodes(), model))
+
+    assert to_rows(columns_from_rows(rows, model)) == rows
+
+
+def test_projection_keeps_the_model_order():
+    """Test that only the requested columns are read, in the model order."""
+    nodes = _issue_nodes()
+    columns = empty_columns(Issues, ["labels", "state", "created_at"])
+    extend_columns(columns, [None, *nodes], Issues)
+
+    assert list(columns) == ["state", "created_at", "labels"]
+    assert len(columns["state"]) == len(nodes)
+    assert node_fields(["comments_count", "state"]) == {"comments", "state"}
+
+
+def test_missing_fields_are_null():
+    """Test that the fields missing from stored rows are read as nulls."""
+    columns = columns_from_rows([{"url": "u"}], Issues, ["url", "title"])
+
+    assert to_rows(columns) == [{"url": "u", "title": None}]
+    assert to_rows(empty_columns(Issues, [])) == []
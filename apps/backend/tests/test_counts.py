@@ -0,0 +1,102 @@
+"""Count queries unit test module."""
+
+from datetime import date
+
+import pytest
+
+from services.github.counts import (
+    MAX_SEARCH_COUNTS,
+    parse_search_counts,
+    search_counts_batch,
+    search_query,
+    split_searches,
+)
+from services.gql.exceptions import GraphQLClientGraphQLMultiError
+
+
+def test_search_query_qualifiers():
+    """Test that states and date ranges become search qualifiers."""
+    assert search_query("o", "r", "issues") == "repo:o/r is:issue"
+    assert (
+        search_query("o", "r", "pull_requests", "closed")
+        == "repo:o/r is:pr is:closed is:unmerged"
+    )
+    assert (
+        search_query(
+            "o",
+            "r",
+            "pull_requests",
+            "merged",
+            "merged",
+            since=date(2024, 1, 1),
+            until=date(2024, 1, 31),
+        )
+        == "repo:o/r is:pr is:merged merged:2024-01-01..2024-01-31"
+    )
+    assert (
+        search_query("o", "r", "issues", None, "created", since=date(2024, 1, 1))
+        == "repo:o/r is:issue created:>=2024-01-01"
+    )
+    assert (
+        search_query("o", "r", "issues", None, "closed", until=date(2024, 1, 1))
+        == "repo:o/r is:issue closed:<=2024-01-01"
+    )
+
+
+@pytest.mark.parametrize(
+    "arguments, message",
+    [
+        ({"dataset": "issues", "state": "merged"}, "no merged issues"),
+        ({"dataset": "issues", "since": date(2024, 1, 1)}, "date_field"),
+        (
+            {"dataset": "issues", "date_field": "merged", "since": date(2024, 1, 1)},
+            "merge date",
+        ),
+    ],
+)
+def test_search_query_errors(arguments, message):
+    """Test that states and dates the dataset does not have are rejected."""
+    with pytest.raises(ValueError, match=message):
+        search_query("o", "r", **arguments)
+
+
+def test_search_counts_batch():
+    """Test that every search is batched and read back by key."""
+    queries = {"open": "repo:o/r is:open", "closed": "repo:o/r is:closed"}
+    batch = search_counts_batch(queries)
+    query, variables = batch.document()
+
+    assert "query Batch($op0__query: String!, $op1__query: String!)" in query
+    assert "op1__search: search(query: $op1__query, type: ISSUE)" in query
+    assert variables == {
+        "op0__query": "repo:o/r is:open",
+        "op1__query": "repo:o/r is:closed",
+    }
+    data = {"op0__search": {"issueCount": 3}, "op1__search": {"issueCount": 5}}
+    assert parse_search_counts(batch.parse(data)) == {"open": 3, "closed": 5}
+
+
+def test_failed_search_is_raised():
+    """Test that a failed search fails the counts."""
+    batch = search_counts_batch({"open": "repo:o/r is:open"})
+    result = batch.parse(
+        {"op0__search": None}, [{"message": "Invalid", "path": ["op0__search"]}]
+    )
+
+    with pytest.raises(GraphQLClientGraphQLMultiError, match="Invalid"):
+        parse_search_counts(result)
+
+
+def test_split_searches():
+    """Test that long series are split into requests of allowed size."""
+    queries = {str(index): f"q{index}" for index in range(2 * MAX_SEARCH_COUNTS + 1)}
+    groups = split_searches(queries)
+
+    assert [len(group) for group in groups] == [
+        MAX_SEARCH_COUNTS,
+        MAX_SEARCH_COUNTS,
+        1,
+    ]
+    assert {key: query for group in groups for key, query in group.items()} == queries
+    with pytest.raises(ValueError):
+        search_counts_batch(queries)
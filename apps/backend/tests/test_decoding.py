@@ -0,0 +1,69 @@
+"""GraphQL response decoding unit test module."""
+
+import json
+
+import httpx
+import pytest
+from pydantic import ValidationError
+
+from benchmarks.decoding import (
+    MODES,
+    _get_data,
+    commits_page,
+    issues_page,
+    pull_requests_page,
+)
+from services.github.decoding import decode
+from services.gql.exceptions import (
+    GraphQLClientGraphQLMultiError,
+    GraphQLClientHttpError,
+)
+from services.gql.get_repo_commits import GetRepoCommits
+from services.gql.get_repo_issues import GetRepoIssues
+from services.gql.get_repo_pull_requests import GetRepoPullRequests
+
+PAGES = [
+    (GetRepoIssues, issues_page),
+    (GetRepoCommits, commits_page),
+    (GetRepoPullRequests, pull_requests_page),
+]
+
+
+def _response(body, status_code=200):
+    return httpx.Response(status_code, content=json.dumps(body).encode())
+
+
+@pytest.mark.parametrize("mode", MODES)
+@pytest.mark.parametrize(("model", "make_page"), PAGES)
+def test_modes_build_the_same_models(model, make_page, mode):
+    """Test that every decoding mode builds the models of `validate`."""
+    response = _response({"data": make_page(0)})
+    expected = decode(response, model, "validate", _get_data)
+    result = decode(response, model, mode, _get_data)
+    assert type(result) is model
+    assert result.model_dump() == expected.model_dump()
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_graphql_errors_are_raised(mode):
+    """Test that a response with GraphQL errors raises the client error."""
+    response = _response(
+        {"data": {"repository": None}, "errors": [{"message": "Not found"}]}
+    )
+    with pytest.raises(GraphQLClientGraphQLMultiError):
+        decode(response, GetRepoIssues, mode, _get_data)
+
+
+@pytest.mark.parametrize("mode", MODES)
+def test_http_errors_are_raised(mode):
+    """Test that an HTTP error raises the client error."""
+    with pytest.raises(GraphQLClientHttpError):
+        decode(_response({}, 502), GetRepoIssues, mode, _get_data)
+
+
+def test_json_mode_validates_like_the_client():
+    """Test that a payload not matching the models fails to validate."""
+    page = issues_page(0)
+    page["repository"]["issues"]["edges"][0]["node"]["state"] = "UNKNOWN"
+    with pytest.raises(ValidationError):
+        decode(_response({"data": page}), GetRepoIssues, "json", _get_data)
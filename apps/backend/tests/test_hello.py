@@ -1,8 +1,10 @@
 """Hello unit test module."""
 
-from src.main import hello
+import asyncio
+
+from src.routes.main import hello
 
 
 def test_hello():
-    """Test the hello function."""
-    assert hello() == "Hello ai"
+    """Test the hello route."""
+    assert asyncio.run(hello()) == {"message": "Hello, World!"}
@@ -0,0 +1,90 @@
+"""Chat history unit test module."""
+
+import json
+
+from langchain_core.messages import AIMessage, HumanMessage
+from pydantic import BaseModel
+
+from services.agents import history
+from services.agents.history import (
+    BoundedHistory,
+    count_tokens,
+    history_message,
+    message_tokens,
+)
+
+
+class _Output(BaseModel):
+    explanation: str
+    data_sample: list[int]
+    error_message: str | None
+
+
+def test_large_fields_are_referenced():
+    """Test that large fields are replaced by their location in the state."""
+    output = _Output(
+        explanation="Short", data_sample=list(range(500)), error_message=None
+    )
+    content = json.loads(history_message("analyst", output).content)
+
+    assert content["explanation"] == "Short"
+    assert content["error_message"] is None
+    assert content["data_sample"].endswith(
+        "tokens in state analyst_output.data_sample>"
+    )
+
+
+def _message(name, words):
+    return AIMessage(id=name, name=name, content=" ".join(["word"] * words))
+
+
+def test_history_keeps_the_request_and_the_newest_messages():
+    """Test that the oldest messages are replaced by a note."""
+    request = HumanMessage(id="request", content="Issues per week")
+    messages = [_message(name, 40) for name in ("planner", "analyst", "developer")]
+    budget = message_tokens(request) + 2 * message_tokens(messages[0])
+    reducer = BoundedHistory(max_tokens=budget)
+
+    state = reducer([request], messages[:2])
+    assert state == [request, *messages[:2]]
+    state = reducer(state, messages[2:])
+
+    assert [message.id for message in state] == [
+        "request",
+        "history-omitted",
+        "analyst",
+        "developer",
+    ]
+    assert "from planner" in state[1].content
+    # The note is carried over and extended, not repeated.
+    state = reducer(state, [_message("supervisor", 40)])
+    assert [message.id for message in state] == [
+        "request",
+        "history-omitted",
+        "developer",
+        "supervisor",
+    ]
+    assert state[1].additional_kwargs["omitted"] == ["planner", "analyst"]
+
+
+def test_special_tokens_are_counted_as_text():
+    """Test that a text holding a special token can be counted."""
+    assert count_tokens("<|endoftext|>") > 0
+
+
+def test_encoding_failure_is_remembered(monkeypatch):
+    """Test that the encoding is not loaded again after it failed."""
+    attempts = []
+
+    def get_encoding(name):
+        attempts.append(name)
+        raise ConnectionError("offline")
+
+    history._encoding.cache_clear()
+    monkeypatch.setattr(history.tiktoken, "get_encoding", get_encoding)
+    try:
+        assert count_tokens("a" * 40) == 11
+        assert count_tokens("a" * 40) == 11
+        assert attempts == ["o200k_base"]
+    finally:
+        history._encoding.cache_clear()
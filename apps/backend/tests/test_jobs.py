@@ -0,0 +1,40 @@
+"""Job queue unit test module."""
+
+import asyncio
+
+from services.jobs import JobQueue, JobStore
+
+
+def test_timed_out_job_is_cancelled(tmp_path):
+    """Test that a timed out job stops running before the next one starts."""
+    events = []
+
+    async def slow():
+        events.append("slow started")
+        try:
+            await asyncio.sleep(10)
+        except asyncio.CancelledError:
+            events.append("slow cancelled")
+            raise
+        return {}
+
+    async def fast():
+        events.append("fast started")
+        return {"ok": True}
+
+    async def main():
+        queue = JobQueue(JobStore(tmp_path / "jobs.db"), 1, 10, timeout=0.1)
+        await queue.start()
+        try:
+            slow_id = await queue.submit({}, slow)
+            fast_id = await queue.submit({}, fast)
+            await queue._queue.join()
+        finally:
+            await queue.stop()
+        return queue.store.get(slow_id), queue.store.get(fast_id)
+
+    slow_job, fast_job = asyncio.run(main())
+
+    assert events == ["slow started", "slow cancelled", "fast started"]
+    assert slow_job["status"] == "failed"
+    assert fast_job["status"] == "succeeded"
@@ -0,0 +1,94 @@
+"""LLM response cache unit test module."""
+
+import json
+import time
+from uuid import uuid4
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration, LLMResult
+
+from services import cache as cache_module
+from services.agents.llm_cache import CACHED, LLMResponseCache
+from services.agents.usage import StageUsage
+from services.cache import MemoryCacheBackend, SQLiteCacheBackend
+
+LLM_STRING = "gpt-4o temperature=0 tools=[create_technical_plan]"
+
+
+def _prompt(text, message_id="1"):
+    return json.dumps([{"type": "human", "data": {"content": text, "id": message_id}}])
+
+
+def _generations(text="A plan"):
+    return [ChatGeneration(message=AIMessage(content=text, id="run-1"))]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def cache(request, tmp_path):
+    backend = (
+        MemoryCacheBackend()
+        if request.param == "memory"
+        else SQLiteCacheBackend(tmp_path / "llm.db")
+    )
+    return LLMResponseCache(backend, ttl=60)
+
+
+def test_round_trip(cache):
+    """Test that a stored response is served back, flagged as cached."""
+    assert cache.lookup(_prompt("Plan a chart"), LLM_STRING) is None
+    cache.update(_prompt("Plan a chart"), LLM_STRING, _generations())
+
+    (generation,) = cache.lookup(_prompt("Plan a chart"), LLM_STRING)
+
+    assert generation.message.content == "A plan"
+    assert generation.message.id is None
+    assert generation.generation_info == {CACHED: True}
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_key_covers_the_prompt_and_the_llm():
+    """Test that the key changes with the prompt or the model parameters only."""
+    key = LLMResponseCache.key(_prompt("Plan a chart"), LLM_STRING)
+
+    assert LLMResponseCache.key(_prompt(" Plan  a\nchart ", "2"), LLM_STRING) == key
+    assert LLMResponseCache.key(_prompt("Plan a table"), LLM_STRING) != key
+    assert LLMResponseCache.key(_prompt("Plan a chart"), LLM_STRING + " v2") != key
+
+
+def test_other_llm_misses(cache):
+    """Test that a response is not served to another model or tool schema."""
+    cache.update(_prompt("Plan a chart"), LLM_STRING, _generations())
+
+    assert cache.lookup(_prompt("Plan a chart"), "gpt-4o-mini") is None
+
+
+def test_expired_response_misses(cache, monkeypatch):
+    """Test that a response is no longer served after its TTL."""
+    cache.update(_prompt("Plan a chart"), LLM_STRING, _generations())
+    now = time.time()
+    monkeypatch.setattr(cache_module.time, "time", lambda: now + 61)
+
+    assert cache.lookup(_prompt("Plan a chart"), LLM_STRING) is None
+
+
+def test_hits_stay_out_of_the_usage(cache):
+    """Test that the responses served from the cache count no tokens."""
+    cache.update(_prompt("Plan a chart"), LLM_STRING, _generations())
+    usage = StageUsage()
+    run_id = uuid4()
+    usage.on_chat_model_start(
+        {}, [], run_id=run_id, metadata={"langgraph_node": "planner"}
+    )
+    usage.on_llm_end(
+        LLMResult(
+            generations=[cache.lookup(_prompt("Plan a chart"), LLM_STRING)],
+            llm_output={"token_usage": {"prompt_tokens": 100}},
+        ),
+        run_id=run_id,
+    )
+
+    stats = usage.stats()["planner"]
+    assert stats["calls"] == 0
+    assert stats["cached_calls"] == 1
+    assert stats["prompt_tokens"] == 0
@@ -0,0 +1,85 @@
+"""Paginated GitHub fetches unit test module."""
+
+import asyncio
+import json
+
+import httpx
+
+from benchmarks.decoding import issues_page
+from services.agents import tools
+from services.agents.tools import GITHUB_CLIENT, GetRepoIssuesTools
+from services.github.client import AsyncGitHubClient
+
+
+def _client(pages, requests):
+    """GitHub client serving `pages` pages of issues, recording the requests."""
+
+    def respond(request):
+        variables = json.loads(request.content)["variables"]
+        requests.append(variables)
+        after = variables.get("after")
+        page = 0 if after is None else int(after.removeprefix("cursor-")) + 1
+        data = issues_page(page)
+        issues = data["repository"]["issues"]
+        issues["edges"] = issues["edges"][: variables["first"]]
+        issues["pageInfo"]["hasNextPage"] = page + 1 < pages
+        return httpx.Response(200, json={"data": data})
+
+    return AsyncGitHubClient(
+        url="https://api.github.com/graphql",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(respond)),
+    )
+
+
+def _fetch(client, page_size, max_items):
+    async def fetch():
+        return [
+            len(page.edges)
+            async for page in client.iter_repo_issues(
+                owner="o", name="r", page_size=page_size, max_items=max_items
+            )
+        ]
+
+    return asyncio.run(fetch())
+
+
+def test_pages_follow_the_cursor_up_to_the_cap():
+    """Test that pages are requested after the previous cursor, up to the cap."""
+    requests = []
+
+    assert _fetch(_client(10, requests), page_size=2, max_items=5) == [2, 2, 1]
+    assert [(request["first"], request["after"]) for request in requests] == [
+        (2, None),
+        (2, "cursor-0"),
+        (1, "cursor-1"),
+    ]
+
+
+def test_pages_stop_at_the_last_page():
+    """Test that no page is requested after the one without a next page."""
+    requests = []
+
+    assert _fetch(_client(3, requests), page_size=2, max_items=None) == [2, 2, 2]
+    assert len(requests) == 3
+
+
+def test_tool_builds_its_columns_page_by_page(monkeypatch):
+    """Test that each page is added to the columns before the next is fetched."""
+    requests = []
+    extended = []
+
+    def extend_columns(columns, nodes, model, validate=False):
+        extended.append(len(requests))
+        original(columns, nodes, model, validate)
+
+    original = tools.extend_columns
+    monkeypatch.setattr(tools, "extend_columns", extend_columns)
+    columns = asyncio.run(
+        GetRepoIssuesTools(page_size=2).ainvoke(
+            {"owner": "o", "name": "r", "states": []},
+            config={"configurable": {GITHUB_CLIENT: _client(3, requests)}},
+        )
+    )
+
+    assert extended == [1, 2, 3]
+    assert len(columns["url"]) == len(set(columns["url"])) == 6
@@ -0,0 +1,132 @@
+"""Plan cache unit test module."""
+
+import pytest
+from langchain_core.utils.function_calling import convert_to_openai_tool
+
+from services.agents.plan_cache import HashingEmbedder, PlanCache, key_terms
+from services.agents.types import PlannerOutput
+
+PLAN = {"requirements": ["A chart"]}
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return PlanCache(tmp_path / "plans.sqlite3", HashingEmbedder())
+
+
+@pytest.mark.parametrize(
+    "cached, message",
+    [
+        ("PRs merged per month", "monthly merged pull requests"),
+        ("PRs merged per month", "Show the number of pull requests merged each month"),
+        ("open vs closed issues", "Number of open and closed issues"),
+        ("issues opened per week", "weekly opened issues"),
+        ("Top 10 contributors by commits", "top 10 commit authors"),
+    ],
+)
+def test_rephrased_request_reuses_the_plan(cache, cached, message):
+    """Test that the same chart asked in other words reuses its plan."""
+    cache.add("Owner", "Repo", cached, PLAN)
+
+    assert cache.lookup("owner", "repo", message) == PLAN
+    assert cache.lookup("owner", "other", message) is None
+
+
+@pytest.mark.parametrize(
+    "cached, message",
+    [
+        # Time scope.
+        ("PRs merged last month", "PRs merged per month"),
+        ("Issues opened this year", "Issues opened last year"),
+        # Negation.
+        ("open issues with labels", "open issues without labels"),
+        ("merged pull requests", "unmerged pull requests"),
+        # Ranking.
+        ("largest PRs by additions", "smallest PRs by additions"),
+        # Datasets, states and numbers.
+        ("PRs merged per month", "PRs opened per month"),
+        ("Top 10 contributors", "Top 5 contributors"),
+    ],
+)
+def test_near_miss_does_not_reuse_the_plan(cache, cached, message):
+    """Test that similar requests for another chart do not reuse its plan."""
+    cache.add("owner", "repo", cached, PLAN)
+
+    assert key_terms(cached) != key_terms(message)
+    assert cache.lookup("owner", "repo", message) is None
+    assert cache.stats() == {"hits": 0, "misses": 1, "hit_rate": 0.0}
+
+
+def test_expired_plan_is_not_reused(tmp_path):
+    """Test that a plan is only reused within its time to live."""
+    cache = PlanCache(tmp_path / "plans.sqlite3", HashingEmbedder(), ttl=0)
+    cache.add("owner", "repo", "PRs merged per month", PLAN)
+
+    assert cache.lookup("owner", "repo", "PRs merged per month") is None
+
+
+def test_least_recently_used_plans_are_evicted(tmp_path):
+    """Test that only the most recently used plans are kept."""
+    cache = PlanCache(tmp_path / "plans.sqlite3", HashingEmbedder(), max_entries=1)
+    cache.add("owner", "repo", "issues opened per week", PLAN)
+    cache.add("owner", "repo", "PRs merged per month", PLAN)
+
+    assert cache.lookup("owner", "repo", "issues opened per week") is None
+    assert cache.lookup("owner", "repo", "PRs merged per month") == PLAN
+
+
+def test_plans_cached_before_bins_validate(cache):
+    """Test that the aggregation of an older plan gets no bins."""
+    aggregation = {
+        "dataset": "issues",
+        "group_by": ["state"],
+        "time_column": None,
+        "time_bucket": None,
+        "timezone": None,
+        "fill_gaps": False,
+        "rolling_window": None,
+        "cumulative": False,
+        "metric": "count",
+        "value_column": None,
+        "percentile": None,
+        "pivot": False,
+    }
+    plan = {
+        "requirements": ["A pie chart"],
+        "acceptance_criteria": [],
+        "technical_specs": {
+            "chart_type": "pie",
+            "data_format": "rows",
+            "technical_constraints": [],
+            "aggregation": aggregation,
+        },
+        "error_message": None,
+    }
+    cache.add("owner", "repo", "open vs closed issues", plan)
+
+    cached = PlannerOutput.model_validate(
+        cache.lookup("owner", "repo", "open vs closed issues")
+    )
+    assert cached.technical_specs.aggregation.bins is None
+
+
+def _objects(schema):
+    """Every object schema nested in a JSON schema."""
+    if isinstance(schema, dict):
+        if "properties" in schema:
+            yield schema
+        for value in schema.values():
+            yield from _objects(value)
+    elif isinstance(schema, list):
+        for value in schema:
+            yield from _objects(value)
+
+
+def test_planner_tool_schema_is_strict():
+    """Test that every field of the plan is required, as strict tools need."""
+    tool = convert_to_openai_tool(PlannerOutput, strict=True)
+    objects = list(_objects(tool["function"]["parameters"]))
+
+    assert any("bins" in schema["properties"] for schema in objects)
+    for schema in objects:
+        assert set(schema["required"]) == set(schema["properties"])
@@ -0,0 +1,96 @@
+"""Chart data profiling unit test module."""
+
+import pandas as pd
+import pytest
+
+from services.agents.profiling import (
+    MAX_TEXT_LENGTH,
+    describe,
+    profile_column,
+    stratified_sample,
+)
+
+
+def _frame(states):
+    return pd.DataFrame({"state": states}, dtype=object)
+
+
+def test_quotas_are_shared_round_robin():
+    """Test that the sample is shared evenly, the largest strata first."""
+    frame = _frame(["open"] * 5 + ["closed"] * 3 + ["draft"])
+
+    positions = stratified_sample(frame, "state", 6)
+
+    assert [frame["state"][position] for position in positions].count("open") == 3
+    assert positions == [0, 2, 4, 5, 7, 8]
+
+
+def test_small_strata_leave_their_quota_to_the_others():
+    """Test that the rows a stratum lacks are sampled from the other strata."""
+    frame = _frame(["open"] * 8 + ["closed"])
+
+    positions = stratified_sample(frame, "state", 4)
+
+    assert positions == [0, 4, 7, 8]
+
+
+def test_missing_values_are_a_stratum():
+    """Test that the rows without a value are sampled like a category."""
+    frame = _frame(["open"] * 4 + [None] * 2)
+
+    positions = stratified_sample(frame, "state", 2)
+
+    assert positions == [0, 4]
+
+
+@pytest.mark.parametrize("column", ["state", None])
+def test_sample_of_small_and_empty_datasets(column):
+    """Test that every row is sampled when there are fewer than the size."""
+    assert stratified_sample(_frame(["open", "closed"]), column, 6) == [0, 1]
+    assert stratified_sample(_frame([]), column, 6) == []
+
+
+def test_even_sample_keeps_the_first_and_last_rows():
+    """Test that rows are spread over the dataset without a strata column."""
+    assert stratified_sample(_frame(["open"] * 10), None, 3) == [0, 4, 9]
+
+
+def test_profile_column():
+    """Test the profile of dates, numbers, categories and lists."""
+    dates = pd.Series(["2024-02-01T00:00:00Z", None, "2024-01-01T00:00:00Z"])
+    assert profile_column(dates) == {
+        "type": "datetime",
+        "nullable": True,
+        "nulls": 1,
+        "distinct": 2,
+        "min": "2024-01-01T00:00:00Z",
+        "max": "2024-02-01T00:00:00Z",
+    }
+    assert profile_column(pd.Series([1, 2.5, 3], dtype=object))["mean"] == 2.17
+    assert profile_column(pd.Series(["a", "b", "a"]))["top"] == {"a": 2, "b": 1}
+    labels = profile_column(pd.Series([["bug", "ui"], ["bug"], []], dtype=object))
+    assert labels["max_items"] == 2
+    assert labels["top"] == {"bug": 2, "ui": 1}
+
+
+def test_describe():
+    """Test that the sample is stratified on a category and compacted."""
+    rows = [
+        {"state": "OPEN" if index % 3 else "CLOSED", "title": "x" * 200}
+        for index in range(30)
+    ]
+
+    sample, description = describe(rows)
+
+    assert description["sample"] == "6 of 30 rows, stratified by state"
+    assert description["total_records"] == 30
+    assert [row["state"] for row in sample].count("CLOSED") == 3
+    assert all(len(row["title"]) == MAX_TEXT_LENGTH for row in sample)
+
+
+def test_describe_without_rows():
+    """Test that an empty dataset has an empty sample."""
+    assert describe([]) == (
+        [],
+        {"total_records": 0, "columns": {}, "sample": "0 of 0 rows, evenly spaced"},
+    )
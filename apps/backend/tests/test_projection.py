@@ -0,0 +1,71 @@
+"""Query projection unit test module."""
+
+import re
+
+import pytest
+
+from services.github.batch import record_operation
+from services.github.projection import PROJECTIONS, project_operation
+
+_TOKEN = re.compile(r"\.\.\.|[$_0-9A-Za-z]+|[^\s,]")
+
+
+def _closing(tokens, start):
+    """Position of the brace closing the one at `start`."""
+    depth = 0
+    for position in range(start, len(tokens)):
+        depth += {"{": 1, "}": -1}.get(tokens[position], 0)
+        if depth == 0:
+            return position
+    raise ValueError("Unbalanced braces")
+
+
+def _tokens(query):
+    """
+    Tokenize a query, without its commas and the inline fragments that are the
+    whole selection of a field, e.g. `nodes { ... on PullRequest { ... } }`.
+    """
+    tokens = _TOKEN.findall(query)
+    position = 0
+    while position < len(tokens) - 4:
+        if tokens[position : position + 3] == ["{", "...", "on"] and (
+            tokens[position + 4] == "{"
+        ):
+            end = _closing(tokens, position + 4)
+            if tokens[end + 1] == "}":
+                del tokens[end]
+                del tokens[position + 1 : position + 5]
+                continue
+        position += 1
+    return tokens
+
+
+@pytest.mark.parametrize("method", sorted(PROJECTIONS))
+def test_full_projection_matches_the_generated_query(method):
+    """Test that selecting every field sends the query of `Github.graphql`."""
+    projection = PROJECTIONS[method]
+    generated = record_operation(method, owner="o", name="r")
+    projected, _ = project_operation(method, projection.selections, owner="o", name="r")
+
+    assert _tokens(
+        projected.query.replace(projection.operation_name, generated.operation_name)
+    ) == _tokens(generated.query)
+    assert projected.variables == generated.variables
+
+
+def test_projection_selects_the_required_fields():
+    """Test that the fields the pagination needs are always selected."""
+    operation, cost = project_operation(
+        "get_repo_issues", ["created_at"], owner="o", name="r"
+    )
+
+    node = operation.query[operation.query.rindex("node {") :]
+    assert _tokens(node) == _tokens("node { url state createdAt updatedAt } } } } }")
+    assert "labels" not in operation.query
+    assert cost == 1
+
+
+def test_unknown_field():
+    """Test that fields outside of the item model are rejected."""
+    with pytest.raises(ValueError, match="Unknown fields"):
+        project_operation("get_repo_issues", ["body"], owner="o", name="r")
@@ -0,0 +1,88 @@
+"""Rate limiter unit test module."""
+
+import asyncio
+from datetime import UTC, datetime, timedelta
+from email.utils import format_datetime
+from types import SimpleNamespace
+
+import httpx
+
+from services.github.rate_limit import RateLimitBudget, RateLimiter
+from src.routes.main import rate_limits
+
+
+def _response(headers):
+    return httpx.Response(429, headers=headers)
+
+
+def test_retry_after_in_seconds():
+    """Test that a Retry-After in seconds is waited for."""
+    limiter = RateLimiter(backoff_max=60)
+    delay = limiter._retry_delay(RateLimitBudget(), _response({"retry-after": "7"}), 0)
+    assert delay == 7
+
+
+def test_retry_after_as_http_date():
+    """Test that a Retry-After date is read as the seconds until then."""
+    limiter = RateLimiter(backoff_max=60)
+    retry_at = format_datetime(datetime.now(UTC) + timedelta(seconds=30), usegmt=True)
+    delay = limiter._retry_delay(
+        RateLimitBudget(), _response({"retry-after": retry_at}), 0
+    )
+    assert 25 <= delay <= 30
+
+
+def test_retry_delay_is_capped():
+    """Test that no retry waits longer than the maximum backoff."""
+    limiter = RateLimiter(backoff_max=60)
+    assert (
+        limiter._retry_delay(RateLimitBudget(), _response({"retry-after": "3600"}), 0)
+        == 60
+    )
+    budget = RateLimitBudget(
+        remaining=0, reset_at=datetime.now(UTC) + timedelta(hours=1)
+    )
+    assert limiter._retry_delay(budget, _response({}), 0) == 60
+
+
+def test_invalid_retry_after_backs_off():
+    """Test that an unreadable Retry-After falls back to the backoff."""
+    limiter = RateLimiter(backoff_base=1, backoff_max=60)
+    delay = limiter._retry_delay(
+        RateLimitBudget(), _response({"retry-after": "soon"}), 2
+    )
+    assert 0 <= delay <= 4
+
+
+def test_least_recently_used_idle_budgets_are_evicted():
+    """Test that the budgets are bounded, keeping those in use."""
+    limiter = RateLimiter(max_tokens=2)
+
+    def tracked():
+        keys = {limiter.token_key(token): token for token in "abcd"}
+        return [keys[key] for key in limiter._budgets]
+
+    limiter.budget("a")
+    limiter.budget("b")
+    limiter.budget("a")
+    limiter.budget("c")
+    assert tracked() == ["a", "c"]
+
+    limiter.budget("a").in_flight = 1
+    limiter.budget("c")
+    limiter.budget("d")
+    assert tracked() == ["a", "d"]
+
+
+def test_rate_limits_route_only_shows_the_callers_budget():
+    """Test that the route answers with the budget of the caller's token."""
+    limiter = RateLimiter()
+    limiter.budget("mine").remaining = 10
+    limiter.budget("theirs").remaining = 20
+    request = SimpleNamespace(
+        app=SimpleNamespace(state=SimpleNamespace(rate_limiter=limiter))
+    )
+
+    assert asyncio.run(rate_limits(request, "mine"))["remaining"] == 10
+    assert asyncio.run(rate_limits(request, "unknown"))["remaining"] is None
+    assert len(limiter._budgets) == 2
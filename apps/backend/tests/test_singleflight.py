@@ -0,0 +1,94 @@
+"""Single flight unit test module."""
+
+import asyncio
+import time
+
+from services.singleflight import SingleFlight, SQLiteLock
+
+
+def test_concurrent_runs_share_one_execution():
+    """Test that concurrent runs of a key call the function once."""
+    single_flight = SingleFlight()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "chart"
+
+    async def main():
+        return await asyncio.gather(
+            *(single_flight.run("key", compute) for _ in range(5))
+        )
+
+    results = asyncio.run(main())
+
+    assert len(calls) == 1
+    assert [result for result, _ in results] == ["chart"] * 5
+    assert [shared for _, shared in results] == [False, True, True, True, True]
+    assert single_flight._in_flight == {}
+
+
+def test_different_keys_run_separately():
+    """Test that the runs of different keys, e.g. tokens, are not merged."""
+    single_flight = SingleFlight()
+
+    async def main():
+        return await asyncio.gather(
+            single_flight.run("token-a", lambda: asyncio.sleep(0.01, "a")),
+            single_flight.run("token-b", lambda: asyncio.sleep(0.01, "b")),
+        )
+
+    assert asyncio.run(main()) == [("a", False), ("b", False)]
+
+
+def test_cancelled_follower_does_not_cancel_the_leader():
+    """Test that a waiter going away leaves the execution running."""
+    single_flight = SingleFlight()
+
+    async def main():
+        done = asyncio.Event()
+
+        async def compute():
+            await asyncio.sleep(0.05)
+            done.set()
+            return "chart"
+
+        leader = asyncio.create_task(single_flight.run("key", compute))
+        follower = asyncio.create_task(single_flight.run("key", compute))
+        await asyncio.sleep(0.01)
+        follower.cancel()
+        await asyncio.gather(follower, return_exceptions=True)
+        return follower.cancelled(), await leader, done.is_set()
+
+    assert asyncio.run(main()) == (True, ("chart", False), True)
+
+
+def test_lock_is_exclusive_until_released(tmp_path):
+    """Test that a held lock is only taken again once its holder releases it."""
+    first = SQLiteLock(tmp_path / "locks.db", lease=60)
+    second = SQLiteLock(tmp_path / "locks.db", lease=60)
+
+    assert first.try_acquire("key")
+    assert not second.try_acquire("key")
+    assert second.try_acquire("other")
+    second.release("key")
+    assert not second.try_acquire("key")
+    first.release("key")
+    assert second.try_acquire("key")
+
+
+def test_abandoned_lock_expires(tmp_path):
+    """Test that a lock whose holder never releases it is taken after its lease."""
+    abandoned = SQLiteLock(tmp_path / "locks.db", lease=0.1)
+    waiter = SQLiteLock(tmp_path / "locks.db", lease=60, poll_interval=0.02)
+    assert abandoned.try_acquire("key")
+
+    async def main():
+        start = time.monotonic()
+        async with waiter.hold("key"):
+            return time.monotonic() - start, abandoned.try_acquire("key")
+
+    waited, taken_back = asyncio.run(main())
+    assert waited >= 0.05
+    assert not taken_back
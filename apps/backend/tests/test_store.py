@@ -0,0 +1,192 @@
+"""Repository store unit test module."""
+
+import asyncio
+from datetime import timedelta
+
+import httpx
+import pytest
+
+from benchmarks.decoding import issues_page
+from services.agents.store import RepoStore, _sync
+from services.agents.tools import GITHUB_CLIENT, GetRepoIssuesTools
+from services.github.client import AsyncGitHubClient
+from services.gql.exceptions import GraphQLClientGraphQLMultiError
+
+
+def _pages(rows, page_size=2):
+    """Iterate over rows in pages like the GitHub client, recording the limit."""
+    limits = []
+
+    def iter_pages(limit):
+        limits.append(limit)
+
+        async def pages():
+            selected = rows if limit is None else rows[:limit]
+            for start in range(0, len(selected), page_size):
+                yield selected[start : start + page_size]
+
+        return pages()
+
+    return iter_pages, limits
+
+
+def _issue(number, updated_at):
+    return {"url": f"https://github.com/o/r/issues/{number}", "updated_at": updated_at}
+
+
+def _commit(oid, committed_date):
+    return {"oid": oid, "committed_date": committed_date}
+
+
+def _sync_issues(store, rows, max_items):
+    iter_pages, limits = _pages(rows)
+    asyncio.run(
+        _sync(
+            store,
+            "o",
+            "r",
+            "issues",
+            iter_pages,
+            lambda page: page,
+            key="url",
+            sort_key="updated_at",
+            max_items=max_items,
+        )
+    )
+    return limits
+
+
+def _sync_commits(store, rows, max_items):
+    iter_pages, limits = _pages(rows)
+    asyncio.run(
+        _sync(
+            store,
+            "o",
+            "r",
+            "commits",
+            iter_pages,
+            lambda page: page,
+            key="oid",
+            sort_key="committed_date",
+            max_items=max_items,
+            mark_on_key=True,
+        )
+    )
+    return limits
+
+
+def test_first_sync_is_limited(tmp_path):
+    """Test that the first sync stores the newest items and marks the newest."""
+    store = RepoStore(tmp_path / "store.db")
+    rows = [_issue(number, f"2024-01-0{9 - number}") for number in range(5)]
+
+    assert _sync_issues(store, rows, max_items=3) == [3]
+    assert store.high_water_mark("o", "r", "issues") == "2024-01-09"
+    assert [row["url"] for row in store.load_rows("o", "r", "issues")] == [
+        row["url"] for row in rows[:3]
+    ]
+
+
+def test_sync_walks_down_to_the_mark(tmp_path):
+    """Test that more changed items than the limit are all synced."""
+    store = RepoStore(tmp_path / "store.db")
+    _sync_issues(store, [_issue(0, "2024-01-01")], max_items=2)
+
+    changed = [_issue(number, f"2024-02-0{9 - number}") for number in range(1, 6)]
+    assert _sync_issues(store, [*changed, _issue(0, "2024-01-01")], max_items=2) == [
+        None
+    ]
+    assert store.high_water_mark("o", "r", "issues") == "2024-02-08"
+    assert len(store.load_rows("o", "r", "issues")) == 6
+
+
+def test_sync_without_changes_keeps_the_mark(tmp_path):
+    """Test that a sync without newer items keeps the high-water mark."""
+    store = RepoStore(tmp_path / "store.db")
+    _sync_issues(store, [_issue(0, "2024-01-02")], max_items=None)
+    _sync_issues(store, [_issue(1, "2024-01-01")], max_items=None)
+
+    assert store.high_water_mark("o", "r", "issues") == "2024-01-02"
+    assert len(store.load_rows("o", "r", "issues")) == 1
+
+
+def test_commits_are_walked_down_to_the_last_head(tmp_path):
+    """Test that commits merged from an older branch are synced."""
+    store = RepoStore(tmp_path / "store.db")
+    _sync_commits(store, [_commit("b", "2024-01-02"), _commit("a", "2024-01-01")], 10)
+    assert store.high_water_mark("o", "r", "commits") == "b"
+
+    # The merged branch was committed before the last head.
+    history = [
+        _commit("merge", "2024-01-05"),
+        _commit("branch-2", "2023-12-31"),
+        _commit("branch-1", "2023-12-30"),
+        _commit("b", "2024-01-02"),
+        _commit("a", "2024-01-01"),
+    ]
+    _sync_commits(store, history, 10)
+
+    assert store.high_water_mark("o", "r", "commits") == "merge"
+    assert {row["oid"] for row in store.load_rows("o", "r", "commits")} == {
+        "merge",
+        "branch-2",
+        "branch-1",
+        "b",
+        "a",
+    }
+
+
+def _github(token, pages):
+    """GitHub client whose token can read the repository if `pages` is set."""
+
+    def respond(request):
+        if pages is None:
+            return httpx.Response(
+                200,
+                json={
+                    "data": {"repository": None},
+                    "errors": [
+                        {
+                            "type": "NOT_FOUND",
+                            "path": ["repository"],
+                            "message": "Could not resolve to a Repository",
+                        }
+                    ],
+                },
+            )
+        pages.append(request)
+        page = issues_page(0)
+        page["repository"]["issues"]["pageInfo"]["hasNextPage"] = False
+        return httpx.Response(200, json={"data": page})
+
+    return AsyncGitHubClient(
+        url="https://api.github.com/graphql",
+        headers={"Authorization": f"Bearer {token}"},
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(respond)),
+    )
+
+
+def _load_issues(tool, client):
+    return asyncio.run(
+        tool.ainvoke(
+            {"owner": "o", "name": "r", "states": []},
+            config={"configurable": {GITHUB_CLIENT: client}},
+        )
+    )
+
+
+def test_fresh_rows_are_only_served_to_tokens_that_read_the_repo(tmp_path):
+    """Test that a token that cannot read a private repository gets no rows."""
+    store = RepoStore(tmp_path / "store.db", sync_interval=timedelta(hours=1))
+    tool = GetRepoIssuesTools(store=store)
+    requests = []
+
+    assert len(_load_issues(tool, _github("reader", requests))["url"]) == 100
+    assert len(_load_issues(tool, _github("reader", requests))["url"]) == 100
+    assert len(requests) == 1
+
+    with pytest.raises(GraphQLClientGraphQLMultiError):
+        _load_issues(tool, _github("stranger", None))
+    # The reader is still served from the store.
+    assert len(_load_issues(tool, _github("reader", requests))["url"]) == 100
+    assert len(requests) == 1
@@ -0,0 +1,108 @@
+"""Supervisor unit test module."""
+
+import asyncio
+from types import SimpleNamespace
+
+from langchain_openai import AzureChatOpenAI
+
+from services.agents.graph import create_agent_graph
+from services.agents.supervisor import SUPERVISOR_SYSTEM_MESSAGE, SupervisorAgent
+
+TEAM = ["planner", "analyst", "developer"]
+
+
+class _Supervisor(SupervisorAgent):
+    """A supervisor whose LLM always selects the same worker."""
+
+    def __init__(self, choice="planner"):
+        super().__init__(
+            llm=AzureChatOpenAI(
+                api_version="2024-06-01",
+                azure_endpoint="https://example.invalid",
+                model="gpt-4o-mini",
+                api_key="key",
+            ),
+            tools=[],
+            system_message=SUPERVISOR_SYSTEM_MESSAGE,
+            team_members=TEAM,
+        )
+        self.choice = choice
+        self.calls = 0
+
+    async def execute(self, context):
+        self.calls += 1
+        return {"next": self.choice}
+
+
+def _output(error_message=None):
+    return SimpleNamespace(error_message=error_message)
+
+
+def test_workers_run_in_order():
+    """Test that each worker runs until its output is set, then the run ends."""
+    supervisor = _Supervisor()
+    context = {}
+    for member in [*TEAM, "FINISH"]:
+        assert asyncio.run(supervisor.route(context)) == {"next": member}
+        context[f"{member}_output"] = _output()
+    assert supervisor.calls == 0
+
+
+def test_error_asks_the_llm_and_reruns_the_later_workers():
+    """Test that an error reruns the selected worker and the ones after it."""
+    supervisor = _Supervisor("analyst")
+    context = {
+        "planner_output": _output(),
+        "analyst_output": _output(),
+        "developer_output": _output("No data"),
+    }
+
+    assert asyncio.run(supervisor.route(context)) == {
+        "next": "analyst",
+        "analyst_output": None,
+        "developer_output": None,
+        "retried": ["developer"],
+    }
+    assert supervisor.calls == 1
+
+
+def test_repeated_error_finishes():
+    """Test that a worker failing again after its retry ends the run."""
+    supervisor = _Supervisor()
+    context = {
+        "planner_output": _output(),
+        "analyst_output": _output("No data"),
+        "retried": ["analyst"],
+    }
+
+    assert asyncio.run(supervisor.route(context)) == {
+        "next": "FINISH",
+        "error_message": "No data",
+    }
+    assert supervisor.calls == 0
+
+
+def test_failing_worker_terminates():
+    """Test that a graph whose worker always fails stops after one retry."""
+    supervisor = _Supervisor("developer")
+    runs = []
+
+    def worker(name, error_message=None):
+        async def execute(context):
+            runs.append(name)
+            return {f"{name}_output": _output(error_message)}
+
+        return SimpleNamespace(execute=execute)
+
+    graph = create_agent_graph(
+        supervisor,
+        worker("planner"),
+        worker("analyst"),
+        worker("developer", "Cannot chart"),
+        routing="rules",
+    )
+    final = asyncio.run(graph.ainvoke({"message": "m", "owner": "o", "repo": "r"}))
+
+    assert runs == ["planner", "analyst", "developer", "developer"]
+    assert final["error_message"] == "Cannot chart"
+    assert supervisor.calls == 1
@@ -0,0 +1,87 @@
+"""Chart templates unit test module."""
+
+import pytest
+
+from services.agents.templates import render, select_template
+from services.agents.types import Aggregation
+
+
+def _aggregation(**fields):
+    return Aggregation(
+        **{
+            "dataset": "pull_requests",
+            "group_by": ["state"],
+            "bins": None,
+            "time_column": None,
+            "time_bucket": None,
+            "timezone": None,
+            "fill_gaps": False,
+            "rolling_window": None,
+            "cumulative": False,
+            "metric": "count",
+            "value_column": None,
+            "percentile": None,
+            "pivot": False,
+            **fields,
+        }
+    )
+
+
+@pytest.mark.parametrize(
+    "chart_type, kind",
+    [
+        ("Bar chart showing the timeline", "bar"),
+        ("Bar chart of the time series", "bar"),
+        ("Line chart", "line"),
+        ("Time series", "line"),
+        ("Pie chart of the state distribution", "pie"),
+        ("Doughnut", "pie"),
+        ("Column chart", "bar"),
+        ("Scatter plot", None),
+        ("Barometer", None),
+    ],
+)
+def test_chart_type_words(chart_type, kind):
+    """Test that chart types are matched on whole words, chart names first."""
+    template = select_template(chart_type, _aggregation())
+    assert (template.kind if template else None) == kind
+
+
+def test_stacked_bars_need_pivoted_data():
+    """Test that stacked bars of unpivoted data are plain bars."""
+    pivoted = _aggregation(group_by=["author", "state"], pivot=True)
+    assert select_template("Stacked bar chart", pivoted).kind == "stacked_bar"
+    assert select_template("Stacked bar chart", _aggregation()).kind == "bar"
+
+
+def test_histogram_needs_binned_data():
+    """Test that a bar per distinct value is not drawn as a histogram."""
+    aggregation = _aggregation(group_by=["additions"])
+    assert select_template("Histogram", aggregation) is None
+    assert select_template("Distribution of additions", aggregation) is None
+
+    template = select_template(
+        "Histogram", _aggregation(group_by=["additions"], bins=10)
+    )
+    assert template.kind == "histogram"
+    assert template.x_key == "additions"
+
+
+def test_time_series_labels():
+    """Test that the axes are labelled from the aggregation."""
+    template = select_template(
+        "Line chart",
+        _aggregation(
+            group_by=[],
+            time_column="merged_at",
+            time_bucket="month",
+            cumulative=True,
+        ),
+    )
+
+    assert template.x_key == "merged_at"
+    assert template.x_label == "Merged at (month)"
+    assert template.y_label == "Cumulative number of pull requests"
+    code = render(template, "/charts/o/r/data.json")
+    assert 'const DATA_ROUTE = "/charts/o/r/data.json";' in code
+    assert "<LineChart" in code
@@ -0,0 +1,84 @@
+"""Time-series helpers unit test module."""
+
+from datetime import date
+
+import pandas as pd
+import pytest
+
+from services.agents.timeseries import accumulate, bucket, bucket_bounds, fill_gaps
+
+TIMESTAMPS = pd.Series(
+    ["2024-03-31T22:30:00Z", "2024-04-01T08:00:00+02:00", "2024-04-07T23:59:00", None]
+)
+
+
+def test_daily_buckets_in_utc():
+    """Test that naive timestamps are read as UTC."""
+    assert bucket(TIMESTAMPS, "day").tolist()[:3] == [
+        pd.Timestamp("2024-03-31"),
+        pd.Timestamp("2024-04-01"),
+        pd.Timestamp("2024-04-07"),
+    ]
+    assert pd.isna(bucket(TIMESTAMPS, "day").iloc[3])
+
+
+def test_buckets_follow_the_time_zone():
+    """Test that days and months start at local midnight."""
+    assert bucket(TIMESTAMPS, "day", "Europe/Paris").tolist()[:3] == [
+        pd.Timestamp("2024-04-01"),
+        pd.Timestamp("2024-04-01"),
+        pd.Timestamp("2024-04-08"),
+    ]
+    assert bucket(TIMESTAMPS, "month", "Europe/Paris").tolist()[0] == pd.Timestamp(
+        "2024-04-01"
+    )
+    assert bucket(TIMESTAMPS, "day", "America/New_York").tolist()[0] == pd.Timestamp(
+        "2024-03-31"
+    )
+
+
+def test_weeks_start_on_monday():
+    """Test that weekly buckets start on Monday."""
+    assert bucket(TIMESTAMPS, "week").tolist()[:3] == [
+        pd.Timestamp("2024-03-25"),
+        pd.Timestamp("2024-04-01"),
+        pd.Timestamp("2024-04-01"),
+    ]
+
+
+@pytest.mark.parametrize("timezone", ["CET+1", "Not/AZone", ""])
+def test_unknown_time_zone(timezone):
+    """Test that an unknown time zone is reported as a ValueError."""
+    with pytest.raises(ValueError, match="Unknown time zone"):
+        bucket(TIMESTAMPS, "day", timezone)
+
+
+def test_bucket_bounds():
+    """Test that the first and last buckets are cut to the range."""
+    assert bucket_bounds(date(2024, 1, 15), date(2024, 3, 10), "month") == [
+        (date(2024, 1, 1), date(2024, 1, 15), date(2024, 1, 31)),
+        (date(2024, 2, 1), date(2024, 2, 1), date(2024, 2, 29)),
+        (date(2024, 3, 1), date(2024, 3, 1), date(2024, 3, 10)),
+    ]
+
+
+def test_fill_gaps_per_group():
+    """Test that every group gets every bucket."""
+    series = pd.Series(
+        [1, 2],
+        index=pd.MultiIndex.from_tuples(
+            [(pd.Timestamp("2024-01-01"), "a"), (pd.Timestamp("2024-01-03"), "b")]
+        ),
+    )
+    filled = fill_gaps(series, "day")
+    assert len(filled) == 6
+    assert filled[(pd.Timestamp("2024-01-02"), "a")] == 0
+
+
+def test_rolling_and_cumulative():
+    """Test the rolling average and the running total."""
+    series = pd.Series(
+        [1.0, 2.0, 3.0], index=pd.date_range("2024-01-01", periods=3, freq="D")
+    )
+    assert accumulate(series, rolling_window=2).tolist() == [1.0, 1.5, 2.5]
+    assert accumulate(series, cumulative=True).tolist() == [1.0, 3.0, 6.0]
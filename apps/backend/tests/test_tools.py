@@ -0,0 +1,146 @@
+"""Agent tools unit test module."""
+
+import asyncio
+import json
+
+import httpx
+import pytest
+from langchain_core.runnables import RunnableLambda
+
+from services.agents.tools import (
+    DATASET_COLUMNS,
+    GITHUB_CLIENT,
+    GetRepoCountsTool,
+    requested_columns,
+)
+from services.github.client import AsyncGitHubClient
+
+
+def test_requested_columns_from_the_runnable_config():
+    """Test that the tools read their columns from the `configurable` config."""
+    columns = {"get_repo_issues": ["state"]}
+    read = RunnableLambda(lambda name: requested_columns(name))
+
+    config = {"configurable": {DATASET_COLUMNS: columns}}
+    assert read.invoke("get_repo_issues", config=config) == ["state"]
+    assert read.invoke("get_repo_commits", config=config) is None
+    assert read.invoke("get_repo_issues") is None
+
+
+def _counts_client(requests):
+    """GitHub client counting one item per search, recording the requests."""
+
+    def respond(request):
+        variables = json.loads(request.content)["variables"]
+        requests.append(variables)
+        return httpx.Response(
+            200,
+            json={
+                "data": {
+                    f"op{index}__search": {"issueCount": 1}
+                    for index in range(len(variables))
+                }
+            },
+        )
+
+    return AsyncGitHubClient(
+        url="https://api.github.com/graphql",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(respond)),
+    )
+
+
+def _count(arguments, requests):
+    return asyncio.run(
+        GetRepoCountsTool().ainvoke(
+            {
+                "owner": "o",
+                "name": "r",
+                "dataset": "issues",
+                "states": [],
+                "date_field": "created",
+                "time_bucket": None,
+                "since": None,
+                "until": None,
+                **arguments,
+            },
+            config={"configurable": {GITHUB_CLIENT: _counts_client(requests)}},
+        )
+    )
+
+
+def test_counts_per_day_over_a_year():
+    """Test that more counts than a request allows are split into requests."""
+    requests = []
+    columns = _count(
+        {"time_bucket": "day", "since": "2024-01-01", "until": "2024-12-31"}, requests
+    )
+
+    assert [len(request) for request in requests] == [100, 100, 100, 66]
+    assert len(columns["period"]) == len(columns["count"]) == 366
+    assert columns["period"][0] == "2024-01-01"
+    assert (
+        requests[0]["op0__query"] == "repo:o/r is:issue created:2024-01-01..2024-01-01"
+    )
+
+
+def test_counts_are_labelled_with_the_bucket_start():
+    """Test that a bucket cut by the range is labelled with its start."""
+    requests = []
+    columns = _count(
+        {
+            "states": ["open", "closed"],
+            "time_bucket": "month",
+            "since": "2024-01-15",
+            "until": "2024-02-10",
+        },
+        requests,
+    )
+
+    assert columns == {
+        "period": ["2024-01-01", "2024-01-01", "2024-02-01", "2024-02-01"],
+        "state": ["open", "closed", "open", "closed"],
+        "count": [1, 1, 1, 1],
+    }
+    assert requests[0]["op0__query"] == (
+        "repo:o/r is:issue is:open created:2024-01-15..2024-01-31"
+    )
+
+
+@pytest.mark.parametrize(
+    "arguments, message",
+    [
+        (
+            {"states": ["merged"], "time_bucket": "month", "since": "2024-01-01"},
+            "merged",
+        ),
+        ({"time_bucket": "week"}, "since date"),
+    ],
+)
+def test_invalid_counts_are_reported_to_the_agent(arguments, message):
+    """Test that invalid arguments are returned as an error, not raised."""
+    requests = []
+
+    assert message in _count(arguments, requests)
+    assert requests == []
+
+
+def test_sync_invocation_runs_the_async_tool():
+    """Test that a tool invoked synchronously returns what it would await."""
+    requests = []
+    arguments = {
+        "owner": "o",
+        "name": "r",
+        "dataset": "issues",
+        "states": ["open"],
+        "date_field": "created",
+        "time_bucket": None,
+        "since": "2024-01-01",
+        "until": "2024-01-31",
+    }
+
+    columns = GetRepoCountsTool().invoke(
+        arguments, config={"configurable": {GITHUB_CLIENT: _counts_client(requests)}}
+    )
+
+    assert columns == {"state": ["open"], "count": [1]}
+    assert len(requests) == 1
@@ -0,0 +1,43 @@
+"""LLM usage accounting unit test module."""
+
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+
+from services.agents.llm_cache import LLMResponseCache
+from services.agents.usage import StageUsage
+from services.cache import MemoryCacheBackend
+
+
+def _model(cache):
+    message = AIMessage(
+        content="A plan",
+        usage_metadata={"input_tokens": 100, "output_tokens": 10, "total_tokens": 110},
+    )
+    return GenericFakeChatModel(messages=iter([message]), cache=cache)
+
+
+def test_cache_hits_cost_no_tokens():
+    """Test that the calls answered from the LLM cache spend no tokens."""
+    cache = LLMResponseCache(MemoryCacheBackend(), ttl=60)
+    usage = StageUsage()
+    model = _model(cache)
+    config = {"callbacks": [usage], "metadata": {"langgraph_node": "planner"}}
+
+    for _ in range(3):
+        assert model.invoke("Plan a chart", config=config).content == "A plan"
+
+    assert cache.stats()["hits"] == 2
+    stats = usage.stats()["planner"]
+    assert stats["calls"] == 1
+    assert stats["cached_calls"] == 2
+    assert stats["prompt_tokens"] == 100
+    assert stats["completion_tokens"] == 10
+    assert stats["mean_prompt_tokens"] == 100
+
+
+def test_calls_outside_the_graph():
+    """Test that calls without a graph node are counted as other."""
+    usage = StageUsage()
+    _model(None).invoke("Plan a chart", config={"callbacks": [usage]})
+
+    assert usage.stats()["other"]["calls"] == 1